@@ -0,0 +1,17 @@
+import sys
+from pathlib import Path
+
+def append_file(export, store_path):
+    """Fold the responses of a new survey export into the moments store.
+
+    Appending the same export twice counts its responses twice.
+    """
+    from climate_shocks.analysis.moments import append_export
+
+    store = append_export(export, store_path)
+    print(f"{Path(export).name} appended, {store['answers'].sum()} respondents in {store_path}.")
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python append_responses.py <export.csv or export.csv.zip>")
+    append_file(sys.argv[1], "bld/moments.json")
@@ -2,7 +2,7 @@
 import shutil
 import pytask
 from pytask_latex import compilation_steps as cs
-from climate_shocks.config import BLD, PAPER_DIR
+from climate_shocks.config import BLD, PAPER_ASSETS, PAPER_DIR
 
 documents = ["climate_shocks"]
 
@@ -16,8 +16,13 @@ for document in documents:
         ),
     )
     @pytask.task(id=document)
-    def task_compile_document():
-        """Compile the document specified in the latex decorator."""
+    def task_compile_document(depends_on=PAPER_ASSETS / "assets.json"):
+        """Compile the document specified in the latex decorator.
+
+        The document includes the figure assets. It depends on their content hashes in
+        the manifest, which is only rewritten when a figure changed.
+
+        """
 
     kwargs = {
         "depends_on": BLD / "latex" / f"{document}.pdf",
@@ -0,0 +1,349 @@
+"""Materialized cube of the aggregates behind the figures and the tests.
+
+Every figure and test of the project summarizes a few dimensions of the survey:
+country, person, risk, category, the answer to a question, or a scale score. The cube
+computes these summaries in one go over the respondents and holds
+
+* ``ratings``: the count, mean and ``m2``, the sum of squared deviations from the
+  mean, of the ratings by country, person, risk and category,
+* ``answers``: the number of respondents by country, question and answer code, read
+  from the crosstab of the countries and the questions, see ``crosstab_items``, and
+* ``scores``: the number of respondents by country, scale and score.
+
+Every table also holds the rollup over all respondents under the country ``"All"``,
+which includes the respondents from other or missing countries. The rollup of the
+ratings pools the moments of the countries with ``merge_moments``. The cube is saved as
+JSON in ``bld``, and the query functions return slices shaped like the inputs of the
+plotting functions, so rendering and testing cost time in the number of cells only.
+
+"""
+import functools
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from climate_shocks.analysis.crosstab import (
+    answer_totals,
+    contingency_table,
+    crosstab_items,
+)
+from climate_shocks.analysis.moments import (
+    empty_store,
+    merge_moments,
+    rating_moments,
+    store_average_ratings,
+    store_moments,
+)
+from climate_shocks.analysis.ratings_cube import LEVELS, moments_t_test
+from climate_shocks.analysis.stratified import ratios_from_counts
+from climate_shocks.instrumentation import instrument
+
+ALL = "All"
+COUNTRY = "Country_of_Residence"
+COUNTRIES = ["Germany", "India", "Indonesia"]
+COUNTRY_CODES = {1: "Germany", 2: "India", 3: "Indonesia"}
+QUESTIONS = [
+    "ClimateConcern",
+    "ClimateDamage",
+    "ClimateCause",
+    "ClimateCauseProbability",
+    "CS_Experience",
+]
+
+TABLES = {
+    "ratings": [COUNTRY, *LEVELS],
+    "answers": [COUNTRY, "Question", "Answer"],
+    "scores": [COUNTRY, "Scale", "Score"],
+}
+
+
+@instrument("aggregate")
+def build_aggregates(data, questions=QUESTIONS, scales=None):
+    """Compute the aggregate cube of a survey.
+
+    Args:
+        data (pandas.DataFrame): The survey with readable rating column names, see
+            ``replace_column_names``, the country codes, the questions and the items
+            of the scales.
+        questions (list): The questions whose answer codes are counted.
+        scales (dict, optional): The scales whose scores are counted, see
+            ``load_scales``. Defaults to no scales.
+
+    Returns:
+        dict: The ``ratings``, ``answers`` and ``scores`` tables.
+
+    """
+    country = data[COUNTRY].map(_country_label).astype(object)
+
+    moments = {
+        label: rating_moments(group)
+        for label, group in data.groupby(country, dropna=False, sort=True)
+    }
+    ratings = {label: cells for label, cells in moments.items() if pd.notna(label)}
+    ratings[ALL] = functools.reduce(
+        merge_moments, moments.values(), empty_store()["ratings"]
+    )
+    ratings = pd.concat(ratings, names=[COUNTRY])
+
+    crosstab = crosstab_items(data, [COUNTRY, *questions])
+    counts = [_answer_counts(crosstab, question) for question in questions]
+    answers = _count_table(counts, "answers")
+
+    counts = []
+    if scales:
+        from climate_shocks.analysis.scoring import score_scales
+
+        for scale, score in score_scales(data, scales).round(6).items():
+            counts.append(_count(country, scale, score))
+    scores = _with_rollup(_count_table(counts, "scores"), _rollup_counts)
+
+    tables = {"ratings": ratings, "answers": answers, "scores": scores}
+    return {name: _plain(table, TABLES[name]) for name, table in tables.items()}
+
+
+def save_aggregates(aggregates, path):
+    """Write the aggregate cube to a JSON file if it changed.
+
+    Args:
+        aggregates (dict): The cube, see ``build_aggregates``.
+        path (str or pathlib.Path): Path to the JSON file.
+
+    Returns:
+        bool: Whether the file was written. An unchanged file is left alone, so the
+            tasks depending on it are skipped.
+
+    """
+    content = {}
+    for name, table in aggregates.items():
+        table = table.to_frame() if isinstance(table, pd.Series) else table
+        content[name] = {
+            "cells": [list(cell) for cell in table.index],
+            **{column: table[column].tolist() for column in table},
+        }
+    path = Path(path)
+    text = json.dumps(content) + "\n"
+    if path.exists() and path.read_text() == text:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return True
+
+
+def load_aggregates(path):
+    """Read the aggregate cube from a JSON file.
+
+    Args:
+        path (str or pathlib.Path): Path to the JSON file.
+
+    Returns:
+        dict: The cube, see ``build_aggregates``.
+
+    """
+    content = json.loads(Path(path).read_text())
+    aggregates = {}
+    for name, names in TABLES.items():
+        table = content[name]
+        index = pd.MultiIndex.from_tuples(map(tuple, table.pop("cells")), names=names)
+        frame = pd.DataFrame(table, index=index)
+        frame["count"] = frame["count"].astype(np.int64)
+        aggregates[name] = frame if name == "ratings" else frame["count"]
+    return aggregates
+
+
+def cell_moments(aggregates, country=ALL):
+    """Query the count, mean and sample variance of the ratings of a country.
+
+    Args:
+        aggregates (dict): The cube, see ``build_aggregates``.
+        country (str): The country, or ``"All"`` for all respondents.
+
+    Returns:
+        pandas.DataFrame: The columns ``count``, ``mean`` and ``var`` indexed by
+            person, risk and category, like ``aggregate_ratings``.
+
+    """
+    return store_moments(_country_store(aggregates, country))
+
+
+def average_ratings(aggregates, country=ALL):
+    """Query the average ratings of a country, like ``calculate_average_ratings``.
+
+    Args:
+        aggregates (dict): The cube, see ``build_aggregates``.
+        country (str): The country, or ``"All"`` for all respondents.
+
+    Returns:
+        pandas.DataFrame: The columns Person, Category, Risk and Average Rating.
+
+    """
+    return store_average_ratings(_country_store(aggregates, country))
+
+
+def t_tests(
+    aggregates, country=ALL, persons=None, categories_order=None, equal_var=True
+):
+    """Query the low vs. high risk t-tests of a country, shaped like ``cube_t_test``.
+
+    Args:
+        aggregates (dict): The cube, see ``build_aggregates``.
+        country (str): The country, or ``"All"`` for all respondents.
+        persons (list, optional): Persons to test. Defaults to all persons.
+        categories_order (list, optional): Categories to test. Defaults to all
+            categories.
+        equal_var (bool): Whether to run Student's t-test (default) or Welch's t-test.
+
+    Returns:
+        pandas.DataFrame: The columns Person, Category, T-Statistic, P-Value and DF.
+
+    """
+    moments = cell_moments(aggregates, country)
+    return moments_t_test(moments, persons, categories_order, equal_var)
+
+
+def answer_counts(aggregates, question, countries=COUNTRIES, labels=None):
+    """Query the number of respondents giving every answer to a question by country.
+
+    Args:
+        aggregates (dict): The cube, see ``build_aggregates``.
+        question (str): The question.
+        countries (list): The countries, which may include ``"All"``.
+        labels (dict, optional): Answer codes mapped to labels. Answers without a
+            label are left out, like with ``pandas.Series.map``. Defaults to the
+            codes.
+
+    Returns:
+        pandas.DataFrame: One row per country and one column per answer, in the order
+            of the labels or of the codes.
+
+    """
+    counts = aggregates["answers"].xs(question, level="Question")
+    if labels is not None:
+        answers = counts.index.get_level_values("Answer").map(labels)
+        counts = counts[answers.notna()]
+        counts.index = counts.index.set_levels(
+            counts.index.levels[1].map(labels), level="Answer", verify_integrity=False
+        )
+    table = counts.unstack("Answer", fill_value=0)
+    if labels is None:
+        order = sorted(table)
+    else:
+        order = list(dict.fromkeys(labels.values()))
+    return table.reindex(index=countries, columns=order, fill_value=0).astype(np.int64)
+
+
+def answer_ratios(aggregates, question, countries=COUNTRIES, labels=None):
+    """Query the share of every answer to a question by country.
+
+    With ``CS_Experience`` and the labels ``{1: 'Yes', 2: 'No'}``, this gives the table
+    of ``calculate_ratios`` that is plotted in Fig5.
+
+    Args:
+        aggregates (dict): The cube, see ``build_aggregates``.
+        question (str): The question.
+        countries (list): The countries, which may include ``"All"``.
+        labels (dict, optional): Answer codes mapped to labels, see ``answer_counts``.
+
+    Returns:
+        pandas.DataFrame: The number of every answer and its share, with the share
+            columns prefixed by ``Ratio_``, indexed by the country.
+
+    """
+    counts = answer_counts(aggregates, question, countries, labels)
+    return ratios_from_counts(counts.stack())
+
+
+def score_counts(aggregates, scale, countries=COUNTRIES):
+    """Query the number of respondents with every score on a scale by country.
+
+    Args:
+        aggregates (dict): The cube, see ``build_aggregates``.
+        scale (str): The scale.
+        countries (list): The countries, which may include ``"All"``.
+
+    Returns:
+        pandas.Series: The counts indexed by country and score, in ascending order of
+            the scores.
+
+    """
+    counts = aggregates["scores"].xs(scale, level="Scale")
+    scores = sorted(set(counts.index.get_level_values("Score")))
+    cells = [
+        (country, score)
+        for country in countries
+        for score in scores
+        if (country, score) in counts.index
+    ]
+    return counts.reindex(pd.MultiIndex.from_tuples(cells, names=[COUNTRY, "Score"]))
+
+
+def _country_label(code):
+    """Name a country code, keeping unknown codes as text and missing codes missing."""
+    if pd.isna(code):
+        return np.nan
+    if isinstance(code, (int, float, np.number)) and float(code).is_integer():
+        code = int(code)
+    return COUNTRY_CODES.get(code, str(code))
+
+
+def _country_store(aggregates, country):
+    """Select the ratings of a country as a store of moments, see ``empty_store``."""
+    return {"ratings": aggregates["ratings"].xs(country, level=COUNTRY)}
+
+
+def _answer_counts(crosstab, question):
+    """Read the answer counts of a question by country and in total from a crosstab."""
+    table = contingency_table(crosstab, COUNTRY, question)
+    table.index = table.index.map(_country_label)
+    total = answer_totals(crosstab, question).to_frame(ALL).T
+    counts = pd.concat([table, total]).stack()
+    counts = counts[counts > 0]
+    return counts.set_axis(
+        pd.MultiIndex.from_arrays(
+            [
+                counts.index.get_level_values(0),
+                np.full(len(counts), question, dtype=object),
+                counts.index.get_level_values(1),
+            ]
+        )
+    )
+
+
+def _count(country, name, values):
+    """Count the respondents by country and value, keeping missing countries."""
+    keys = [country, np.full(len(values), name, dtype=object), values]
+    counts = values.groupby(keys, dropna=False).size()
+    return counts[counts.index.get_level_values(2).notna()]
+
+
+def _count_table(counts, name):
+    """Concatenate counts into one series, which may be empty."""
+    if not counts:
+        index = pd.MultiIndex.from_arrays([[]] * 3, names=TABLES[name])
+        return pd.Series(np.zeros(0, dtype=np.int64), index=index, name="count")
+    return pd.concat(counts).rename("count")
+
+
+def _with_rollup(table, rollup):
+    """Append the rollup over the countries and drop the cells of missing countries."""
+    country = table.index.get_level_values(0)
+    total = rollup(table)
+    levels = [total.index.get_level_values(i) for i in range(total.index.nlevels)]
+    total.index = pd.MultiIndex.from_arrays([[ALL] * len(total), *levels])
+    return pd.concat([table[country.notna()], total])
+
+
+def _rollup_counts(counts):
+    """Add up the counts of the countries."""
+    levels = list(range(1, counts.index.nlevels))
+    return counts.groupby(level=levels, observed=True, sort=False).sum()
+
+
+def _plain(table, names):
+    """Replace categorical levels by their plain values and name the levels."""
+    index = table.index
+    levels = [index.get_level_values(i).tolist() for i in range(index.nlevels)]
+    table = table.copy()
+    table.index = pd.MultiIndex.from_arrays(levels, names=names)
+    return table
@@ -0,0 +1,223 @@
+"""Crosstabs of all coded categorical items from one sparse product.
+
+Every answer code of every item is a column of a sparse one-hot matrix ``X`` with one
+row per respondent, which holds at most one entry per respondent and item. The
+product ``X.T @ X`` then holds the contingency tables of all pairs of items at once:
+the block of two items counts the respondents by their answers to both, and the
+diagonal block of an item holds its answer counts. Respondents with a missing answer
+count in none of the tables of that item.
+
+From the blocks, ``contingency_table`` reads one table, ``association_table`` the
+chi-square test of independence and Cramér's V for every pair, and ``row_ratios`` and
+``column_ratios`` the shares within the rows or columns of a table.
+
+"""
+import collections
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from climate_shocks.instrumentation import instrument
+
+ITEMS = [
+    "ClimateConcern",
+    "ClimateDamage",
+    "ClimateCause",
+    "ClimateCauseProbability",
+    "CS_Experience",
+    "CS_Extraction",
+    "Gender",
+    "Education",
+    "Country_of_Residence",
+]
+
+Crosstab = collections.namedtuple("Crosstab", ["counts", "levels"])
+
+
+def one_hot(data, items=ITEMS):
+    """Encode the answer codes of items as a sparse one-hot matrix.
+
+    Answers are read as numeric codes; other answers count as missing.
+
+    Args:
+        data (pandas.DataFrame): The survey with the items.
+        items (list): The items.
+
+    Returns:
+        tuple: The ``scipy.sparse.csr_array`` with one row per respondent and one
+            column per item and code, and the ``pandas.MultiIndex`` of its columns
+            with the levels Item and Code, in ascending order of the codes.
+
+    Raises:
+        KeyError: If an item is not a column of the survey.
+
+    """
+    from scipy import sparse
+
+    missing = [item for item in items if item not in data.columns]
+    if missing:
+        raise KeyError(f"Columns {missing} are not part of the survey.")
+    rows, columns, levels = [], [], []
+    for item in items:
+        answers = pd.to_numeric(data[item].astype(object), errors="coerce")
+        codes, uniques = pd.factorize(answers, sort=True)
+        answered = np.flatnonzero(codes >= 0)
+        rows.append(answered)
+        columns.append(codes[answered] + len(levels))
+        levels.extend((item, code) for code in uniques)
+    rows, columns = np.concatenate(rows), np.concatenate(columns)
+    matrix = sparse.csr_array(
+        (np.ones(len(rows), dtype=np.int32), (rows, columns)),
+        shape=(len(data), len(levels)),
+    )
+    return matrix, pd.MultiIndex.from_tuples(levels, names=["Item", "Code"])
+
+
+@instrument("aggregate")
+def crosstab_items(data, items=ITEMS):
+    """Count the respondents by their answers to every pair of items.
+
+    Args:
+        data (pandas.DataFrame): The survey with the items.
+        items (list): The items.
+
+    Returns:
+        Crosstab: The square ``counts`` with one row and one column per item and code,
+            and the ``levels`` naming them, see ``one_hot``.
+
+    """
+    matrix, levels = one_hot(data, items)
+    counts = (matrix.T @ matrix).toarray().astype(np.int64)
+    return Crosstab(counts=counts, levels=levels)
+
+
+def contingency_table(crosstab, row, column, row_labels=None, column_labels=None):
+    """Read the contingency table of two items.
+
+    Args:
+        crosstab (Crosstab): The crosstab, see ``crosstab_items``.
+        row (str): The item of the rows.
+        column (str): The item of the columns. If it is the item of the rows, the
+            table is diagonal with the answer counts.
+        row_labels (dict, optional): Codes of the rows mapped to labels. Codes
+            without a label are left out, like with ``pandas.Series.map``. Defaults
+            to the codes.
+        column_labels (dict, optional): Codes of the columns mapped to labels.
+
+    Returns:
+        pandas.DataFrame: The number of respondents, with one row per answer to the
+            first item and one column per answer to the second item, in the order of
+            the labels or of the codes.
+
+    """
+    rows, columns = _positions(crosstab, row), _positions(crosstab, column)
+    table = pd.DataFrame(
+        crosstab.counts[np.ix_(rows, columns)],
+        index=pd.Index(crosstab.levels[rows].get_level_values(1)),
+        columns=pd.Index(crosstab.levels[columns].get_level_values(1)),
+    )
+    table = _relabel(table, row_labels, axis=0)
+    table = _relabel(table, column_labels, axis=1)
+    return table.rename_axis(index=row, columns=column)
+
+
+def answer_totals(crosstab, item):
+    """Read the number of respondents giving every answer to an item.
+
+    Args:
+        crosstab (Crosstab): The crosstab, see ``crosstab_items``.
+        item (str): The item.
+
+    Returns:
+        pandas.Series: The counts indexed by the codes in ascending order.
+
+    """
+    positions = _positions(crosstab, item)
+    counts = crosstab.counts[positions, positions]
+    index = pd.Index(crosstab.levels[positions].get_level_values(1), name=item)
+    return pd.Series(counts, index=index, name="count")
+
+
+def association_table(crosstab, items=None):
+    """Test every pair of items for independence.
+
+    Answers given by nobody who answered the other item are left out of the test of
+    the pair.
+
+    Args:
+        crosstab (Crosstab): The crosstab, see ``crosstab_items``.
+        items (list, optional): The items. Defaults to all items of the crosstab.
+
+    Returns:
+        pandas.DataFrame: The number of respondents answering both items, the
+            chi-square statistic of Pearson, its degrees of freedom and p-value, and
+            Cramér's V, indexed by the two items of every pair.
+
+    """
+    from scipy.stats import chi2
+
+    items = list(crosstab.levels.unique(level=0)) if items is None else items
+    records = []
+    for row, column in itertools.combinations(items, 2):
+        table = contingency_table(crosstab, row, column).to_numpy(dtype=np.float64)
+        table = table[table.sum(axis=1) > 0][:, table.sum(axis=0) > 0]
+        n = table.sum()
+        k = min(table.shape)
+        if k < 2:
+            records.append((row, column, int(n), np.nan, 0, np.nan, np.nan))
+            continue
+        expected = np.outer(table.sum(axis=1), table.sum(axis=0)) / n
+        statistic = ((table - expected) ** 2 / expected).sum()
+        dof = (table.shape[0] - 1) * (table.shape[1] - 1)
+        p_value = chi2.sf(statistic, dof)
+        v = np.sqrt(statistic / (n * (k - 1)))
+        records.append((row, column, int(n), statistic, dof, p_value, v))
+    columns = ["Row", "Column", "N", "Chi-Square", "DF", "P-Value", "Cramer's V"]
+    return pd.DataFrame.from_records(records, columns=columns).set_index(
+        ["Row", "Column"]
+    )
+
+
+def row_ratios(table):
+    """Divide a contingency table by its row totals.
+
+    Args:
+        table (pandas.DataFrame): The table, see ``contingency_table``.
+
+    Returns:
+        pandas.DataFrame: The shares of the answers within every row.
+
+    """
+    return table.div(table.sum(axis=1), axis=0)
+
+
+def column_ratios(table):
+    """Divide a contingency table by its column totals.
+
+    Args:
+        table (pandas.DataFrame): The table, see ``contingency_table``.
+
+    Returns:
+        pandas.DataFrame: The shares of the answers within every column.
+
+    """
+    return table.div(table.sum(axis=0), axis=1)
+
+
+def _positions(crosstab, item):
+    """Find the rows and columns of the counts belonging to an item."""
+    if item not in crosstab.levels.get_level_values(0):
+        raise KeyError(f"The item {item!r} is not part of the crosstab.")
+    return np.flatnonzero(crosstab.levels.get_level_values(0) == item)
+
+
+def _relabel(table, labels, axis):
+    """Map the codes along an axis to labels, dropping codes without a label."""
+    if labels is None:
+        return table
+    table = table if axis == 0 else table.T
+    named = table.index.map(labels)
+    table = table[named.notna()].groupby(named[named.notna()]).sum()
+    table = table.reindex(list(dict.fromkeys(labels.values())), fill_value=0)
+    return table if axis == 0 else table.T
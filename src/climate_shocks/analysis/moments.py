@@ -0,0 +1,364 @@
+"""Persisted sufficient statistics of the ratings and the answer counts.
+
+New batches of responses are folded into a store instead of recomputing every result
+from the whole history. The store holds
+
+* the count, mean and sum of squared deviations from the mean (``m2``) of the ratings
+  in every cell of the ratings cube, that is per person, risk and category, and
+* the number of respondents giving every answer to a question within every stratum,
+  by default ``CS_Experience`` by ``Country_of_Residence`` as in Fig5.
+
+The moments of a batch are merged with the stored moments with the pairwise update of
+Chan, Golub and LeVeque, which stays accurate where the textbook sum of squares
+cancels. Averages, t-tests and ratios are then derived from the store in time
+proportional to the number of cells, whatever the number of respondents.
+
+The store is written as JSON. Floats survive the round trip exactly. New exports are
+folded into the store of the project, ``bld/moments.json``, with ``append_export`` or
+``python append_responses.py <export>``.
+
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from climate_shocks.analysis.model import load_data, replace_column_names
+from climate_shocks.analysis.ratings_cube import (
+    LEVELS,
+    aggregate_ratings,
+    moments_t_test,
+    ratings_cube,
+)
+from climate_shocks.analysis.stratified import ratios_from_counts
+from climate_shocks.config import MOMENTS
+from climate_shocks.data_management.schema import columns_for
+
+GROUPS = ["Country_of_Residence"]
+COLUMN = "CS_Experience"
+
+
+def empty_store(groups=GROUPS, column=COLUMN):
+    """Create a store without responses.
+
+    Args:
+        groups (list): The grouping columns of the answer counts.
+        column (str): The column with the counted answers.
+
+    Returns:
+        dict: The ``ratings`` moments, the ``answers`` counts, and the ``groups`` and
+            ``column`` of the counts.
+
+    """
+    ratings = pd.DataFrame(
+        {"count": np.zeros(0, dtype=np.int64), "mean": [], "m2": []},
+        index=pd.MultiIndex.from_tuples([], names=LEVELS),
+    )
+    answers = pd.Series(
+        np.zeros(0, dtype=np.int64),
+        index=pd.MultiIndex.from_tuples([], names=[*groups, column]),
+        name="count",
+    )
+    return {
+        "ratings": ratings,
+        "answers": answers,
+        "groups": list(groups),
+        "column": column,
+    }
+
+
+def batch_store(data, groups=GROUPS, column=COLUMN):
+    """Summarize a batch of responses into a store.
+
+    Args:
+        data (pandas.DataFrame): The responses with readable rating column names, see
+            ``replace_column_names``. The rating, grouping or answer columns may be
+            left out.
+        groups (list): The grouping columns of the answer counts.
+        column (str): The column with the counted answers.
+
+    Returns:
+        dict: The store of the batch, see ``empty_store``.
+
+    """
+    store = empty_store(groups, column)
+    if any(_is_rating(name) for name in data.columns):
+        store["ratings"] = rating_moments(data)
+    if set(groups) | {column} <= set(data.columns):
+        keys = [data[name] for name in [*groups, column]]
+        answers = data.groupby(keys, observed=True).size().rename("count")
+        answers.index = _plain_index(answers.index)
+        store["answers"] = answers.astype(np.int64)
+    return store
+
+
+def rating_moments(data):
+    """Compute the count, mean and ``m2`` of the ratings in every cell.
+
+    Args:
+        data (pandas.DataFrame): The responses with readable rating column names, see
+            ``replace_column_names``.
+
+    Returns:
+        pandas.DataFrame: The columns ``count``, ``mean`` and ``m2`` indexed by
+            person, risk and category, like the ``ratings`` of a store.
+
+    """
+    moments = aggregate_ratings(ratings_cube(data))
+    moments.index = _plain_index(moments.index)
+    return pd.DataFrame(
+        {
+            "count": moments["count"].astype(np.int64),
+            "mean": moments["mean"],
+            "m2": (moments["var"] * (moments["count"] - 1)).fillna(0.0),
+        }
+    )
+
+
+def merge_stores(first, second):
+    """Merge two stores.
+
+    Args:
+        first (dict): A store, see ``empty_store``.
+        second (dict): A store with the same grouping and answer columns.
+
+    Returns:
+        dict: The store of the responses of both.
+
+    Raises:
+        ValueError: If the stores count answers of different columns or strata.
+
+    """
+    if (first["groups"], first["column"]) != (second["groups"], second["column"]):
+        info = "Cannot merge stores that count answers of different columns or strata."
+        raise ValueError(info)
+    return {
+        "ratings": merge_moments(first["ratings"], second["ratings"]),
+        "answers": merge_counts(first["answers"], second["answers"]),
+        "groups": first["groups"],
+        "column": first["column"],
+    }
+
+
+def merge_moments(first, second):
+    """Merge the count, mean and ``m2`` of matching cells with Chan's pairwise update.
+
+    Args:
+        first (pandas.DataFrame): The columns ``count``, ``mean`` and ``m2`` by cell.
+        second (pandas.DataFrame): The same for other responses.
+
+    Returns:
+        pandas.DataFrame: The moments of the responses of both, for the cells of both,
+            in the order of ``first`` followed by the new cells of ``second``.
+
+    """
+    cells = first.index.append(second.index.difference(first.index, sort=False))
+    a = first.reindex(cells)
+    b = second.reindex(cells)
+    n_a = a["count"].fillna(0).to_numpy()
+    n_b = b["count"].fillna(0).to_numpy()
+    mean_a = a["mean"].fillna(0).to_numpy()
+    mean_b = b["mean"].fillna(0).to_numpy()
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    with np.errstate(invalid="ignore", divide="ignore"):
+        share = np.where(n > 0, n_b / n, 0.0)
+    return pd.DataFrame(
+        {
+            "count": n.astype(np.int64),
+            "mean": np.where(n > 0, mean_a + delta * share, np.nan),
+            "m2": a["m2"].fillna(0).to_numpy()
+            + b["m2"].fillna(0).to_numpy()
+            + delta**2 * n_a * share,
+        },
+        index=cells,
+    )
+
+
+def merge_counts(first, second):
+    """Add up the answer counts of matching cells.
+
+    Args:
+        first (pandas.Series): The number of respondents by stratum and answer.
+        second (pandas.Series): The same for other responses.
+
+    Returns:
+        pandas.Series: The counts of the responses of both.
+
+    """
+    return first.add(second, fill_value=0).astype(np.int64)
+
+
+def append_responses(path, data, groups=GROUPS, column=COLUMN):
+    """Fold a batch of responses into the store saved at a path.
+
+    Args:
+        path (str or pathlib.Path): Path to the store. A missing store is created.
+        data (pandas.DataFrame): The new responses, see ``batch_store``.
+        groups (list): The grouping columns of the answer counts of a new store.
+        column (str): The column with the counted answers of a new store.
+
+    Returns:
+        dict: The updated store.
+
+    """
+    path = Path(path)
+    store = load_store(path) if path.exists() else empty_store(groups, column)
+    store = merge_stores(store, batch_store(data, store["groups"], store["column"]))
+    save_store(store, path)
+    return store
+
+
+def append_export(source, path=MOMENTS):
+    """Fold the responses of a survey export into the store saved at a path.
+
+    Args:
+        source (str or pathlib.Path): Path to the CSV file or zip archive holding the
+            new responses.
+        path (str or pathlib.Path): Path to the store. A missing store is created.
+
+    Returns:
+        dict: The updated store.
+
+    Raises:
+        KeyError: If the export lacks the ratings, ``GROUPS`` or ``COLUMN``.
+
+    """
+    data = load_data(source, [*columns_for("model"), *GROUPS, COLUMN])
+    return append_responses(path, replace_column_names(data))
+
+
+def save_store(store, path):
+    """Write a store to a JSON file.
+
+    Args:
+        store (dict): The store, see ``empty_store``.
+        path (str or pathlib.Path): Path to the JSON file.
+
+    """
+    ratings, answers = store["ratings"], store["answers"]
+    content = {
+        "groups": store["groups"],
+        "column": store["column"],
+        "ratings": {
+            "cells": [list(cell) for cell in ratings.index],
+            **{name: ratings[name].tolist() for name in ["count", "mean", "m2"]},
+        },
+        "answers": {
+            "cells": [list(cell) for cell in answers.index],
+            "count": answers.tolist(),
+        },
+    }
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(content) + "\n")
+
+
+def load_store(path):
+    """Read a store from a JSON file.
+
+    Args:
+        path (str or pathlib.Path): Path to the JSON file.
+
+    Returns:
+        dict: The store, see ``empty_store``.
+
+    """
+    content = json.loads(Path(path).read_text())
+    store = empty_store(content["groups"], content["column"])
+    ratings, answers = content["ratings"], content["answers"]
+    if ratings["cells"]:
+        store["ratings"] = pd.DataFrame(
+            {
+                "count": np.asarray(ratings["count"], dtype=np.int64),
+                "mean": np.asarray(ratings["mean"], dtype=np.float64),
+                "m2": np.asarray(ratings["m2"], dtype=np.float64),
+            },
+            index=pd.MultiIndex.from_tuples(map(tuple, ratings["cells"]), names=LEVELS),
+        )
+    if answers["cells"]:
+        store["answers"] = pd.Series(
+            np.asarray(answers["count"], dtype=np.int64),
+            index=pd.MultiIndex.from_tuples(
+                map(tuple, answers["cells"]),
+                names=[*content["groups"], content["column"]],
+            ),
+            name="count",
+        )
+    return store
+
+
+def store_moments(store):
+    """Derive the count, mean and sample variance of every cell.
+
+    Args:
+        store (dict): The store, see ``empty_store``.
+
+    Returns:
+        pandas.DataFrame: The columns ``count``, ``mean`` and ``var`` indexed by
+            person, risk and category, like ``aggregate_ratings``.
+
+    """
+    ratings = store["ratings"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var = ratings["m2"] / (ratings["count"] - 1)
+    var = var.where(ratings["count"] > 1)
+    return pd.DataFrame(
+        {"count": ratings["count"], "mean": ratings["mean"], "var": var}
+    )
+
+
+def store_average_ratings(store):
+    """Derive the average ratings, like ``calculate_average_ratings``.
+
+    Args:
+        store (dict): The store, see ``empty_store``.
+
+    Returns:
+        pandas.DataFrame: The columns Person, Category, Risk and Average Rating.
+
+    """
+    averages = store["ratings"]["mean"].rename("Average Rating").reset_index()
+    return averages[["Person", "Category", "Risk", "Average Rating"]]
+
+
+def store_t_test(store, persons=None, categories_order=None, equal_var=True):
+    """Derive the low vs. high risk t-tests, like ``cube_t_test``.
+
+    Args:
+        store (dict): The store, see ``empty_store``.
+        persons (list, optional): Persons to test. Defaults to all stored persons.
+        categories_order (list, optional): Categories to test. Defaults to all stored
+            categories.
+        equal_var (bool): Whether to run Student's t-test (default) or Welch's t-test.
+
+    Returns:
+        pandas.DataFrame: The columns Person, Category, T-Statistic, P-Value and DF.
+
+    """
+    return moments_t_test(store_moments(store), persons, categories_order, equal_var)
+
+
+def store_ratios(store):
+    """Derive the share of every answer in every stratum, like ``stratified_ratios``.
+
+    Args:
+        store (dict): The store, see ``empty_store``.
+
+    Returns:
+        pandas.DataFrame: The number of every answer and its share, with the share
+            columns prefixed by ``Ratio_``, indexed by the stratum.
+
+    """
+    return ratios_from_counts(store["answers"])
+
+
+def _is_rating(name):
+    return name.strip().startswith(("JB_low_", "JB_high_"))
+
+
+def _plain_index(index):
+    """Replace the categorical levels of an index by their plain values."""
+    levels = [index.get_level_values(i).tolist() for i in range(index.nlevels)]
+    return pd.MultiIndex.from_arrays(levels, names=index.names)
@@ -0,0 +1,214 @@
+"""Permutation tests for the low vs. high climate risk ratings.
+
+The t-test p-values assume normally distributed ratings, which is a poor fit for
+Likert items. Here the null distribution is built by reshuffling the risk labels
+within every contrast instead.
+
+For rating data with few distinct levels, a random relabelling is drawn as a chain of
+hypergeometric draws over the levels, which vectorizes over all permutations of a
+contrast. Data with many distinct values falls back to shuffling the ratings, in blocks
+of at most ``VALUES_BLOCK`` ratings, so the memory of a chunk stays bounded however many
+permutations it holds.
+
+Every contrast draws its permutations in chunks, each with its own random stream
+spawned from one seed. Contrasts whose p-value is clearly below or above ``alpha`` stop
+early, checked after every ``ROUND_CHUNKS`` chunks. As neither the streams nor the
+rounds depend on the worker processes or on the other contrasts, the results are
+reproducible and do not depend on the number of worker processes.
+
+"""
+import itertools
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from climate_shocks.analysis.ttest import as_block, block_moments, t_test_from_moments
+
+MAX_LEVELS = 64
+MAX_EXACT = 100_000
+VALUES_BLOCK = 2**21
+ROUND_CHUNKS = 2
+
+
+def permutation_t_test(
+    low,
+    high,
+    n_permutations=100_000,
+    seed=0,
+    n_jobs=1,
+    chunk_size=10_000,
+    alpha=0.05,
+    confidence=0.999,
+    index=None,
+):
+    """Run two-sided permutation t-tests for every pair of low and high risk columns.
+
+    For a fixed pooled sample the absolute Student t statistic increases with the
+    absolute difference in means, so the permutations only need the group sums.
+    Contrasts with at most ``n_permutations`` distinct relabellings are enumerated
+    exactly.
+
+    Args:
+        low (numpy.ndarray, numpy.ma.MaskedArray or pandas.DataFrame): Low risk
+            ratings with one column per contrast.
+        high (numpy.ndarray, numpy.ma.MaskedArray or pandas.DataFrame): High risk
+            ratings with the same columns.
+        n_permutations (int): Maximum number of random permutations per contrast.
+        seed (int): Seed of the random streams.
+        n_jobs (int): Number of worker processes.
+        chunk_size (int): Number of permutations per chunk of work.
+        alpha (float): Significance level used to stop early. Pass ``None`` to always
+            draw all permutations.
+        confidence (float): Confidence level of the Clopper-Pearson interval of the
+            p-value that decides whether a contrast can stop early.
+        index (pandas.Index, optional): Labels of the contrasts.
+
+    Returns:
+        pandas.DataFrame: One row per contrast with the Student t statistic, the
+            permutation p-value, its confidence interval, the number of permutations
+            used and whether the p-value is exact.
+
+    """
+    low, high = as_block(low), as_block(high)
+    n1, mean1, var1 = block_moments(low)
+    n2, mean2, var2 = block_moments(high)
+    statistic = t_test_from_moments(n1, mean1, var1, n2, mean2, var2)[0]
+
+    pooled = _pool(low, high)
+    n = n1 + n2
+    total = np.nansum(pooled, axis=1)
+    observed = np.abs(mean1 - mean2)
+    threshold = observed - 1e-9 * np.maximum(observed, 1.0)
+
+    k = len(n)
+    hits = np.zeros(k, dtype=np.int64)
+    draws = np.zeros(k, dtype=np.int64)
+    exact = np.zeros(k, dtype=bool)
+
+    valid = (n1 > 0) & (n2 > 0)
+    for j in np.flatnonzero(valid):
+        if math.comb(int(n[j]), int(n1[j])) <= min(n_permutations, MAX_EXACT):
+            hits[j], draws[j] = _exact_counts(pooled[j, : n[j]], n1[j], threshold[j])
+            exact[j] = True
+
+    active = valid & ~exact
+    levels = np.unique(pooled[~np.isnan(pooled)])
+    if len(levels) <= MAX_LEVELS:
+        data = (pooled[..., None] == levels).sum(axis=1)
+        kind = "levels"
+    else:
+        data = pooled
+        kind = "values"
+
+    chunks = [min(chunk_size, n_permutations - start) for start in range(0, n_permutations, chunk_size)]
+    streams = [sequence.spawn(len(chunks)) for sequence in np.random.SeedSequence(seed).spawn(k)]
+    executor = ProcessPoolExecutor(n_jobs) if n_jobs > 1 else None
+    try:
+        for start in range(0, len(chunks), ROUND_CHUNKS):
+            if not active.any():
+                break
+            selected = np.flatnonzero(active)
+            sizes = chunks[start : start + ROUND_CHUNKS]
+            jobs = [
+                (kind, data[j], levels, n1[j], n[j], total[j], threshold[j], size, streams[j][start + c])
+                for j in selected
+                for c, size in enumerate(sizes)
+            ]
+            results = executor.map(_count_chunk, jobs) if executor else map(_count_chunk, jobs)
+            for (j, size), count in zip(itertools.product(selected, sizes), results):
+                hits[j] += count
+                draws[j] += size
+            if alpha is not None:
+                low_ci, high_ci = _clopper_pearson(hits[selected], draws[selected], confidence)
+                decided = (high_ci < alpha) | (low_ci > alpha)
+                active[selected[decided]] = False
+    finally:
+        if executor:
+            executor.shutdown()
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pvalue = np.where(exact, hits / draws, (hits + 1) / (draws + 1))
+    pvalue[~valid] = np.nan
+    ci_low, ci_high = _clopper_pearson(hits, draws, confidence)
+    return pd.DataFrame(
+        {
+            "statistic": statistic,
+            "pvalue": pvalue,
+            "ci_low": np.where(exact, pvalue, ci_low),
+            "ci_high": np.where(exact, pvalue, ci_high),
+            "n_permutations": draws,
+            "exact": exact,
+        },
+        index=index,
+    )
+
+
+def _pool(low, high):
+    """Stack the observed ratings of both groups of every contrast, low risk first."""
+    k = low.shape[1]
+    n1 = (~np.isnan(low)).sum(axis=0)
+    n2 = (~np.isnan(high)).sum(axis=0)
+    pooled = np.full((k, int((n1 + n2).max(initial=0))), np.nan)
+    for block, offset in ((low, np.zeros(k, dtype=int)), (high, n1)):
+        observed = ~np.isnan(block)
+        rank = np.cumsum(observed, axis=0) - 1 + offset
+        rows, cols = np.nonzero(observed)
+        pooled[cols, rank[rows, cols]] = block[rows, cols]
+    return pooled
+
+
+def _count_chunk(job):
+    """Count the permutations of one chunk of a contrast at least as extreme as observed."""
+    kind, data, levels, n1, n, total, threshold, size, stream = job
+    rng = np.random.default_rng(stream)
+    if kind == "levels":
+        remaining_sample = np.full(size, n1, dtype=np.int64)
+        remaining_total = int(n)
+        sums = np.zeros(size)
+        for good, level in zip(data, levels):
+            if good == 0:
+                continue
+            drawn = rng.hypergeometric(good, remaining_total - good, remaining_sample)
+            sums += drawn * level
+            remaining_sample -= drawn
+            remaining_total -= good
+    else:
+        values = data[: int(n)]
+        step = max(VALUES_BLOCK // len(values), 1)
+        sums = np.concatenate(
+            [
+                _shuffled_sums(rng, values, n1, min(step, size - start))
+                for start in range(0, size, step)
+            ]
+        )
+    differences = np.abs(sums / n1 - (total - sums) / (n - n1))
+    return int((differences >= threshold).sum())
+
+
+def _shuffled_sums(rng, values, n1, size):
+    """Sum the first ``n1`` ratings of ``size`` random shuffles of a contrast."""
+    shuffled = rng.permuted(np.broadcast_to(values, (size, len(values))), axis=1)
+    return shuffled[:, : int(n1)].sum(axis=1)
+
+
+def _exact_counts(values, n1, threshold):
+    """Enumerate all relabellings of one contrast."""
+    n, total = len(values), values.sum()
+    combinations = itertools.combinations(range(n), int(n1))
+    index = np.fromiter(itertools.chain.from_iterable(combinations), dtype=np.int64)
+    sums = values[index.reshape(-1, int(n1))].sum(axis=1)
+    differences = np.abs(sums / n1 - (total - sums) / (n - n1))
+    return (differences >= threshold).sum(), len(sums)
+
+
+def _clopper_pearson(hits, draws, confidence):
+    """Compute exact binomial confidence intervals of the permutation p-values."""
+    from scipy.stats import beta
+
+    tail = (1 - confidence) / 2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        low = np.where(hits > 0, beta.ppf(tail, hits, draws - hits + 1), 0.0)
+        high = np.where(hits < draws, beta.ppf(1 - tail, hits + 1, draws - hits), 1.0)
+    return low, high
@@ -0,0 +1,129 @@
+"""Long-format cube of the job-decision ratings.
+
+The ratings are stored in wide columns named ``JB_{risk}_{person}_{category}``, and
+every respondent sees only one risk level per person. The cube reshapes these columns
+once into a series of ratings indexed by respondent, person, risk and category, which
+leaves out the between-subject gaps. The person, risk and category levels are ordered
+categoricals in the order of the columns, so aggregations come out in survey order.
+
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from climate_shocks.analysis.ttest import as_block, t_test_from_moments
+from climate_shocks.instrumentation import instrument
+
+LEVELS = ["Person", "Risk", "Category"]
+
+_RATING_COLUMN = re.compile(r"^JB_(low|high)_([^_]+)_(.+)$")
+
+
+def ratings_cube(data):
+    """Reshape the rating columns of the survey into the ratings cube.
+
+    Args:
+        data (pandas.DataFrame): The survey with columns ``JB_{risk}_{person}_{category}``.
+            Other columns are ignored.
+
+    Returns:
+        pandas.Series: The non-missing ratings as floats, indexed by respondent, person,
+            risk and category.
+
+    Raises:
+        ValueError: If the data has no rating columns.
+
+    """
+    columns, cells = [], []
+    for column in data.columns:
+        match = _RATING_COLUMN.match(column.strip())
+        if match:
+            risk, person, category = match.groups()
+            columns.append(column)
+            cells.append((person, risk.capitalize(), category))
+    if not columns:
+        info = "The data has no rating columns named 'JB_{risk}_{person}_{category}'."
+        raise ValueError(info)
+
+    values = as_block(data[columns])
+    rows, positions = np.nonzero(~np.isnan(values))
+    index = [data.index[rows].rename(data.index.name or "Respondent")]
+    for level in zip(*cells):
+        categories = list(dict.fromkeys(level))
+        codes = np.array([categories.index(value) for value in level])
+        index.append(pd.Categorical.from_codes(codes[positions], categories, ordered=True))
+    return pd.Series(
+        values[rows, positions],
+        index=pd.MultiIndex.from_arrays(index, names=[index[0].name, *LEVELS]),
+        name="Rating",
+    )
+
+
+@instrument("aggregate")
+def aggregate_ratings(cube, levels=LEVELS):
+    """Compute the count, mean and sample variance of the ratings in every cell.
+
+    Args:
+        cube (pandas.Series): The ratings cube, see ``ratings_cube``.
+        levels (list): The levels defining a cell. Defaults to person, risk and
+            category.
+
+    Returns:
+        pandas.DataFrame: The columns ``count``, ``mean`` and ``var``, indexed by the
+            cells in survey order.
+
+    """
+    return cube.groupby(level=levels, observed=True).agg(["count", "mean", "var"])
+
+
+def cube_t_test(cube, persons=None, categories_order=None, equal_var=True):
+    """Perform the low vs. high risk t-tests of every person and category from the cube.
+
+    Args:
+        cube (pandas.Series): The ratings cube, see ``ratings_cube``.
+        persons (list, optional): Persons to test. Defaults to all persons in the cube.
+        categories_order (list, optional): Categories to test. Defaults to all
+            categories in the cube.
+        equal_var (bool): Whether to run Student's t-test (default) or Welch's t-test.
+
+    Returns:
+        pandas.DataFrame: The columns Person, Category, T-Statistic, P-Value and DF, like
+            ``perform_t_test``.
+
+    """
+    return moments_t_test(aggregate_ratings(cube), persons, categories_order, equal_var)
+
+
+@instrument("test")
+def moments_t_test(moments, persons=None, categories_order=None, equal_var=True):
+    """Perform the low vs. high risk t-tests of every person and category from cell moments.
+
+    Args:
+        moments (pandas.DataFrame): The columns ``count``, ``mean`` and ``var`` indexed
+            by person, risk and category, see ``aggregate_ratings``.
+        persons (list, optional): Persons to test. Defaults to all persons.
+        categories_order (list, optional): Categories to test. Defaults to all
+            categories.
+        equal_var (bool): Whether to run Student's t-test (default) or Welch's t-test.
+
+    Returns:
+        pandas.DataFrame: The columns Person, Category, T-Statistic, P-Value and DF, like
+            ``perform_t_test``.
+
+    """
+    index = moments.index
+    if persons is None:
+        persons = list(dict.fromkeys(index.get_level_values("Person")))
+    if categories_order is None:
+        categories_order = list(dict.fromkeys(index.get_level_values("Category")))
+    contrasts = pd.MultiIndex.from_product([persons, categories_order], names=["Person", "Category"])
+    low, high = (
+        moments.xs(risk, level="Risk").reindex(contrasts) for risk in ["Low", "High"]
+    )
+    statistic, df, pvalue = t_test_from_moments(
+        low["count"], low["mean"], low["var"], high["count"], high["mean"], high["var"], equal_var
+    )
+    return pd.DataFrame(
+        {"T-Statistic": statistic, "P-Value": pvalue, "DF": df}, index=contrasts
+    ).reset_index()
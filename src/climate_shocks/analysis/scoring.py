@@ -0,0 +1,177 @@
+"""Scoring of multi-item scales such as the environmental attitudes inventory (GEA).
+
+Scales are declared under ``scales`` in ``data_info.yaml``. Every scale lists its
+items, the reverse-keyed items, the range of the answers, optional item weights, how
+the score is formed and how missing items are handled::
+
+    gea:
+      items: [EAI_1, EAI_2, ...]
+      reverse: [EAI_7, ...]
+      min: 1
+      max: 7
+      weights: {EAI_1: 2}   # optional, other items have weight 1
+      method: mean          # or sum
+      missing: rescale      # or complete
+      min_items: 1          # optional, with missing: rescale
+
+A reverse-keyed answer ``x`` counts as ``min + max - x``. All scales are scored with a
+single matrix product of the int8 item matrix, stacked with its answered indicators,
+and a design matrix holding the weighted item slopes and offsets of every scale.
+
+With ``missing: rescale`` the score only uses the answered items, so the mean is taken
+over them and the sum is scaled up to all items. At least ``min_items`` items must be
+answered. With ``missing: complete`` a respondent with a missing item gets no score.
+
+"""
+import numpy as np
+import pandas as pd
+
+from climate_shocks.data_management.schema import load_schema
+from climate_shocks.instrumentation import instrument
+
+METHODS = ["mean", "sum"]
+MISSING_POLICIES = ["rescale", "complete"]
+
+
+def load_scales(names=None, schema=None):
+    """Load scale specifications from the schema.
+
+    Args:
+        names (list, optional): Names of the scales. Defaults to all declared scales.
+        schema (dict, optional): The schema. Defaults to ``data_info.yaml``.
+
+    Returns:
+        dict: Scale names mapped to their specification.
+
+    Raises:
+        ValueError: If a scale is not declared in the schema.
+
+    """
+    schema = load_schema() if schema is None else schema
+    scales = schema.get("scales", {})
+    names = list(scales) if names is None else names
+    unknown = [name for name in names if name not in scales]
+    if unknown:
+        raise ValueError(f"The scales {unknown} are not declared in the schema.")
+    return {name: scales[name] for name in names}
+
+
+def item_matrix(data, items):
+    """Stack the answers to the items into an int8 matrix.
+
+    Args:
+        data (pandas.DataFrame): The survey with one column per item.
+        items (list): The item columns.
+
+    Returns:
+        tuple: The int8 answers with missing answers set to zero and a boolean matrix
+            flagging the answered items.
+
+    Raises:
+        ValueError: If an answer is not an integer in the int8 range.
+
+    """
+    answers = data[items].astype("Float64")
+    answered = answers.notna().to_numpy()
+    values = answers.to_numpy(dtype=np.float64, na_value=0.0)
+    if not np.array_equal(values, np.round(values)) or values.min(initial=0) < -128 or values.max(initial=0) > 127:
+        info = "The item answers must be integers between -128 and 127."
+        raise ValueError(info)
+    return values.astype(np.int8), answered
+
+
+@instrument("aggregate")
+def score_scales(data, scales):
+    """Score every respondent on every scale.
+
+    Args:
+        data (pandas.DataFrame): The survey with one column per item.
+        scales (dict): Scale names mapped to their specification, see ``load_scales``.
+
+    Returns:
+        pandas.DataFrame: One column of scores per scale, with the index of ``data``.
+            Respondents without a valid score get a missing value.
+
+    Raises:
+        ValueError: If a specification is invalid or an answer lies outside the range
+            of its scale.
+
+    """
+    items = list(dict.fromkeys(item for spec in scales.values() for item in spec["items"]))
+    values, answered = item_matrix(data, items)
+    design = _design_matrix(scales, items)
+    _check_range(values, answered, design, items, scales)
+
+    k = len(scales)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        totals, weight, count = np.split(np.hstack([values, answered]) @ design, 3, axis=1)
+        scores = totals / weight
+
+    for j, spec in enumerate(scales.values()):
+        full_weight = design[len(items) :, k + j].sum()
+        if spec.get("missing", "rescale") == "complete":
+            incomplete = count[:, j] < design[len(items) :, 2 * k + j].sum()
+        else:
+            incomplete = count[:, j] < spec.get("min_items", 1)
+        scores[incomplete, j] = np.nan
+        if spec.get("method", "mean") == "sum":
+            scores[:, j] *= full_weight
+    return pd.DataFrame(scores, index=data.index, columns=list(scales))
+
+
+def _design_matrix(scales, items):
+    """Build the design matrix mapping answers and answered indicators to the sums.
+
+    The upper half multiplies the answers and the lower half the answered indicators.
+    The columns hold the weighted totals, the answered weights and the answered item
+    counts of every scale.
+
+    """
+    position = {item: i for i, item in enumerate(items)}
+    p, k = len(items), len(scales)
+    design = np.zeros((2 * p, 3 * k))
+    for j, (name, spec) in enumerate(scales.items()):
+        _check_spec(name, spec)
+        weights = spec.get("weights", {})
+        reverse = set(spec.get("reverse", []))
+        for item in spec["items"]:
+            i, w = position[item], weights.get(item, 1)
+            if item in reverse:
+                design[i, j] = -w
+                design[p + i, j] = w * (spec["min"] + spec["max"])
+            else:
+                design[i, j] = w
+            design[p + i, k + j] = w
+            design[p + i, 2 * k + j] = 1
+    return design
+
+
+def _check_spec(name, spec):
+    """Validate one scale specification."""
+    problems = []
+    if not set(spec.get("reverse", [])) <= set(spec["items"]):
+        problems.append("reverse-keyed items must be items of the scale")
+    if not set(spec.get("weights", {})) <= set(spec["items"]):
+        problems.append("weighted items must be items of the scale")
+    if spec.get("method", "mean") not in METHODS:
+        problems.append(f"the method must be one of {METHODS}")
+    if spec.get("missing", "rescale") not in MISSING_POLICIES:
+        problems.append(f"the missing-item policy must be one of {MISSING_POLICIES}")
+    if "min" not in spec or "max" not in spec:
+        problems.append("the range needs a minimum and a maximum")
+    elif spec["min"] > spec["max"]:
+        problems.append("the minimum must not exceed the maximum")
+    if problems:
+        info = f"Invalid specification of the scale {name!r}: " + "; ".join(problems) + "."
+        raise ValueError(info)
+
+
+def _check_range(values, answered, design, items, scales):
+    """Check that every answered item lies within the range of its scales."""
+    p, k = len(items), len(scales)
+    for j, (name, spec) in enumerate(scales.items()):
+        columns = np.flatnonzero(design[p:, 2 * k + j])
+        block = values[:, columns][answered[:, columns]]
+        if ((block < spec["min"]) | (block > spec["max"])).any():
+            info = f"Answers to the scale {name!r} lie outside the range {spec['min']} to {spec['max']}."
+            raise ValueError(info)
@@ -0,0 +1,198 @@
+"""Survey session memoizing the data and its derived views within one process.
+
+When pytask runs all tasks in one process, every task used to read its columns, rename
+them and derive the same views again. The loaders of a ``SurveySession`` keep what they
+load:
+
+* the survey columns, one entry per column, so consumers of overlapping columns share
+  them, and
+* the ratings cube and the GEA scores derived from them.
+
+Entries are keyed by the resolved path, modification time and size of the source, and
+of the index of the response matrix the columns are read from, so an edited file is
+loaded again. The least recently used entries are evicted when the entries hold more
+than the memory budget of the session. The tasks share the session of the process,
+``SESSION``.
+
+The loaders return new data frames, but their columns are the memoized arrays. The
+module turns on copy-on-write, the default from pandas 3.0 on, so changing values in
+place copies the changed column first and never reaches the memoized arrays.
+
+"""
+import collections
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from climate_shocks.analysis.model import load_data, replace_column_names
+from climate_shocks.analysis.ratings_cube import ratings_cube
+from climate_shocks.analysis.scoring import load_scales, score_scales
+from climate_shocks.config import MEMORY_BUDGET
+from climate_shocks.data_management.response_matrix import INDEX
+from climate_shocks.data_management.schema import columns_for
+
+# Writes into the frames returned by the loaders must not change the memoized columns
+pd.set_option("mode.copy_on_write", True)
+
+
+class SurveySession:
+    """Survey columns and views loaded in one process.
+
+    Args:
+        memory_budget (int): Largest number of bytes held by the entries.
+
+    Attributes:
+        entries (collections.OrderedDict): Maps keys to values and their size in
+            bytes, from the least to the most recently used.
+        memory_budget (int): Largest number of bytes held by the entries.
+        stats (dict): Counts the ``hits``, ``misses`` and ``evictions``.
+
+    """
+
+    def __init__(self, memory_budget=MEMORY_BUDGET):
+        self.entries = collections.OrderedDict()
+        self.memory_budget = memory_budget
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def load_columns(self, source, columns, responses=None):
+        """Load survey columns, reading only those not held by the session.
+
+        Args:
+            source (str or pathlib.Path): Path to the survey CSV file or zip archive.
+            columns (list): Columns to load.
+            responses (str or pathlib.Path, optional): Directory of the response
+                matrix built from the source, see ``load_data``.
+
+        Returns:
+            pandas.DataFrame: The columns in the requested order, like ``load_data``.
+
+        """
+        key = _source_key(source, responses)
+        data = {}
+        for column in columns:
+            entry = self._lookup((key, "column", column))
+            if entry is not None:
+                data[column] = entry
+        missing = [column for column in columns if column not in data]
+        if missing:
+            loaded = load_data(source, missing, responses)
+            for column in missing:
+                data[column] = self._store((key, "column", column), loaded[column])
+        return pd.DataFrame(
+            {column: data[column] for column in columns},
+            columns=pd.Index(columns, dtype=object),
+            copy=False,
+        )
+
+    def load_ratings(self, source, columns=None, responses=None):
+        """Load survey columns with the readable rating column names.
+
+        Args:
+            source (str or pathlib.Path): Path to the survey CSV file or zip archive.
+            columns (list, optional): Columns to load. Defaults to the ratings.
+            responses (str or pathlib.Path, optional): Directory of the response
+                matrix.
+
+        Returns:
+            pandas.DataFrame: The columns, renamed by ``replace_column_names``.
+
+        """
+        columns = columns_for("model") if columns is None else columns
+        return replace_column_names(self.load_columns(source, columns, responses))
+
+    def load_ratings_cube(self, source, responses=None):
+        """Load the ratings cube of a survey.
+
+        Args:
+            source (str or pathlib.Path): Path to the survey CSV file or zip archive.
+            responses (str or pathlib.Path, optional): Directory of the response
+                matrix.
+
+        Returns:
+            pandas.Series: The cube, see ``ratings_cube``.
+
+        """
+        key = (_source_key(source, responses), "ratings_cube")
+        cube = self._lookup(key)
+        if cube is None:
+            cube = ratings_cube(self.load_ratings(source, responses=responses))
+            cube = self._store(key, cube)
+        return cube
+
+    def load_gea_scores(self, source, responses=None):
+        """Load the GEA score of every respondent.
+
+        Args:
+            source (str or pathlib.Path): Path to the survey CSV file or zip archive.
+            responses (str or pathlib.Path, optional): Directory of the response
+                matrix.
+
+        Returns:
+            pandas.Series: The scores, see ``score_scales``.
+
+        """
+        key = (_source_key(source, responses), "gea")
+        scores = self._lookup(key)
+        if scores is None:
+            data = self.load_columns(source, columns_for("gea"), responses)
+            scores = score_scales(data, load_scales(["gea"]))["gea"]
+            scores = self._store(key, scores)
+        return scores
+
+    def size(self):
+        """Count the bytes held by the entries.
+
+        Returns:
+            int: The number of bytes.
+
+        """
+        return sum(nbytes for _, nbytes in self.entries.values())
+
+    def clear(self):
+        """Drop all entries."""
+        self.entries.clear()
+
+    def _lookup(self, key):
+        """Return an entry and mark it as the most recently used, or None."""
+        if key not in self.entries:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        self.entries.move_to_end(key)
+        return self.entries[key][0]
+
+    def _store(self, key, value):
+        """Add an entry and evict the least recently used entries beyond the budget."""
+        nbytes = _nbytes(value)
+        if nbytes > self.memory_budget:
+            return value
+        self.entries[key] = (value, nbytes)
+        total = self.size()
+        while total > self.memory_budget:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.stats["evictions"] += 1
+            total -= evicted
+        return value
+
+
+SESSION = SurveySession()
+
+
+def _source_key(source, responses):
+    """Identify a source and the response matrix by path, modification time and size."""
+    paths = [Path(source)] + ([] if responses is None else [Path(responses) / INDEX])
+    key = []
+    for path in paths:
+        path = path.resolve()
+        stat = path.stat()
+        key.append((str(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(key)
+
+
+def _nbytes(value):
+    """Estimate the memory held by a value."""
+    if isinstance(value, (pd.Series, pd.DataFrame)):
+        usage = value.memory_usage(index=True, deep=True)
+        return int(np.sum(usage))
+    return int(getattr(value, "nbytes", 0))
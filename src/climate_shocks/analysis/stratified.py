@@ -0,0 +1,163 @@
+"""Stratified versions of the average ratings, the t-tests and the Fig5 ratios.
+
+Every function takes a list of grouping columns and reduces all strata in a single
+groupby pass over the respondents, so the runtime grows with the number of rows and
+not with the number of rows times the number of strata. The results are tidy tables
+indexed by the stratum, followed by the labels of the contrast.
+
+Respondents with a missing value in one of the grouping columns are left out.
+
+"""
+import numpy as np
+import pandas as pd
+
+from climate_shocks.analysis.ttest import as_block, t_test_from_moments
+
+RISKS = ["Low", "High"]
+
+
+def stratified_moments(data, columns, groups):
+    """Compute the count, mean and sample variance of columns within every stratum.
+
+    The sums are taken around the overall column means, which keeps the variances
+    accurate when the ratings are far from zero.
+
+    Args:
+        data (pandas.DataFrame): The survey with the rating and grouping columns.
+        columns (list): The rating columns.
+        groups (list): The grouping columns.
+
+    Returns:
+        tuple: Data frames with the number of non-missing ratings, their mean and their
+            variance with one degree of freedom removed. They are indexed by the
+            stratum and have one column per rating column.
+
+    """
+    values = as_block(data[columns])
+    observed = ~np.isnan(values)
+    with np.errstate(invalid="ignore"):
+        shift = np.nan_to_num(np.nanmean(values, axis=0))
+    centered = np.where(observed, values - shift, 0.0)
+
+    k = len(columns)
+    sums = (
+        pd.DataFrame(np.hstack([observed, centered, centered**2]), index=data.index)
+        .groupby([data[group] for group in groups], observed=True)
+        .sum()
+    )
+    n, s1, s2 = (sums.iloc[:, i * k : (i + 1) * k].to_numpy() for i in range(3))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = shift + s1 / n
+        var = (s2 - s1**2 / n) / (n - 1)
+    return tuple(
+        pd.DataFrame(moment, index=sums.index, columns=columns) for moment in (n, mean, var)
+    )
+
+
+def stratified_average_ratings(data, groups, persons, categories_order):
+    """Calculate the average ratings of every person, risk and category within every stratum.
+
+    Args:
+        data (pandas.DataFrame): The survey with readable column names, see
+            ``replace_column_names``.
+        groups (list): The grouping columns.
+        persons (list): List of persons.
+        categories_order (list): Order of categories.
+
+    Returns:
+        pandas.DataFrame: The number of ratings and the average rating, indexed by the
+            stratum, the person, the risk and the category.
+
+    """
+    contrasts = pd.MultiIndex.from_product(
+        [persons, RISKS, categories_order], names=["Person", "Risk", "Category"]
+    )
+    columns = [f"JB_{risk.lower()}_{person}_{category}" for person, risk, category in contrasts]
+    n, mean, _ = stratified_moments(data, columns, groups)
+    return pd.DataFrame(
+        {
+            "Count": _stack(n, contrasts).astype(np.int64),
+            "Average Rating": _stack(mean, contrasts),
+        }
+    )
+
+
+def stratified_t_test(data, groups, persons, categories_order, equal_var=True):
+    """Perform the low vs. high risk t-tests of every person and category within every stratum.
+
+    Args:
+        data (pandas.DataFrame): The survey with readable column names, see
+            ``replace_column_names``.
+        groups (list): The grouping columns.
+        persons (list): List of persons.
+        categories_order (list): Order of categories.
+        equal_var (bool): Whether to run Student's t-test (default) or Welch's t-test.
+
+    Returns:
+        pandas.DataFrame: The group sizes, the t statistic, the p-value and the degrees
+            of freedom, indexed by the stratum, the person and the category.
+
+    """
+    contrasts = pd.MultiIndex.from_product([persons, categories_order], names=["Person", "Category"])
+    low = [f"JB_low_{person}_{category}" for person, category in contrasts]
+    high = [f"JB_high_{person}_{category}" for person, category in contrasts]
+    n, mean, var = stratified_moments(data, low + high, groups)
+    statistic, df, pvalue = t_test_from_moments(
+        n[low], mean[low], var[low], n[high], mean[high], var[high], equal_var=equal_var
+    )
+    index = n.index
+    return pd.DataFrame(
+        {
+            "N Low": _stack(n[low], contrasts).astype(np.int64),
+            "N High": _stack(n[high], contrasts).astype(np.int64),
+            "T-Statistic": _stack(pd.DataFrame(statistic, index=index), contrasts),
+            "P-Value": _stack(pd.DataFrame(pvalue, index=index), contrasts),
+            "DF": _stack(pd.DataFrame(df, index=index), contrasts),
+        }
+    )
+
+
+def stratified_ratios(data, groups, column="CS_Experience"):
+    """Calculate the share of every answer to a question within every stratum.
+
+    With ``groups=['Country_of_Residence']`` and the experience labels replaced, this
+    gives the table of ``calculate_ratios`` that is plotted in Fig5.
+
+    Args:
+        data (pandas.DataFrame): The survey with the answer and grouping columns.
+        groups (list): The grouping columns.
+        column (str): The column with the answers.
+
+    Returns:
+        pandas.DataFrame: The number of every answer and its share, with the share
+            columns prefixed by ``Ratio_``, indexed by the stratum.
+
+    """
+    counts = data.groupby(
+        [data[group] for group in groups] + [data[column]], observed=True
+    ).size()
+    return ratios_from_counts(counts)
+
+
+def ratios_from_counts(counts):
+    """Turn the number of every answer within every stratum into shares.
+
+    Args:
+        counts (pandas.Series): The number of respondents, indexed by the stratum
+            followed by the answer.
+
+    Returns:
+        pandas.DataFrame: The number of every answer and its share, with the share
+            columns prefixed by ``Ratio_``, indexed by the stratum.
+
+    """
+    counts = counts.unstack(-1, fill_value=0)
+    counts.columns = list(counts.columns)
+    ratios = counts.div(counts.sum(axis=1), axis=0).add_prefix("Ratio_")
+    return pd.concat([counts, ratios], axis=1)
+
+
+def _stack(frame, contrasts):
+    """Stack a strata by contrasts frame into a series indexed by stratum and contrast."""
+    frame = frame.set_axis(contrasts, axis=1)
+    return frame.stack(list(range(contrasts.nlevels)), future_stack=True)
@@ -1,29 +1,108 @@
 from pathlib import Path
 import pandas as pd
 import pytask
-from climate_shocks.analysis.model import load_data, perform_t_test
-from climate_shocks.config import BLD, GROUPS, SRC
+from climate_shocks.analysis.aggregates import build_aggregates, save_aggregates
+from climate_shocks.analysis.crosstab import association_table, crosstab_items
+from climate_shocks.analysis.ratings_cube import cube_t_test
+from climate_shocks.analysis.scoring import load_scales
+from climate_shocks.analysis.session import SESSION
+from climate_shocks.analysis.stratified import stratified_average_ratings, stratified_ratios, stratified_t_test
+from climate_shocks.analysis.ttest import perform_t_test
+from climate_shocks.config import AGGREGATES, BLD, FINGERPRINTS, GROUPS, N_JOBS, RESPONSES, SRC, SURVEY_DATA
+from climate_shocks.data_management.response_matrix import battery_index
+from climate_shocks.data_management.schema import columns_for
+from climate_shocks.final.plot5 import replace_experience_labels
 from climate_shocks.utilities import read_yaml
 
-# Defining dependencies for the task
-fit_model_deps = {
-    "data": BLD / "survey_data.csv",
-}
+# The tasks depend on the fingerprints of the survey columns and the code they read,
+# see task_fingerprint_columns, instead of the whole survey file. The Likert items are
+# read from the memory-mapped response matrix, see task_build_response_matrix, through
+# the survey session, so tasks running in the same process share the columns and views.
+# The tasks depend on the digests of the batteries of the matrix they read, so editing
+# the answers to other batteries does not run them again.
+survey_data = SURVEY_DATA
+
+# Defining a task for the aggregate cube that Fig1, Fig2, Fig4 and Fig5 are drawn from
+def task_build_aggregates(
+    depends_on={"fingerprint": FINGERPRINTS / "aggregates.json", "responses": [battery_index(battery) for battery in ["jb", "eai", "climate"]]},
+    produces=AGGREGATES,
+):
+    """
+    Compute the ratings moments, answer counts and GEA score counts by country in one pass over the survey.
+    """
+    data = SESSION.load_ratings(survey_data, columns_for("aggregates"), responses=RESPONSES)
+    aggregates = build_aggregates(data, scales=load_scales(["gea"]))
+    # The cube is only rewritten when it changed, so the figures are not redrawn for nothing
+    save_aggregates(aggregates, produces)
+
+
+# Defining a task for the chi-square tests of all pairs of categorical items
+def task_crosstab_associations(
+    depends_on={"fingerprint": FINGERPRINTS / "crosstab.json", "responses": [battery_index(battery) for battery in ["climate"]]},
+    produces=BLD / "python" / "results" / "associations.csv",
+):
+    """
+    Compute the chi-square statistic and Cramer's V of every pair of categorical items from one sparse crosstab.
+    """
+    data = SESSION.load_columns(survey_data, columns_for("crosstab"), responses=RESPONSES)
+    association_table(crosstab_items(data)).to_csv(produces)
+
 
 # Defining a task for performing independent t-tests
-def perform_t_tests(
-    depends_on=fit_model_deps,
+def task_perform_t_tests(
+    depends_on={"fingerprint": FINGERPRINTS / "model.json", "responses": [battery_index(battery) for battery in ["jb"]]},
     produces=BLD / "python" / "results" / "t_test_results.csv",
 ):
     """
     Perform independent t-tests for low and high risk ratings among different categories and persons.
     """
-    # Loading the data
-    data = load_data(depends_on["data"])
+    # Loading the ratings cube, which is shared with the other tasks of the run
+    cube = SESSION.load_ratings_cube(survey_data, responses=RESPONSES)
     # Performing t-tests
     persons = ['A', 'B', 'C']
     categories_order = ['sustainability', 'moral', 'I would', 'Others would', 'People should']
-    t_test_results = perform_t_test(data, persons, categories_order)
+    t_test_results = cube_t_test(cube, persons, categories_order)
     # Saving the results to a CSV file
     t_test_results.to_csv(produces, index=False)
 
+
+
+# Defining a task for the permutation version of the t-tests
+def task_permutation_tests(
+    depends_on={"fingerprint": FINGERPRINTS / "model.json", "responses": [battery_index(battery) for battery in ["jb"]]},
+    produces=BLD / "python" / "results" / "permutation_test_results.csv",
+):
+    """
+    Perform permutation tests for low and high risk ratings, which do not assume normally distributed ratings.
+    The permutations are drawn by N_JOBS worker processes; the p-values do not depend on their number.
+    """
+    data = SESSION.load_ratings(survey_data, responses=RESPONSES)
+    persons = ['A', 'B', 'C']
+    categories_order = ['sustainability', 'moral', 'I would', 'Others would', 'People should']
+    results = perform_t_test(data, persons, categories_order, permutations=100_000, seed=0, n_jobs=N_JOBS)
+    results.to_csv(produces, index=False)
+
+
+# Defining one task per grouping column for the stratified results
+for group in GROUPS:
+
+    @pytask.task(id=group)
+    def task_stratified_analysis(
+        depends_on={"fingerprint": FINGERPRINTS / "stratified.json", "responses": [battery_index(battery) for battery in ["jb"]]},
+        group=group,
+        produces={
+            "ratings": BLD / "python" / "results" / "stratified" / f"ratings_{group}.csv",
+            "t_tests": BLD / "python" / "results" / "stratified" / f"t_tests_{group}.csv",
+            "ratios": BLD / "python" / "results" / "stratified" / f"ratios_{group}.csv",
+        },
+    ):
+        """
+        Compute the average ratings, the t-tests and the Fig5 ratios within every stratum of a group.
+        """
+        data = SESSION.load_ratings(survey_data, columns_for("stratified"), responses=RESPONSES)
+        data = replace_experience_labels(data)
+        persons = ['A', 'B', 'C']
+        categories_order = ['sustainability', 'moral', 'I would', 'Others would', 'People should']
+        stratified_average_ratings(data, [group], persons, categories_order).to_csv(produces["ratings"])
+        stratified_t_test(data, [group], persons, categories_order).to_csv(produces["t_tests"])
+        stratified_ratios(data, [group]).to_csv(produces["ratios"])
@@ -0,0 +1,163 @@
+"""Batch t-tests for the low vs. high climate risk ratings.
+
+All contrasts are tested at once. The ratings of one risk level are passed as a 2-D
+array with one column per contrast, in which missing ratings are either NaN or masked.
+Means and variances come from NaN-aware NumPy reductions over the whole block, so
+there is no Python loop over contrasts.
+
+"""
+import numpy as np
+import pandas as pd
+
+from climate_shocks.instrumentation import instrument
+
+
+def as_block(values):
+    """Convert ratings to a 2-D float array with NaN for missing values.
+
+    Args:
+        values (numpy.ndarray, numpy.ma.MaskedArray or pandas.DataFrame): Ratings with
+            one row per respondent and one column per contrast.
+
+    Returns:
+        numpy.ndarray: The ratings as float64, with missing values set to NaN.
+
+    """
+    if isinstance(values, pd.DataFrame):
+        return values.to_numpy(dtype=np.float64, na_value=np.nan)
+    if isinstance(values, np.ma.MaskedArray):
+        return np.ma.filled(values.astype(np.float64), np.nan)
+    values = np.asarray(values, dtype=np.float64)
+    return values.reshape(len(values), -1)
+
+
+def block_moments(values):
+    """Compute the count, mean and sample variance of every column of a block.
+
+    Args:
+        values (numpy.ndarray, numpy.ma.MaskedArray or pandas.DataFrame): Ratings with
+            one row per respondent and one column per contrast.
+
+    Returns:
+        tuple: Arrays with the number of non-missing ratings, their mean and their
+            variance with one degree of freedom removed.
+
+    """
+    values = as_block(values)
+    observed = ~np.isnan(values)
+    n = observed.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.nansum(values, axis=0) / n
+        centered = np.where(observed, values - mean, 0.0)
+        var = (centered**2).sum(axis=0) / (n - 1)
+    return n, mean, var
+
+
+def t_test_from_moments(n1, mean1, var1, n2, mean2, var2, equal_var=True):
+    """Compute two-sided independent t-tests from group moments.
+
+    Args:
+        n1, mean1, var1 (numpy.ndarray): Count, mean and sample variance of the first
+            group of every contrast.
+        n2, mean2, var2 (numpy.ndarray): The same for the second group.
+        equal_var (bool): Whether to pool the variances (Student) or not (Welch).
+
+    Returns:
+        tuple: Arrays with the t statistics, degrees of freedom and p-values.
+
+    """
+    from scipy.special import stdtr
+
+    n1, mean1, var1, n2, mean2, var2 = (
+        np.asarray(moment, dtype=np.float64) for moment in (n1, mean1, var1, n2, mean2, var2)
+    )
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if equal_var:
+            df = n1 + n2 - 2
+            pooled = ((n1 - 1) * var1 + (n2 - 1) * var2) / df
+            se = np.sqrt(pooled * (1 / n1 + 1 / n2))
+        else:
+            v1, v2 = var1 / n1, var2 / n2
+            df = (v1 + v2) ** 2 / (v1**2 / (n1 - 1) + v2**2 / (n2 - 1))
+            se = np.sqrt(v1 + v2)
+        statistic = (mean1 - mean2) / se
+        pvalue = 2 * stdtr(df, -np.abs(statistic))
+    return statistic, df, pvalue
+
+
+@instrument("test")
+def batch_t_test(low, high, index=None):
+    """Run Student and Welch t-tests for every pair of low and high risk columns.
+
+    Args:
+        low (numpy.ndarray, numpy.ma.MaskedArray or pandas.DataFrame): Low risk
+            ratings with one column per contrast.
+        high (numpy.ndarray, numpy.ma.MaskedArray or pandas.DataFrame): High risk
+            ratings with the same columns.
+        index (pandas.Index, optional): Labels of the contrasts.
+
+    Returns:
+        pandas.DataFrame: One row per contrast with the group sizes and means, and the
+            statistic, degrees of freedom and p-value of both tests.
+
+    """
+    n1, mean1, var1 = block_moments(low)
+    n2, mean2, var2 = block_moments(high)
+    student = t_test_from_moments(n1, mean1, var1, n2, mean2, var2, equal_var=True)
+    welch = t_test_from_moments(n1, mean1, var1, n2, mean2, var2, equal_var=False)
+    return pd.DataFrame(
+        {
+            "n_low": n1,
+            "n_high": n2,
+            "mean_low": mean1,
+            "mean_high": mean2,
+            "t_student": student[0],
+            "df_student": student[1],
+            "p_student": student[2],
+            "t_welch": welch[0],
+            "df_welch": welch[1],
+            "p_welch": welch[2],
+        },
+        index=index,
+    )
+
+
+@instrument("test")
+def perform_t_test(
+    dataframe, persons, categories_order, equal_var=True, permutations=None, seed=0, n_jobs=1
+):
+    """Perform independent t-tests for low and high risk ratings among different categories and persons.
+
+    Args:
+        dataframe (pandas.DataFrame): DataFrame containing ratings.
+        persons (list): List of persons.
+        categories_order (list): Order of categories.
+        equal_var (bool): Whether to run Student's t-test (default) or Welch's t-test.
+        permutations (int, optional): If given, the p-values come from a permutation
+            test of the difference in means with up to this many permutations instead
+            of the t distribution.
+        seed (int): Seed of the permutation test.
+        n_jobs (int): Number of worker processes of the permutation test.
+
+    Returns:
+        pandas.DataFrame: DataFrame containing t-test results, the columns Person,
+            Category, T-Statistic and P-Value followed by the degrees of freedom, DF.
+
+    """
+    index = pd.MultiIndex.from_product([persons, categories_order], names=["Person", "Category"])
+    low = dataframe[[f"JB_low_{person}_{category}" for person, category in index]]
+    high = dataframe[[f"JB_high_{person}_{category}" for person, category in index]]
+    results = batch_t_test(low, high, index=index)
+    test = "student" if equal_var else "welch"
+    results = (
+        results[[f"t_{test}", f"p_{test}", f"df_{test}"]]
+        .set_axis(["T-Statistic", "P-Value", "DF"], axis=1)
+    )
+    if permutations:
+        from climate_shocks.analysis.permutation import permutation_t_test
+
+        permuted = permutation_t_test(
+            low, high, n_permutations=permutations, seed=seed, n_jobs=n_jobs, index=index
+        )
+        results["P-Value"] = permuted["pvalue"]
+    return results.reset_index()
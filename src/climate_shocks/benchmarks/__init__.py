@@ -0,0 +1 @@
+"""Benchmarks of the pipeline on synthetic surveys of growing size."""
@@ -0,0 +1,299 @@
+"""Time and memory profile of the pipeline stages on synthetic surveys.
+
+For every survey size, a synthetic survey is written, see ``synthetic.py``, and the
+stages run in the order of the pipeline, each on the output of the stages before it.
+Every stage records its wall time and the peak of the memory allocated while it ran,
+as traced by ``tracemalloc``. Tracing slows down allocation-heavy stages, so pass
+``trace_memory=False`` for clean timings.
+
+The results are plain JSON, so runs can be stored and compared with
+``compare_results`` to catch regressions::
+
+    python -m climate_shocks.benchmarks.suite --rows 1000 100000 --baseline old.json
+
+The rendering stage draws the matplotlib figures. The plotly figures need Kaleido and
+a browser and are left out.
+
+"""
+import argparse
+import json
+import platform
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from climate_shocks.benchmarks.synthetic import load_template, write_synthetic_survey
+from climate_shocks.config import BLD
+
+SIZES = [10**3, 10**4, 10**5, 10**6, 10**7]
+STAGES = [
+    "read",
+    "clean_data",
+    "filter_data",
+    "perform_t_test",
+    "calculate_average_ratings",
+    "gea_scoring",
+    "calculate_ratios",
+    "rendering",
+]
+TOLERANCE = 0.25
+WARMUP_ROWS = 100
+
+PERSONS = ["A", "B", "C"]
+CATEGORIES = ["sustainability", "moral", "I would", "Others would", "People should"]
+
+
+def measure(function, *args, trace_memory=True, **kwargs):
+    """Call a function and measure its wall time and peak memory allocation.
+
+    Args:
+        function (callable): The function.
+        *args: Passed on to the function.
+        trace_memory (bool): Whether to trace the memory allocations.
+        **kwargs: Passed on to the function.
+
+    Returns:
+        tuple: The result of the call and a dict with the ``seconds`` and the
+            ``peak_bytes`` allocated on top of the memory in use before the call, which
+            is None if the memory is not traced.
+
+    """
+    peak = None
+    if trace_memory:
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        in_use = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    try:
+        result = function(*args, **kwargs)
+    finally:
+        seconds = time.perf_counter() - start
+        if trace_memory:
+            peak = tracemalloc.get_traced_memory()[1] - in_use
+            if started:
+                tracemalloc.stop()
+    return result, {"seconds": seconds, "peak_bytes": peak}
+
+
+def run_stages(source, work_dir, trace_memory=True):
+    """Run and profile the pipeline stages on one survey.
+
+    Args:
+        source (str or pathlib.Path): Path to the survey CSV file.
+        work_dir (str or pathlib.Path): Directory for the cache and the figures.
+        trace_memory (bool): Whether to trace the memory allocations.
+
+    Returns:
+        dict: The stages mapped to their ``seconds`` and ``peak_bytes``.
+
+    """
+    from climate_shocks.analysis.model import replace_column_names
+    from climate_shocks.analysis.scoring import load_scales, score_scales
+    from climate_shocks.analysis.ttest import perform_t_test
+    from climate_shocks.data_management.clean_data import clean_data, filter_data
+    from climate_shocks.data_management.schema import apply_dtypes
+    from climate_shocks.data_management.survey_cache import read_survey
+    from climate_shocks.final.plot1 import calculate_average_ratings
+    from climate_shocks.final.plot2 import visualize_p_values_heatmap
+    from climate_shocks.final.plot5 import plot_ratio_bar_chart
+
+    work_dir = Path(work_dir)
+    profile = {}
+
+    def run(stage, function, *args):
+        result, profile[stage] = measure(function, *args, trace_memory=trace_memory)
+        return result
+
+    def read(source):
+        return apply_dtypes(read_survey(source, cache_dir=work_dir / "cache"))
+
+    def render(t_tests, ratios):
+        visualize_p_values_heatmap(t_tests, save_path=work_dir / "Fig2.png")
+        plot_ratio_bar_chart(ratios, save_path=work_dir / "Fig5.png")
+
+    data = run("read", read, source)
+    cleaned = run("clean_data", clean_data, data.copy())
+    filtered = run("filter_data", filter_data, cleaned)
+    ratings = replace_column_names(cleaned)
+    t_tests = run("perform_t_test", perform_t_test, ratings, PERSONS, CATEGORIES)
+    run("calculate_average_ratings", calculate_average_ratings, ratings)
+    run("gea_scoring", score_scales, filtered, load_scales(["gea"]))
+    answers = data[["Country_of_Residence", "CS_Experience"]].copy()
+    ratios = run("calculate_ratios", _ratios, answers)
+    run("rendering", render, t_tests, ratios)
+    return profile
+
+
+def run_benchmarks(
+    sizes=SIZES, work_dir=None, seed=0, trace_memory=True, template=None
+):
+    """Profile the pipeline stages on synthetic surveys of every size.
+
+    The first call of a stage imports its libraries, so the stages run once on a
+    small survey before they are measured.
+
+    Args:
+        sizes (list): Numbers of respondents.
+        work_dir (str or pathlib.Path, optional): Directory for the synthetic surveys,
+            the caches and the figures. Defaults to a temporary directory.
+        seed (int): Seed of the synthetic surveys.
+        trace_memory (bool): Whether to trace the memory allocations.
+        template (pandas.DataFrame, optional): The real survey. Defaults to the
+            archived export.
+
+    Returns:
+        dict: The ``environment`` of the run and one entry of ``runs`` per size with
+            the number of ``rows``, the ``generate_seconds`` and the profile of the
+            ``stages``.
+
+    """
+    template = load_template() if template is None else template
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp if work_dir is None else work_dir)
+        warmup = work_dir / "warmup"
+        source = warmup / "survey_data.csv"
+        write_synthetic_survey(source, WARMUP_ROWS, template)
+        run_stages(source, warmup, trace_memory=False)
+
+        runs = []
+        for n_rows in sizes:
+            size_dir = work_dir / f"rows_{n_rows}"
+            start = time.perf_counter()
+            source = write_synthetic_survey(
+                size_dir / "survey_data.csv", n_rows, template, seed
+            )
+            generate_seconds = time.perf_counter() - start
+            runs.append(
+                {
+                    "rows": n_rows,
+                    "generate_seconds": generate_seconds,
+                    "stages": run_stages(source, size_dir, trace_memory),
+                }
+            )
+    return {"environment": _environment(seed, trace_memory), "runs": runs}
+
+
+def write_results(results, path):
+    """Write benchmark results to a JSON file.
+
+    Args:
+        results (dict): The results, see ``run_benchmarks``.
+        path (str or pathlib.Path): Path to the JSON file.
+
+    Returns:
+        pathlib.Path: The path to the JSON file.
+
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2) + "\n")
+    return path
+
+
+def read_results(path):
+    """Read benchmark results from a JSON file.
+
+    Args:
+        path (str or pathlib.Path): Path to the JSON file.
+
+    Returns:
+        dict: The results, see ``run_benchmarks``.
+
+    """
+    return json.loads(Path(path).read_text())
+
+
+def results_frame(results):
+    """Flatten benchmark results into a table.
+
+    Args:
+        results (dict): The results, see ``run_benchmarks``.
+
+    Returns:
+        pandas.DataFrame: The ``seconds`` and ``peak_bytes`` indexed by the number of
+            rows and the stage.
+
+    """
+    records = [
+        {"rows": run["rows"], "stage": stage, **profile}
+        for run in results["runs"]
+        for stage, profile in run["stages"].items()
+    ]
+    columns = ["rows", "stage", "seconds", "peak_bytes"]
+    return pd.DataFrame(records, columns=columns).set_index(["rows", "stage"])
+
+
+def compare_results(baseline, current, tolerance=TOLERANCE):
+    """Compare two benchmark runs stage by stage.
+
+    Args:
+        baseline (dict): The results of the reference run.
+        current (dict): The results of the new run.
+        tolerance (float): Relative increase of the time or the peak memory that is
+            still accepted.
+
+    Returns:
+        pandas.DataFrame: The ratios of the current to the baseline ``seconds`` and
+            ``peak_bytes`` and whether they exceed the tolerance, for the sizes and
+            stages of both runs.
+
+    """
+    ratios = results_frame(current) / results_frame(baseline)
+    ratios = ratios.dropna(how="all")
+    ratios["regression"] = (ratios > 1 + tolerance).any(axis=1)
+    return ratios
+
+
+def _ratios(data):
+    """Compute the Fig5 ratios from the country and experience columns."""
+    from climate_shocks.final.plot5 import (
+        calculate_ratios,
+        filter_data,
+        replace_country_codes,
+        replace_experience_labels,
+    )
+
+    data = replace_experience_labels(replace_country_codes(data))
+    return calculate_ratios(filter_data(data))
+
+
+def _environment(seed, trace_memory):
+    """Describe the machine and the library versions of a run."""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "seed": seed,
+        "trace_memory": trace_memory,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=SIZES)
+    parser.add_argument(
+        "--output", type=Path, default=BLD / "benchmarks" / "results.json"
+    )
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.rows, seed=args.seed, trace_memory=not args.no_memory)
+    write_results(results, args.output)
+    print(results_frame(results).to_string())
+    if args.baseline is not None:
+        comparison = compare_results(read_results(args.baseline), results)
+        print(comparison.to_string())
+        if comparison["regression"].any():
+            raise SystemExit(1)
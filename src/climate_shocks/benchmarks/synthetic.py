@@ -0,0 +1,155 @@
+"""Synthetic surveys with the schema of the real export, at any number of rows.
+
+Every column is resampled from the real survey, the template, so the synthetic
+export has the same columns, value sets, missing rates and dtypes after parsing.
+Three parts of the questionnaire keep their structure:
+
+* The rating blocks ``JB_{risk}_{person}_*`` are shown or hidden together. Which risk
+  levels a respondent rated for a person is drawn from the patterns in the template,
+  which keeps the between-subject gaps of the ratings.
+* ``CS_Type`` is a multi-select answer. It is drawn as a random non-empty subset of
+  the options in the template, in ascending order and joined by commas.
+* ``ResponseId`` is unique.
+
+The rows are generated and written in chunks, so surveys with millions of rows do not
+need to fit into memory.
+
+"""
+import re
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from climate_shocks.config import SRC
+from climate_shocks.data_management.survey_cache import iter_zip_chunks
+
+TEMPLATE = SRC / "data" / "survey_data.csv.zip"
+CHUNKSIZE = 100_000
+
+_RATING_COLUMN = re.compile(r"^JB_(low|high)_([^_]+)_")
+
+
+def load_template(source=TEMPLATE):
+    """Read the survey that the synthetic surveys are resampled from.
+
+    Args:
+        source (str or pathlib.Path): Path to the survey CSV file or zip archive.
+
+    Returns:
+        pandas.DataFrame: The survey as parsed by ``pandas.read_csv``.
+
+    """
+    if zipfile.is_zipfile(source):
+        return pd.concat(iter_zip_chunks(source), ignore_index=True)
+    return pd.read_csv(source)
+
+
+def synthetic_survey(n_rows, template, seed=0, start=0):
+    """Draw a synthetic survey.
+
+    Args:
+        n_rows (int): Number of respondents.
+        template (pandas.DataFrame): The real survey, see ``load_template``.
+        seed (int or numpy.random.Generator): Seed or generator of the draws.
+        start (int): Number of the first respondent, which keeps the ids of
+            consecutive chunks unique.
+
+    Returns:
+        pandas.DataFrame: The synthetic survey with the columns of the template.
+
+    """
+    rng = np.random.default_rng(seed)
+    columns = {
+        name: _resample(template[name].to_numpy(), n_rows, rng) for name in template
+    }
+
+    for person, blocks in _rating_blocks(template).items():
+        shown = np.column_stack(
+            [template[block].notna().all(axis=1) for block in blocks.values()]
+        )
+        drawn = shown[rng.integers(0, len(shown), n_rows)]
+        for j, block in enumerate(blocks.values()):
+            for name in block:
+                values = _resample(template[name].dropna().to_numpy(), n_rows, rng)
+                columns[name] = np.where(drawn[:, j], values, np.nan)
+
+    if "CS_Type" in template:
+        columns["CS_Type"] = _multi_select(template["CS_Type"], n_rows, rng)
+    if "ResponseId" in template:
+        columns["ResponseId"] = [f"R_{i:015d}" for i in range(start, start + n_rows)]
+    return pd.DataFrame(columns, columns=template.columns)
+
+
+def write_synthetic_survey(path, n_rows, template=None, seed=0, chunksize=CHUNKSIZE):
+    """Write a synthetic survey to a CSV file, one chunk of rows at a time.
+
+    Args:
+        path (str or pathlib.Path): Path to the CSV file.
+        n_rows (int): Number of respondents.
+        template (pandas.DataFrame, optional): The real survey. Defaults to the
+            archived export, see ``load_template``.
+        seed (int): Seed of the draws.
+        chunksize (int): Number of rows generated at a time.
+
+    Returns:
+        pathlib.Path: The path to the CSV file.
+
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    template = load_template() if template is None else template
+    seeds = np.random.SeedSequence(seed)
+    with path.open("w", newline="") as file:
+        for start in range(0, max(n_rows, 1), chunksize):
+            size = min(chunksize, n_rows - start)
+            rng = np.random.default_rng(seeds.spawn(1)[0])
+            chunk = synthetic_survey(size, template, seed=rng, start=start)
+            chunk.to_csv(file, header=start == 0, index=False)
+    return path
+
+
+def _resample(values, n_rows, rng):
+    """Draw values with replacement, or missing values if there are none."""
+    if len(values) == 0:
+        return np.full(n_rows, np.nan)
+    return values[rng.integers(0, len(values), n_rows)]
+
+
+def _rating_blocks(template):
+    """Group the rating columns by person and risk level."""
+    blocks = {}
+    for name in template:
+        match = _RATING_COLUMN.match(name)
+        if match:
+            risk, person = match.groups()
+            blocks.setdefault(person, {}).setdefault(risk, []).append(name)
+    return blocks
+
+
+def _multi_select(column, n_rows, rng):
+    """Draw multi-select answers from the options and missing rate of a column."""
+    answers = column.dropna().astype(str)
+    options = sorted(
+        {option for answer in answers for option in answer.split(",")}, key=_option_key
+    )
+    if not options:
+        return np.full(n_rows, np.nan, dtype=object)
+    # Every subset of the options is a bit mask, and the answers are looked up by mask.
+    labels = np.array(
+        [
+            ",".join(o for i, o in enumerate(options) if mask >> i & 1) or np.nan
+            for mask in range(2 ** len(options))
+        ],
+        dtype=object,
+    )
+    masks = rng.integers(1, 2 ** len(options), n_rows)
+    drawn = labels[masks]
+    drawn[rng.random(n_rows) < column.isna().mean()] = np.nan
+    return drawn
+
+
+def _option_key(option):
+    """Sort numeric options by their value and other options by their text."""
+    return (0, int(option), "") if option.isdigit() else (1, 0, option)
@@ -1,4 +1,5 @@
 """All the general configuration of the project."""
+import os
 from pathlib import Path
 
 SRC = Path(__file__).parent.resolve()
@@ -7,6 +8,50 @@ BLD = SRC.joinpath("..", "..", "bld").resolve()
 TEST_DIR = SRC.joinpath("..", "..", "tests").resolve()
 PAPER_DIR = SRC.joinpath("..", "..", "paper").resolve()
 
-GROUPS = ["marital_status", "qualification"]
+SURVEY_ARCHIVE = SRC / "data" / "survey_data.csv.zip"
+# The survey read by the tasks: the export extracted by unzip.py or, if it was not
+# extracted, the archive itself, which is streamed into the survey cache. See
+# ``unzip.py --stream``.
+SURVEY_DATA = BLD / "survey_data.csv"
+if not SURVEY_DATA.exists():
+    SURVEY_DATA = SURVEY_ARCHIVE
 
-__all__ = ["BLD", "SRC", "TEST_DIR", "GROUPS"]
+SURVEY_CACHE = BLD / "survey_cache"
+FINGERPRINTS = BLD / "fingerprints"
+AGGREGATES = BLD / "aggregates.json"
+MOMENTS = BLD / "moments.json"
+RESPONSES = BLD / "responses"
+TRACES = BLD / "traces"
+PAPER_ASSETS = BLD / "paper"
+
+MEMORY_BUDGET = 512 * 1024**2
+# Number of worker processes of the tasks that parallelize their own work.
+N_JOBS = int(os.environ.get("CLIMATE_SHOCKS_JOBS", os.cpu_count() or 1))
+
+HEADLESS = os.environ.get("CLIMATE_SHOCKS_HEADLESS", "1") != "0"
+# Tracing is opt-in, see hooks.py. Only the latest MAX_TRACES traces are kept.
+TRACE = os.environ.get("CLIMATE_SHOCKS_TRACE", "0") != "0"
+MAX_TRACES = 10
+
+GROUPS = ["Country_of_Residence", "Gender", "Education"]
+
+__all__ = [
+    "BLD",
+    "SRC",
+    "TEST_DIR",
+    "SURVEY_ARCHIVE",
+    "SURVEY_DATA",
+    "SURVEY_CACHE",
+    "FINGERPRINTS",
+    "AGGREGATES",
+    "MOMENTS",
+    "RESPONSES",
+    "TRACES",
+    "PAPER_ASSETS",
+    "MEMORY_BUDGET",
+    "N_JOBS",
+    "HEADLESS",
+    "TRACE",
+    "MAX_TRACES",
+    "GROUPS",
+]
@@ -1,5 +1,13 @@
+import sys
 import pandas as pd
+from climate_shocks.config import MEMORY_BUDGET
+from climate_shocks.data_management.survey_cache import iter_survey_chunks
+from climate_shocks.instrumentation import instrument
 
+SAMPLE_ROWS = 1000
+STAGE_COPIES = 4
+
+@instrument('read')
 def read_data(file_path):
     """
     Read data from a CSV file.
@@ -36,13 +44,19 @@ def rename_countries(data):
     Returns:
         pd.DataFrame: The DataFrame with renamed country values.
     """
-    data['Country_of_Residence'] = data['Country_of_Residence'].replace({
+    countries = {
         1: 'Germany',
         2: 'India',
         3: 'Indonesia'
-    })
+    }
+    column = data['Country_of_Residence']
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        data['Country_of_Residence'] = column.cat.rename_categories(lambda code: countries.get(code, code))
+    else:
+        data['Country_of_Residence'] = column.replace(countries)
     return data
 
+@instrument('filter')
 def filter_data(data):
     """
     Filter data columns and rows to prepare for analysis.
@@ -61,6 +75,7 @@ def filter_data(data):
 
     return filtered_data
 
+@instrument('export')
 def save_filtered_data(data, file_path):
     """
     Save filtered data to a CSV file.
@@ -78,6 +93,78 @@ def save_filtered_data(data, file_path):
     
     data[column_order].to_csv(file_path, index=False)
 
+@instrument('export')
+def save_filtered_chunks(chunks, file_path):
+    """
+    Save a stream of filtered chunks to a CSV file, appending one chunk at a time.
+
+    Args:
+        chunks (iterable of pd.DataFrame): The filtered chunks.
+        file_path (str): The path to save the CSV file.
+
+    Returns:
+        int: The number of rows written.
+    """
+    n_rows = 0
+    for i, chunk in enumerate(chunks):
+        column_order = ['Country_of_Residence'] + [col for col in chunk if col != 'Country_of_Residence']
+        chunk[column_order].to_csv(file_path, mode='a' if i else 'w', header=not i, index=False)
+        n_rows += len(chunk)
+    return n_rows
+
+def iter_chunks(file_path, chunksize):
+    """
+    Read data from a CSV file in chunks of rows.
+
+    The chunks are sliced from the memory-mapped survey cache, so each of them has the
+    dtypes of the whole column and the written output does not depend on the chunk size.
+
+    Args:
+        file_path (str): The path to the CSV file.
+        chunksize (int): The number of rows per chunk.
+
+    Returns:
+        generator: Consecutive chunks of the data as pd.DataFrame.
+    """
+    return iter_survey_chunks(file_path, chunksize=chunksize)
+
+def clean_chunks(chunks):
+    """
+    Push chunks through the cleaning and filtering stages one at a time.
+
+    Args:
+        chunks (iterable of pd.DataFrame): Chunks of the raw data.
+
+    Yields:
+        pd.DataFrame: The cleaned and filtered chunks.
+    """
+    for chunk in chunks:
+        chunk = clean_column_names(chunk)
+        chunk = rename_countries(chunk)
+        yield filter_data(chunk)
+
+def chunksize_for_budget(file_path, memory_budget=MEMORY_BUDGET):
+    """
+    Derive the chunk size from a memory budget.
+
+    The in-memory size of a row is estimated from the first rows of the data. A chunk
+    is alive in a few copies at once while it passes through the stages, which is
+    accounted for by STAGE_COPIES.
+
+    Args:
+        file_path (str): The path to the CSV file.
+        memory_budget (int): The number of bytes the pipeline may use for chunks.
+
+    Returns:
+        int: The number of rows per chunk.
+    """
+    sample = next(iter_chunks(file_path, SAMPLE_ROWS), None)
+    if sample is None or sample.empty:
+        return SAMPLE_ROWS
+    bytes_per_row = sample.memory_usage(index=True, deep=True).sum() / len(sample)
+    return max(1, int(memory_budget // (bytes_per_row * STAGE_COPIES)))
+
+@instrument('clean')
 def clean_data(data):
     """
     Clean data by applying all necessary cleaning operations.
@@ -92,11 +179,22 @@ def clean_data(data):
     data = rename_countries(data)
     return data
 
-def main():
+def main(chunked=False, memory_budget=MEMORY_BUDGET):
     """
     Main function to execute the data filtering process.
+
+    Args:
+        chunked (bool): Whether to stream the data through the stages in chunks, which
+            keeps peak memory flat regardless of the input size. The output is the
+            same as for the in-memory path.
+        memory_budget (int): The number of bytes available for chunks in chunked mode.
     """
-   
+    if chunked:
+        chunksize = chunksize_for_budget('bld/survey_data.csv', memory_budget)
+        chunks = iter_chunks('bld/survey_data.csv', chunksize)
+        save_filtered_chunks(clean_chunks(chunks), 'bld/clean_filtered_data.csv')
+        return
+
     data = read_data('bld/survey_data.csv')
 
     data = clean_data(data)
@@ -106,4 +204,4 @@ def main():
     save_filtered_data(filtered_data, 'bld/clean_filtered_data.csv')
 
 if __name__ == "__main__":
-    main()
+    main(chunked="--chunked" in sys.argv[1:])
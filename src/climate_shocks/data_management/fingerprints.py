@@ -0,0 +1,140 @@
+"""Fingerprints of the survey columns and the code that a task reads.
+
+A task that depends on the whole survey file reruns whenever any column changes. The
+tasks instead depend on a fingerprint file per consumer of the survey. It holds the
+digests of the cached column files that the consumer reads, see ``columns_for``, and
+of the modules with its code. The file is only rewritten when one of these digests
+changes, so pytask skips the consumer when other columns of the survey were edited.
+
+The modules of a consumer are found with ``imported_modules``, which follows the
+imports of the modules the tasks call through the package, so editing a helper they
+use changes the fingerprint as well.
+
+"""
+import ast
+import json
+from pathlib import Path
+
+from climate_shocks.config import SRC, SURVEY_CACHE
+from climate_shocks.data_management.survey_cache import (
+    build_survey_cache,
+    file_digest,
+    read_manifest,
+)
+
+
+def column_digests(source, columns, cache_dir=SURVEY_CACHE):
+    """Compute the content digests of columns of the survey.
+
+    Args:
+        source (str or pathlib.Path): Path to the survey CSV file or zip archive.
+        columns (list): Columns, with or without surrounding whitespace.
+        cache_dir (str or pathlib.Path): Directory holding the cache entries.
+
+    Returns:
+        dict: Column names mapped to the digest of their values.
+
+    Raises:
+        KeyError: If a column is not part of the survey.
+
+    """
+    entry = build_survey_cache(source, cache_dir)
+    specs = {spec["name"].strip(): spec for spec in read_manifest(entry)["columns"]}
+    missing = [column for column in columns if column.strip() not in specs]
+    if missing:
+        raise KeyError(f"Columns {missing} are not part of the survey {source}.")
+
+    digests = {}
+    for column in columns:
+        spec = specs[column.strip()]
+        files = [spec["file"]] + ([spec["categories"]] if "categories" in spec else [])
+        digests[column] = "-".join(file_digest(Path(entry) / name) for name in files)
+    return digests
+
+
+def write_fingerprint(path, source, columns, code=(), cache_dir=SURVEY_CACHE):
+    """Write the fingerprint of a consumer of the survey if it changed.
+
+    Args:
+        path (str or pathlib.Path): Path to the fingerprint file.
+        source (str or pathlib.Path): Path to the survey CSV file or zip archive.
+        columns (list): Columns read by the consumer.
+        code (list): Paths to the modules with the code of the consumer.
+        cache_dir (str or pathlib.Path): Directory holding the cache entries.
+
+    Returns:
+        bool: Whether the file was written.
+
+    """
+    path = Path(path)
+    fingerprint = {
+        "columns": column_digests(source, columns, cache_dir),
+        "code": {_code_name(module): file_digest(module) for module in code},
+    }
+    text = json.dumps(fingerprint, indent=2) + "\n"
+    if path.exists() and path.read_text() == text:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return True
+
+
+def imported_modules(modules, package_dir=SRC):
+    """Find the modules of the package that run when modules are used.
+
+    The imports of the modules are followed through the package, including imports
+    inside functions and the ``__init__`` modules of the packages they pass. Imports
+    of other packages are ignored.
+
+    Args:
+        modules (list): Paths to the modules.
+        package_dir (str or pathlib.Path): Directory of the package.
+
+    Returns:
+        list: The paths of the modules and of all modules of the package they import,
+            directly or not, in sorted order.
+
+    """
+    package_dir = Path(package_dir).resolve()
+    found, pending = set(), [Path(module).resolve() for module in modules]
+    while pending:
+        path = pending.pop()
+        if path in found:
+            continue
+        found.add(path)
+        if path.is_relative_to(package_dir):
+            for parent in path.relative_to(package_dir).parents:
+                init = package_dir / parent / "__init__.py"
+                if init.exists():
+                    pending.append(init)
+        for node in ast.walk(ast.parse(path.read_text(), filename=str(path))):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [f"{node.module}.{alias.name}" for alias in node.names]
+            else:
+                continue
+            for name in names:
+                pending.extend(_module_files(name, package_dir))
+    return sorted(found)
+
+
+def _module_files(name, package_dir):
+    """Find the files run by importing a dotted name from the package."""
+    parts = name.split(".")
+    if parts[0] != package_dir.name:
+        return []
+    files = []
+    for i in range(1, len(parts) + 1):
+        path = package_dir.joinpath(*parts[1:i])
+        if (path / "__init__.py").exists():
+            files.append(path / "__init__.py")
+        elif path.with_suffix(".py").exists():
+            files.append(path.with_suffix(".py"))
+    return files
+
+
+def _code_name(module):
+    """Name a module by its path within the package, or by its file name."""
+    path = Path(module).resolve()
+    return path.relative_to(SRC).as_posix() if path.is_relative_to(SRC) else path.name
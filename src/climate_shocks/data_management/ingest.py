@@ -0,0 +1,197 @@
+"""Ingestion of several survey exports, for example one per country and wave.
+
+The exports are given as a glob pattern, a list of paths or a manifest. A manifest is
+a YAML file, or the equivalent dict, that labels every export with its source and
+wave::
+
+    exports:
+      - {path: wave_1/germany.csv, source: Germany, wave: 1}
+      - {path: wave_1/india.zip, source: India, wave: 1}
+
+Paths in a manifest file are relative to the manifest. Exports without a source are
+labelled by their path relative to the manifest or to the directory a glob pattern
+starts from, so ``wave_1/germany.csv`` and ``wave_2/germany.csv`` keep apart.
+
+Every export is parsed into the columnar cache, see ``survey_cache.py``, by a pool of
+worker processes, so the exports are parsed in parallel and an unchanged export is
+never parsed again. The cached columns are then memory-mapped and copied once into
+the columns of the combined data set, without building and concatenating a data
+frame per export.
+
+Columns are matched by their name without surrounding whitespace, so ``"\\xa0EAI_1"``
+in one export and ``"EAI_1"`` in another are the same column, returned as
+``"EAI_1"``. Columns missing from an export are missing values for its respondents.
+The dtypes are reconciled like ``pandas.read_csv`` does across chunks: integers with
+missing values become floats and columns mixing numbers with text hold objects.
+
+"""
+import collections
+import glob
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from climate_shocks.config import N_JOBS, SURVEY_CACHE
+from climate_shocks.data_management.schema import apply_dtypes
+from climate_shocks.data_management.survey_cache import (
+    build_survey_cache,
+    load_column,
+    read_manifest,
+)
+from climate_shocks.instrumentation import instrument
+from climate_shocks.utilities import read_yaml
+
+Export = collections.namedtuple(
+    "Export", ["path", "source", "wave"], defaults=[None, None]
+)
+
+SOURCE_COLUMN = "Source"
+WAVE_COLUMN = "Wave"
+
+
+def resolve_exports(exports):
+    """List the exports given by a glob pattern, a list of paths or a manifest.
+
+    Args:
+        exports (str, pathlib.Path, list or dict): A glob pattern, the path to a single
+            export or to a YAML manifest, a list of paths, ``Export``s or dicts, or a
+            manifest dict with the list of ``exports``.
+
+    Returns:
+        list: The ``Export``s with a path and a source, sorted by path for a glob
+            pattern and in the given order otherwise. The source defaults to the path
+            relative to the manifest or to the directory the glob pattern starts from.
+
+    Raises:
+        ValueError: If no export is given or found.
+
+    """
+    root, labels_root = Path(), None
+    if isinstance(exports, (str, Path)):
+        pattern = str(exports)
+        if pattern.endswith((".yaml", ".yml")):
+            root = Path(pattern).parent
+            exports = read_yaml(pattern)
+        elif glob.has_magic(pattern):
+            labels_root = _glob_root(pattern)
+            exports = sorted(glob.glob(pattern))
+        else:
+            exports = [pattern]
+    if isinstance(exports, dict):
+        exports = exports.get("exports", [])
+
+    resolved = []
+    for export in exports:
+        if isinstance(export, dict):
+            export = Export(**export)
+        elif not isinstance(export, Export):
+            export = Export(export)
+        path = root / export.path
+        source = Path(export.path)
+        if labels_root is not None:
+            source = source.relative_to(labels_root)
+        source = export.source or source.as_posix()
+        resolved.append(export._replace(path=path, source=source))
+    if not resolved:
+        info = f"No survey exports were found for {exports!r}."
+        raise ValueError(info)
+    return resolved
+
+
+@instrument("read")
+def ingest_exports(
+    exports, columns=None, cache_dir=SURVEY_CACHE, n_jobs=N_JOBS, schema=None
+):
+    """Combine several survey exports into one typed data set.
+
+    Args:
+        exports (str, pathlib.Path, list or dict): The exports, see
+            ``resolve_exports``.
+        columns (list, optional): Columns to read, without surrounding whitespace.
+            Defaults to all columns of all exports, in the order they first appear.
+        cache_dir (str or pathlib.Path): Directory holding the cache entries.
+        n_jobs (int): Number of worker processes parsing the exports.
+        schema (dict, optional): The schema with the dtypes. Defaults to
+            ``data_info.yaml``.
+
+    Returns:
+        pandas.DataFrame: The respondents of all exports, in the order of the exports,
+            with the columns cast to their declared dtypes. The categorical column
+            ``Source`` labels the export of every respondent, and ``Wave`` its wave if
+            the manifest gives waves.
+
+    Raises:
+        ValueError: If no export is given or found.
+        KeyError: If a requested column is part of none of the exports.
+
+    """
+    exports = resolve_exports(exports)
+    entries = _build_caches([export.path for export in exports], cache_dir, n_jobs)
+    manifests = [read_manifest(entry) for entry in entries]
+    specs = [
+        {spec["name"].strip(): spec for spec in manifest["columns"]}
+        for manifest in manifests
+    ]
+    available = list(dict.fromkeys(name for export in specs for name in export))
+    if columns is None:
+        columns = available
+    missing = [column for column in columns if column not in available]
+    if missing:
+        raise KeyError(f"Columns {missing} are part of none of the exports.")
+
+    lengths = [manifest["rows"] for manifest in manifests]
+    bounds = np.cumsum([0, *lengths])
+    data = {}
+    for column in columns:
+        parts = [export.get(column) for export in specs]
+        out = np.empty(bounds[-1], dtype=_combined_dtype(parts))
+        for entry, spec, start, stop in zip(entries, parts, bounds[:-1], bounds[1:]):
+            if spec is None:
+                out[start:stop] = np.nan
+            elif spec["kind"] == "text":
+                out[start:stop] = load_column(entry, spec)
+            else:
+                out[start:stop] = load_column(entry, spec, mmap_mode="r")
+        data[column] = out
+
+    data[SOURCE_COLUMN] = _labels([export.source for export in exports], lengths)
+    if any(export.wave is not None for export in exports):
+        data[WAVE_COLUMN] = _labels([export.wave for export in exports], lengths)
+    return apply_dtypes(pd.DataFrame(data, copy=False), schema)
+
+
+def _glob_root(pattern):
+    """Find the directory a glob pattern starts from, before its first wildcard."""
+    parts = Path(pattern).parts
+    stop = next(i for i, part in enumerate(parts) if glob.has_magic(part))
+    return Path(*parts[:stop])
+
+
+def _build_caches(paths, cache_dir, n_jobs):
+    """Parse the exports into the cache in parallel and return their entries."""
+    if n_jobs > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(min(n_jobs, len(paths))) as executor:
+            return list(
+                executor.map(build_survey_cache, paths, [cache_dir] * len(paths))
+            )
+    return [build_survey_cache(path, cache_dir) for path in paths]
+
+
+def _combined_dtype(parts):
+    """Find the dtype that holds a column of every export."""
+    if any(spec is not None and spec["kind"] == "text" for spec in parts):
+        return np.dtype(object)
+    dtypes = [np.dtype(spec["dtype"]) for spec in parts if spec is not None]
+    if any(spec is None for spec in parts):
+        dtypes.append(np.dtype("float64"))
+    dtype = np.result_type(*dtypes)
+    return dtype if dtype.kind in "iufb" else np.dtype(object)
+
+
+def _labels(labels, lengths):
+    """Repeat the label of every export for its respondents as a categorical."""
+    categories = list(dict.fromkeys(label for label in labels if label is not None))
+    codes = [-1 if label is None else categories.index(label) for label in labels]
+    return pd.Categorical.from_codes(np.repeat(codes, lengths), categories)
@@ -0,0 +1,312 @@
+"""Memory-mapped int8 matrix of the Likert batteries.
+
+The answers to the JB, EAI, GPS and climate batteries are small integers, but parsed
+columns with missing values hold float64, eight bytes per answer, and every process
+keeps its own copy. The response matrix stores these batteries once as a single int8
+``.npy`` file with ``MISSING`` for missing answers, next to a JSON index of its
+columns. The matrix is in column-major order, so every column and every battery is a
+contiguous block.
+
+The digests of the answers to every battery are also written to a file of their own,
+see ``battery_index``, which is only rewritten when these answers changed. Tasks depend
+on the files of the batteries they read, so editing the answers to one battery does not
+run the tasks reading the others.
+
+Loaders memory-map the file read-only. Slicing the columns of a battery gives a NumPy
+view without copying, and all processes reading the matrix share the pages cached by
+the operating system. ``response_frame`` wraps the column views into nullable
+``Int8`` columns, the dtype declared for the batteries in ``data_info.yaml``; only the
+masks of the missing answers are allocated.
+
+"""
+import collections
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from climate_shocks.config import RESPONSES, SURVEY_CACHE
+from climate_shocks.data_management.fingerprints import column_digests
+from climate_shocks.data_management.schema import apply_dtypes, load_schema
+from climate_shocks.data_management.survey_cache import (
+    build_survey_cache,
+    load_column,
+    read_manifest,
+    read_survey,
+)
+from climate_shocks.instrumentation import instrument
+
+ResponseMatrix = collections.namedtuple(
+    "ResponseMatrix", ["values", "columns", "batteries", "digests"]
+)
+
+BATTERIES = ["jb", "eai", "gps", "climate"]
+MISSING = np.iinfo(np.int8).min
+VALUES = "responses.npy"
+INDEX = "responses.json"
+
+
+def build_response_matrix(
+    source,
+    directory=RESPONSES,
+    batteries=BATTERIES,
+    schema=None,
+    cache_dir=SURVEY_CACHE,
+):
+    """Write the answers to the batteries of a survey to the response matrix.
+
+    The columns are copied one at a time from the memory-mapped survey cache, so the
+    survey is never loaded as a whole. The index records the digests of the columns,
+    see ``column_digests``. Nothing is written if the matrix already holds the same
+    answers, so editing other columns of the survey leaves the matrix as is.
+
+    Args:
+        source (str or pathlib.Path): Path to the survey CSV file or zip archive.
+        directory (str or pathlib.Path): Directory of the matrix and its index.
+        batteries (list): The batteries declared in the schema.
+        schema (dict, optional): The schema. Defaults to ``data_info.yaml``.
+        cache_dir (str or pathlib.Path): Directory holding the survey cache entries.
+
+    Returns:
+        bool: Whether the matrix was written.
+
+    Raises:
+        KeyError: If a battery is not declared or one of its columns is not part of
+            the survey.
+        ValueError: If an answer is not a number or not an integer between -127 and
+            127.
+
+    """
+    schema = load_schema() if schema is None else schema
+    unknown = [battery for battery in batteries if battery not in schema["batteries"]]
+    if unknown:
+        raise KeyError(f"The batteries {unknown} are not declared in the schema.")
+    columns, bounds = [], {}
+    for battery in batteries:
+        start = len(columns)
+        columns.extend(schema["batteries"][battery]["columns"])
+        bounds[battery] = [start, len(columns)]
+
+    directory = Path(directory)
+    index = {
+        "missing": int(MISSING),
+        "columns": columns,
+        "batteries": bounds,
+        "digests": column_digests(source, columns, cache_dir),
+    }
+    if (directory / VALUES).exists() and _read_index(directory) == index:
+        _write_battery_indexes(directory, index)
+        return False
+
+    entry = build_survey_cache(source, cache_dir)
+    manifest = read_manifest(entry)
+    specs = {spec["name"].strip(): spec for spec in manifest["columns"]}
+
+    directory.mkdir(parents=True, exist_ok=True)
+    handle, tmp = tempfile.mkstemp(suffix=".tmp", dir=directory)
+    os.close(handle)
+    try:
+        out = np.lib.format.open_memmap(
+            tmp,
+            mode="w+",
+            dtype=np.int8,
+            shape=(manifest["rows"], len(columns)),
+            fortran_order=True,
+        )
+        for j, column in enumerate(columns):
+            values = load_column(entry, specs[column], mmap_mode="r")
+            out[:, j] = _encode(column, values)
+        out.flush()
+        del out
+        # The old index must not describe the new matrix if writing the index fails
+        (directory / INDEX).unlink(missing_ok=True)
+        os.replace(tmp, directory / VALUES)
+        with open(tmp, "w") as file:
+            file.write(json.dumps(index, indent=2) + "\n")
+        os.replace(tmp, directory / INDEX)
+    finally:
+        Path(tmp).unlink(missing_ok=True)
+    _write_battery_indexes(directory, index)
+    return True
+
+
+def battery_index(battery, directory=RESPONSES):
+    """Find the file with the digests of the answers to a battery of the matrix.
+
+    Args:
+        battery (str): The battery.
+        directory (str or pathlib.Path): Directory of the matrix and its index.
+
+    Returns:
+        pathlib.Path: The path of the file.
+
+    """
+    return Path(directory) / f"{battery}.json"
+
+
+def load_response_matrix(directory=RESPONSES):
+    """Memory-map the response matrix read-only.
+
+    Args:
+        directory (str or pathlib.Path): Directory of the matrix and its index.
+
+    Returns:
+        ResponseMatrix: The int8 ``values``, the ``columns`` mapped to their
+            positions, the ``batteries`` mapped to their column ranges and the
+            ``digests`` of the survey columns.
+
+    """
+    directory = Path(directory)
+    index = _read_index(directory)
+    return ResponseMatrix(
+        values=np.load(directory / VALUES, mmap_mode="r"),
+        columns={column: j for j, column in enumerate(index["columns"])},
+        batteries={name: slice(*bounds) for name, bounds in index["batteries"].items()},
+        digests=index["digests"],
+    )
+
+
+def response_view(matrix, columns):
+    """Select columns of the response matrix.
+
+    Args:
+        matrix (ResponseMatrix): The matrix, see ``load_response_matrix``.
+        columns (str or list): A battery or a list of columns.
+
+    Returns:
+        numpy.ndarray: The int8 answers with one row per respondent and ``MISSING``
+            for missing answers. Batteries and runs of consecutive columns are views
+            of the memory-mapped file; other selections are copies.
+
+    Raises:
+        KeyError: If a column is not part of the matrix.
+
+    """
+    if isinstance(columns, str):
+        return matrix.values[:, matrix.batteries[columns]]
+    missing = [column for column in columns if column not in matrix.columns]
+    if missing:
+        raise KeyError(f"Columns {missing} are not part of the response matrix.")
+    positions = [matrix.columns[column] for column in columns]
+    start = positions[0] if positions else 0
+    if positions == list(range(start, start + len(positions))):
+        return matrix.values[:, start : start + len(positions)]
+    return matrix.values[:, positions]
+
+
+def masked_responses(matrix, columns):
+    """Select columns of the response matrix as a masked array.
+
+    Args:
+        matrix (ResponseMatrix): The matrix, see ``load_response_matrix``.
+        columns (str or list): A battery or a list of columns.
+
+    Returns:
+        numpy.ma.MaskedArray: The int8 answers, see ``response_view``, with the
+            missing answers masked. This is the form taken by ``batch_t_test``.
+
+    """
+    values = response_view(matrix, columns)
+    return np.ma.MaskedArray(values, mask=values == MISSING, copy=False)
+
+
+def response_frame(matrix, columns=None):
+    """Wrap columns of the response matrix into a data frame without copying them.
+
+    Args:
+        matrix (ResponseMatrix): The matrix, see ``load_response_matrix``.
+        columns (list, optional): The columns. Defaults to all columns.
+
+    Returns:
+        pandas.DataFrame: One nullable ``Int8`` column per column, backed by the
+            memory-mapped file.
+
+    Raises:
+        KeyError: If a column is not part of the matrix.
+
+    """
+    columns = list(matrix.columns) if columns is None else columns
+    missing = [column for column in columns if column not in matrix.columns]
+    if missing:
+        raise KeyError(f"Columns {missing} are not part of the response matrix.")
+    data = {}
+    for column in columns:
+        values = matrix.values[:, matrix.columns[column]]
+        data[column] = pd.arrays.IntegerArray(values, values == MISSING, copy=False)
+    return pd.DataFrame(data, columns=pd.Index(columns, dtype=object), copy=False)
+
+
+@instrument("read")
+def read_responses(
+    source, columns, directory=RESPONSES, schema=None, cache_dir=SURVEY_CACHE
+):
+    """Read survey columns, taking the columns of the batteries from the matrix.
+
+    Args:
+        source (str or pathlib.Path): Path to the survey CSV file or zip archive the
+            matrix was built from.
+        columns (list): Columns to read.
+        directory (str or pathlib.Path): Directory of the matrix and its index.
+        schema (dict, optional): The schema. Defaults to ``data_info.yaml``.
+        cache_dir (str or pathlib.Path): Directory holding the survey cache entries.
+
+    Returns:
+        pandas.DataFrame: The columns in the requested order, like ``read_columns``.
+            The columns of the batteries are backed by the memory-mapped file.
+
+    Raises:
+        ValueError: If the matrix holds other answers than the survey.
+
+    """
+    matrix = load_response_matrix(directory)
+    mapped = [column for column in columns if column in matrix.columns]
+    digests = column_digests(source, mapped, cache_dir)
+    if any(matrix.digests[column] != digests[column] for column in mapped):
+        info = f"The response matrix in {directory} is out of date with {source}."
+        raise ValueError(info)
+    mapped = response_frame(matrix, mapped)
+    parsed = [column for column in columns if column not in matrix.columns]
+    if parsed:
+        parsed = apply_dtypes(read_survey(source, parsed, cache_dir), schema)
+    data = {
+        column: (mapped if column in matrix.columns else parsed)[column]
+        for column in columns
+    }
+    return pd.DataFrame(data, columns=pd.Index(columns, dtype=object), copy=False)
+
+
+def _encode(column, values):
+    """Convert the answers of a column to int8 with the missing value sentinel."""
+    values = pd.Series(values)
+    parsed = pd.to_numeric(values, errors="coerce")
+    invalid = parsed.isna() & values.notna()
+    if invalid.any():
+        examples = values[invalid].unique()[:3].tolist()
+        info = f"The answers to {column!r} must be numbers, got {examples}."
+        raise ValueError(info)
+    values = parsed.to_numpy(dtype=np.float64, na_value=np.nan)
+    observed = ~np.isnan(values)
+    answers = values[observed]
+    if not np.array_equal(answers, np.round(answers)) or np.any(np.abs(answers) > 127):
+        info = f"The answers to {column!r} must be integers between -127 and 127."
+        raise ValueError(info)
+    return np.where(observed, values, MISSING).astype(np.int8)
+
+
+def _write_battery_indexes(directory, index):
+    """Write the digests of every battery unless the file already holds them."""
+    for battery, (start, stop) in index["batteries"].items():
+        columns = index["columns"][start:stop]
+        digests = {column: index["digests"][column] for column in columns}
+        text = json.dumps({"columns": columns, "digests": digests}, indent=2) + "\n"
+        path = battery_index(battery, directory)
+        if not path.exists() or path.read_text() != text:
+            path.write_text(text)
+
+
+def _read_index(directory):
+    path = Path(directory) / INDEX
+    return json.loads(path.read_text()) if path.exists() else None
@@ -0,0 +1,130 @@
+"""Typed schema of the survey, declared in ``data_info.yaml``.
+
+The schema lists the dtype of every item battery and of the remaining typed columns,
+and which columns each consumer of the survey reads. Loaders use it to project the
+survey onto the columns they need and to load them with compact dtypes.
+
+"""
+import functools
+
+import pandas as pd
+
+from climate_shocks.config import SRC
+from climate_shocks.data_management.survey_cache import read_survey
+from climate_shocks.instrumentation import instrument
+from climate_shocks.utilities import read_yaml
+
+DATA_INFO = SRC / "data_management" / "data_info.yaml"
+
+
+@functools.lru_cache
+def load_schema(path=DATA_INFO):
+    """Load the schema of the survey.
+
+    Args:
+        path (str or pathlib.Path): Path to the schema file.
+
+    Returns:
+        dict: The parsed schema.
+
+    """
+    return read_yaml(path)
+
+
+def column_dtypes(schema=None):
+    """Map every typed column of the schema to its dtype.
+
+    Args:
+        schema (dict, optional): The schema. Defaults to ``data_info.yaml``.
+
+    Returns:
+        dict: Column names mapped to dtype strings.
+
+    """
+    schema = load_schema() if schema is None else schema
+    dtypes = {}
+    for battery in schema["batteries"].values():
+        dtypes.update(dict.fromkeys(battery["columns"], battery["dtype"]))
+    dtypes.update(schema.get("columns", {}))
+    return dtypes
+
+
+def columns_for(consumer, schema=None):
+    """List the columns read by a consumer.
+
+    Args:
+        consumer (str): Name of the consumer, as listed under ``consumers``.
+        schema (dict, optional): The schema. Defaults to ``data_info.yaml``.
+
+    Returns:
+        list: The column names, with batteries expanded into their items.
+
+    Raises:
+        ValueError: If the consumer is not declared in the schema.
+
+    """
+    schema = load_schema() if schema is None else schema
+    if consumer not in schema["consumers"]:
+        raise ValueError(f"The consumer {consumer!r} is not declared in the schema.")
+    columns = []
+    for name in schema["consumers"][consumer]:
+        if name in schema["batteries"]:
+            columns.extend(schema["batteries"][name]["columns"])
+        else:
+            columns.append(name)
+    return columns
+
+
+def apply_dtypes(data, schema=None):
+    """Cast the columns of a data frame to the dtypes declared in the schema.
+
+    Columns are matched to the schema by their name without surrounding whitespace.
+    Columns that are not declared keep their dtype.
+
+    Args:
+        data (pandas.DataFrame): The data with column names as in the schema.
+        schema (dict, optional): The schema. Defaults to ``data_info.yaml``.
+
+    Returns:
+        pandas.DataFrame: The data with compact dtypes.
+
+    Raises:
+        ValueError: If a column cannot be represented with its declared dtype.
+
+    """
+    schema = load_schema() if schema is None else schema
+    dtypes = column_dtypes(schema)
+    for column in data.columns:
+        dtype = dtypes.get(column.strip())
+        if dtype is None:
+            continue
+        try:
+            data[column] = _cast(data[column], dtype, schema.get("datetime_format"))
+        except (TypeError, ValueError) as error:
+            info = f"Column {column!r} cannot be cast to {dtype!r}."
+            raise ValueError(info) from error
+    return data
+
+
+@instrument("read")
+def read_columns(source, columns=None, schema=None):
+    """Read columns of the survey with the dtypes declared in the schema.
+
+    Args:
+        source (str or pathlib.Path): Path to the survey CSV file or zip archive.
+        columns (list, optional): Columns to read. Defaults to all columns.
+        schema (dict, optional): The schema. Defaults to ``data_info.yaml``.
+
+    Returns:
+        pandas.DataFrame: The requested columns with compact dtypes.
+
+    """
+    return apply_dtypes(read_survey(source, columns), schema)
+
+
+def _cast(series, dtype, datetime_format):
+    if dtype.startswith("datetime"):
+        return pd.to_datetime(series, format=datetime_format)
+    if dtype == "category" and series.dtype.kind == "f":
+        series = series.astype("Int64")
+    return series.astype(dtype)
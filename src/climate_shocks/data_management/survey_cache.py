@@ -0,0 +1,422 @@
+"""Columnar cache of the raw survey export.
+
+The survey CSV is parsed once into one ``.npy`` file per column. The files live in a
+directory named after the content hash of the source, so every loader in the project
+can read just the columns it needs without parsing the CSV again.
+
+Zip archives are read as a stream straight out of the archive member, without
+extracting the CSV first. Their entries are keyed by the CRC and size recorded in the
+archive, so an unchanged archive is neither decompressed nor hashed again.
+
+"""
+import hashlib
+import json
+import shutil
+import tempfile
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from climate_shocks.config import SURVEY_CACHE
+
+CHUNKSIZE = 100_000
+MANIFEST = "manifest.json"
+
+_DIGESTS = {}
+
+
+def file_digest(path, block_size=2**20):
+    """Compute the content hash of a file.
+
+    The hash is memoized per path, modification time and size, so repeated calls
+    within one process do not read the file again.
+
+    Args:
+        path (str or pathlib.Path): Path to the file.
+        block_size (int): Number of bytes hashed at a time.
+
+    Returns:
+        str: Hexadecimal BLAKE2b digest of the file content.
+
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    if key not in _DIGESTS:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as stream:
+            for block in iter(lambda: stream.read(block_size), b""):
+                digest.update(block)
+        _DIGESTS[key] = digest.hexdigest()
+    return _DIGESTS[key]
+
+
+def zip_member(zip_path, member=None):
+    """Find the survey CSV inside a zip archive.
+
+    Args:
+        zip_path (str or pathlib.Path): Path to the zip archive.
+        member (str, optional): Name of the member. Defaults to the only CSV file in
+            the archive, ignoring macOS resource forks.
+
+    Returns:
+        zipfile.ZipInfo: The archive entry of the member, including its CRC and size.
+
+    Raises:
+        ValueError: If no member is given and the archive does not hold exactly one
+            CSV file.
+
+    """
+    with zipfile.ZipFile(zip_path) as archive:
+        if member is not None:
+            return archive.getinfo(member)
+        candidates = [
+            info
+            for info in archive.infolist()
+            if info.filename.endswith(".csv") and not info.filename.startswith("__MACOSX")
+        ]
+    if len(candidates) != 1:
+        info = f"Expected exactly one CSV file in {zip_path}, found {len(candidates)}."
+        raise ValueError(info)
+    return candidates[0]
+
+
+def iter_zip_chunks(zip_path, member=None, chunksize=CHUNKSIZE):
+    """Parse a CSV member of a zip archive as a stream of row chunks.
+
+    The member is decompressed on the fly, so neither the extracted file nor the
+    whole data set is ever held on disk or in memory.
+
+    Args:
+        zip_path (str or pathlib.Path): Path to the zip archive.
+        member (str, optional): Name of the member. Defaults to the only CSV file.
+        chunksize (int): Number of rows per chunk.
+
+    Yields:
+        pandas.DataFrame: Consecutive row blocks of the member.
+
+    """
+    info = zip_member(zip_path, member)
+    with zipfile.ZipFile(zip_path) as archive, archive.open(info) as stream:
+        yield from pd.read_csv(stream, chunksize=chunksize)
+
+
+def source_key(source, member=None):
+    """Compute the cache key of a survey source.
+
+    CSV files are keyed by their content hash. Zip archives are keyed by the CRC and
+    uncompressed size of the member, which are read from the archive directory
+    without decompressing anything.
+
+    Args:
+        source (str or pathlib.Path): Path to a survey CSV file or zip archive.
+        member (str, optional): Name of the CSV member of a zip archive.
+
+    Returns:
+        str: The cache key.
+
+    """
+    if zipfile.is_zipfile(source):
+        info = zip_member(source, member)
+        return f"zip-{info.CRC:08x}-{info.file_size}"
+    return file_digest(source)
+
+
+def build_survey_cache(source, cache_dir=SURVEY_CACHE, chunksize=CHUNKSIZE, member=None):
+    """Parse a survey CSV into the columnar cache unless it is already cached.
+
+    Args:
+        source (str or pathlib.Path): Path to the survey CSV file or to a zip archive
+            holding it.
+        cache_dir (str or pathlib.Path): Directory holding the cache entries.
+        chunksize (int): Number of rows parsed at a time.
+        member (str, optional): Name of the CSV member of a zip archive.
+
+    Returns:
+        pathlib.Path: The cache entry of the source.
+
+    """
+    source = Path(source)
+    entry = Path(cache_dir) / source_key(source, member)
+    if not (entry / MANIFEST).exists():
+        if zipfile.is_zipfile(source):
+            info = zip_member(source, member)
+            chunks = iter_zip_chunks(source, info.filename, chunksize)
+            name = f"{source.resolve()}/{info.filename}"
+        else:
+            chunks = pd.read_csv(source, chunksize=chunksize)
+            name = str(source.resolve())
+        write_cache(chunks, entry, source=name)
+    return entry
+
+
+def write_cache(chunks, entry, source):
+    """Write data frame chunks to a cache entry, one ``.npy`` file per column.
+
+    Chunks are spilled to disk as they arrive, so memory use is bounded by the chunk
+    size. Column dtypes are unified across chunks the way :func:`pandas.read_csv`
+    unifies them: integer columns with missing values become floats and columns
+    mixing numbers with text become text. Text columns are stored as integer codes
+    plus an array of categories.
+
+    The entry is written to a temporary directory of its own and renamed at the end,
+    so threads or processes building the same entry at once do not interfere. The
+    entry finished first is kept.
+
+    Args:
+        chunks (iterable of pandas.DataFrame): Consecutive row blocks of the data.
+        entry (pathlib.Path): Directory of the cache entry.
+        source (str): Absolute path of the source file, used to prune stale entries.
+            Files with the same name in different folders, such as the exports of
+            several waves, keep their own entries.
+
+    Returns:
+        dict: The manifest of the written entry.
+
+    """
+    entry = Path(entry)
+    entry.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=f"{entry.name}.", suffix=".tmp", dir=entry.parent))
+
+    names, parts, n_rows = None, [], 0
+    for i, chunk in enumerate(chunks):
+        if names is None:
+            names = list(chunk.columns)
+        dtypes = []
+        for j, name in enumerate(names):
+            values = chunk[name].to_numpy()
+            if values.dtype == object:
+                values = values.astype(str)
+                values[chunk[name].isna().to_numpy()] = ""
+                dtypes.append(None)
+            else:
+                dtypes.append(values.dtype)
+            np.save(tmp / f"{j:04d}.part{i}.npy", values)
+        parts.append(dtypes)
+        n_rows += len(chunk)
+
+    columns = []
+    for j, name in enumerate(names or []):
+        column_parts = [tmp / f"{j:04d}.part{i}.npy" for i in range(len(parts))]
+        dtypes = [dtypes[j] for dtypes in parts]
+        if any(dtype is None for dtype in dtypes) or not _is_numeric(dtypes):
+            spec = _write_text_column(tmp, j, column_parts, n_rows)
+        else:
+            spec = _write_numeric_column(tmp, j, column_parts, n_rows, dtypes)
+        columns.append({"name": name, **spec})
+
+    manifest = {"source": source, "rows": n_rows, "columns": columns}
+    (tmp / MANIFEST).write_text(json.dumps(manifest, indent=2))
+
+    if not (entry / MANIFEST).exists():
+        shutil.rmtree(entry, ignore_errors=True)
+    try:
+        tmp.rename(entry)
+    except OSError:
+        # Another process finished the same entry first.
+        shutil.rmtree(tmp, ignore_errors=True)
+        return read_manifest(entry)
+    _prune_stale_entries(entry, source)
+    return manifest
+
+
+def read_manifest(entry):
+    """Read the manifest of a cache entry.
+
+    Args:
+        entry (pathlib.Path): Directory of the cache entry.
+
+    Returns:
+        dict: The manifest with the number of rows and the column specifications.
+
+    """
+    return json.loads((Path(entry) / MANIFEST).read_text())
+
+
+def read_survey(source, columns=None, cache_dir=SURVEY_CACHE):
+    """Read columns of a survey CSV through the columnar cache.
+
+    The result is identical to ``pd.read_csv(source)[columns]``, but only the
+    requested columns are loaded and the CSV is parsed at most once per content.
+    Columns may be requested without the surrounding whitespace that some headers of
+    the raw export carry; they are returned under the requested name.
+
+    Args:
+        source (str or pathlib.Path): Path to the survey CSV file or to a zip archive
+            holding it.
+        columns (list, optional): Columns to read. Defaults to all columns.
+        cache_dir (str or pathlib.Path): Directory holding the cache entries.
+
+    Returns:
+        pandas.DataFrame: The requested columns.
+
+    Raises:
+        KeyError: If a requested column is not part of the survey.
+
+    """
+    entry = build_survey_cache(source, cache_dir)
+    specs = {spec["name"]: spec for spec in read_manifest(entry)["columns"]}
+    specs = {**{name.strip(): spec for name, spec in specs.items()}, **specs}
+    if columns is None:
+        columns = [spec["name"] for spec in read_manifest(entry)["columns"]]
+    missing = [column for column in columns if column not in specs]
+    if missing:
+        raise KeyError(f"Columns {missing} are not part of the survey {source}.")
+    return pd.DataFrame(
+        {column: load_column(entry, specs[column]) for column in columns},
+        columns=pd.Index(columns, dtype=object),
+    )
+
+
+def iter_survey_chunks(source, columns=None, chunksize=CHUNKSIZE, cache_dir=SURVEY_CACHE):
+    """Read a survey through the columnar cache in chunks of rows.
+
+    The cached columns are memory-mapped and sliced, so memory use is bounded by the
+    chunk size. Unlike parsing the CSV in chunks, every chunk carries the dtypes of
+    the whole column.
+
+    Args:
+        source (str or pathlib.Path): Path to the survey CSV file or to a zip archive
+            holding it.
+        columns (list, optional): Columns to read. Defaults to all columns.
+        chunksize (int): Number of rows per chunk.
+        cache_dir (str or pathlib.Path): Directory holding the cache entries.
+
+    Yields:
+        pandas.DataFrame: Consecutive row blocks with a continuous index.
+
+    """
+    entry = build_survey_cache(source, cache_dir)
+    manifest = read_manifest(entry)
+    specs = {spec["name"]: spec for spec in manifest["columns"]}
+    columns = list(specs) if columns is None else columns
+    arrays = {column: np.load(entry / specs[column]["file"], mmap_mode="r") for column in columns}
+    categories = {
+        column: np.load(entry / specs[column]["categories"]).tolist()
+        for column in columns
+        if specs[column]["kind"] == "text"
+    }
+    for start in range(0, manifest["rows"], chunksize):
+        stop = min(start + chunksize, manifest["rows"])
+        chunk = {}
+        for column, values in arrays.items():
+            values = np.array(values[start:stop])
+            if column in categories:
+                values = pd.Categorical.from_codes(values, categories[column])
+                values = np.asarray(values, dtype=object)
+            chunk[column] = values
+        yield pd.DataFrame(
+            chunk, index=pd.RangeIndex(start, stop), columns=pd.Index(columns, dtype=object)
+        )
+
+
+def ingest_archive(zip_path, clean_path, cache_dir=SURVEY_CACHE, chunksize=CHUNKSIZE):
+    """Stream a zipped survey export into the cache and the cleaned data set.
+
+    The archive member is parsed chunk by chunk into the columnar cache without being
+    extracted. The cleaned data is then written chunk by chunk from the cache. Nothing
+    is done if the CRC and size of the member match the last ingested archive and the
+    cleaned data still exists.
+
+    The cache entry is keyed by the archive, so the loaders and the tasks reading the
+    archive as the survey, see ``SURVEY_DATA``, find it without parsing it again.
+
+    Args:
+        zip_path (str or pathlib.Path): Path to the zip archive.
+        clean_path (str or pathlib.Path): Path of the cleaned CSV file.
+        cache_dir (str or pathlib.Path): Directory holding the cache entries.
+        chunksize (int): Number of rows per chunk.
+
+    Returns:
+        bool: Whether the archive had to be ingested.
+
+    """
+    from climate_shocks.data_management.clean_data import clean_data
+
+    zip_path, clean_path = Path(zip_path), Path(clean_path)
+    key = source_key(zip_path)
+    stamp = Path(cache_dir) / f"{zip_path.name}.json"
+    if clean_path.exists() and stamp.exists() and json.loads(stamp.read_text()) == key:
+        return False
+
+    build_survey_cache(zip_path, cache_dir, chunksize)
+    chunks = iter_survey_chunks(zip_path, chunksize=chunksize, cache_dir=cache_dir)
+    for i, chunk in enumerate(chunks):
+        clean_data(chunk).to_csv(clean_path, mode="a" if i else "w", header=not i, index=False)
+    stamp.write_text(json.dumps(key))
+    return True
+
+
+def load_column(entry, spec, mmap_mode=None):
+    """Load a single cached column.
+
+    Args:
+        entry (pathlib.Path): Directory of the cache entry.
+        spec (dict): Column specification from the manifest.
+        mmap_mode (str, optional): Memory-map mode passed on to :func:`numpy.load`.
+
+    Returns:
+        numpy.ndarray: The column values. Text columns are returned as object arrays
+            with ``nan`` for missing values.
+
+    """
+    values = np.load(Path(entry) / spec["file"], mmap_mode=mmap_mode)
+    if spec["kind"] == "text":
+        categories = np.load(Path(entry) / spec["categories"]).tolist()
+        values = np.asarray(pd.Categorical.from_codes(values, categories), dtype=object)
+    return values
+
+
+def _is_numeric(dtypes):
+    kinds = {dtype.kind for dtype in dtypes}
+    return kinds <= {"i", "u", "f"} or len(kinds) == 1
+
+
+def _write_numeric_column(tmp, j, column_parts, n_rows, dtypes):
+    dtype = np.result_type(*dtypes) if dtypes else np.dtype("float64")
+    file = f"{j:04d}.npy"
+    out = np.lib.format.open_memmap(tmp / file, mode="w+", dtype=dtype, shape=(n_rows,))
+    start = 0
+    for part in column_parts:
+        values = np.load(part)
+        out[start : start + len(values)] = values
+        start += len(values)
+        part.unlink()
+    out.flush()
+    del out
+    return {"kind": "numeric", "dtype": dtype.str, "file": file}
+
+
+def _write_text_column(tmp, j, column_parts, n_rows):
+    file = f"{j:04d}.npy"
+    codes = np.lib.format.open_memmap(tmp / file, mode="w+", dtype="int32", shape=(n_rows,))
+    lookup, start = {}, 0
+    for part in column_parts:
+        values = np.load(part)
+        if values.dtype.kind != "U":
+            missing = pd.isna(values)
+            values = values.astype(object).astype(str)
+            values[missing] = ""
+        uniques, inverse = np.unique(values, return_inverse=True)
+        mapping = np.array(
+            [-1 if value == "" else lookup.setdefault(value, len(lookup)) for value in uniques.tolist()],
+            dtype="int32",
+        )
+        codes[start : start + len(values)] = mapping[inverse]
+        start += len(values)
+        part.unlink()
+    codes.flush()
+    del codes
+    categories = f"{j:04d}.categories.npy"
+    np.save(tmp / categories, np.array(list(lookup), dtype=str))
+    return {"kind": "text", "dtype": "object", "file": file, "categories": categories}
+
+
+def _prune_stale_entries(entry, source):
+    for other in entry.parent.iterdir():
+        if other == entry or other.suffix == ".tmp" or not (other / MANIFEST).exists():
+            continue
+        if read_manifest(other)["source"] == source:
+            shutil.rmtree(other, ignore_errors=True)
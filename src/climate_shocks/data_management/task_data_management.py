@@ -1,10 +1,11 @@
 """Tasks for managing the data."""
 
+import shutil
 from pathlib import Path
 
-import pandas as pd
+import pytask
 
-from climate_shocks.config import BLD, SRC
+from climate_shocks.config import BLD, FINGERPRINTS, RESPONSES, SRC, SURVEY_CACHE, SURVEY_DATA
 from climate_shocks.data_management.clean_data import read_data
 from climate_shocks.data_management.clean_data import clean_column_names
 from climate_shocks.data_management.clean_data import rename_countries
@@ -12,12 +13,58 @@ from climate_shocks.data_management.clean_data import filter_data
 from climate_shocks.data_management.clean_data import save_filtered_data
 from climate_shocks.data_management.clean_data import clean_data
 from climate_shocks.data_management.clean_data import main
+from climate_shocks.data_management.survey_cache import MANIFEST
+from climate_shocks.data_management.survey_cache import build_survey_cache
+from climate_shocks.data_management.fingerprints import imported_modules
+from climate_shocks.data_management.fingerprints import write_fingerprint
+from climate_shocks.data_management.response_matrix import BATTERIES, INDEX, VALUES, battery_index
+from climate_shocks.data_management.response_matrix import build_response_matrix
+from climate_shocks.data_management.schema import columns_for
+from climate_shocks.data_management.survey_cache import read_survey
 from climate_shocks.utilities import read_yaml
 
+
+def task_cache_survey(
+    depends_on=SURVEY_DATA,
+    produces=SURVEY_CACHE / "survey_data.json",
+):
+    """Parse the survey export once into the columnar cache.
+
+    If the export was not extracted, the survey is the archive, which is streamed into
+    the cache without extracting it, see ``SURVEY_DATA``.
+
+    """
+    entry = build_survey_cache(depends_on)
+    shutil.copy(entry / MANIFEST, produces)
+
+
+def task_build_response_matrix(
+    depends_on={
+        "data": SURVEY_DATA,
+        "cache": SURVEY_CACHE / "survey_data.json",
+        "data_info": SRC / "data_management" / "data_info.yaml",
+    },
+    produces={
+        "values": RESPONSES / VALUES,
+        "index": RESPONSES / INDEX,
+        **{battery: battery_index(battery) for battery in BATTERIES},
+    },
+):
+    """Write the Likert batteries to the memory-mapped int8 response matrix.
+
+    The matrix is only rewritten when the answers to the batteries changed, and the
+    digests of a battery only when its answers changed, see ``battery_index``.
+
+    """
+    schema = read_yaml(depends_on["data_info"])
+    build_response_matrix(depends_on["data"], produces["index"].parent, schema=schema)
+
+
 clean_data_deps = {
     "scripts": Path("clean_data.py"),
     "data_info": SRC / "data_management" / "data_info.yaml",
-    "data": BLD / "survey_data.csv",
+    "data": SURVEY_DATA,
+    "cache": SURVEY_CACHE / "survey_data.json",
 }
 
 
@@ -27,6 +74,59 @@ def task_clean_data_python(
 ):
     """Clean the data (Python version)."""
     data_info = read_yaml(depends_on["data_info"])
-    data = pd.read_csv(depends_on["data"])
+    data = read_survey(depends_on["data"])
     data = clean_data(data)
     data.to_csv(produces, index=False)
+
+
+# The survey file read by every consumer of ``columns_for`` and the modules whose
+# functions its tasks call. pytask only tracks the task modules, so the fingerprints
+# also cover these modules and the modules of the package they import, see
+# ``imported_modules``.
+CONSUMERS = {
+    "plot1": (SURVEY_DATA, ["final/plot1.py"]),
+    "plot2": (SURVEY_DATA, ["final/plot2.py"]),
+    "gea": (BLD / "clean_filtered_data.csv", ["final/Plot3.py"]),
+    "plot4": (SURVEY_DATA, ["final/plot4.py"]),
+    "plot5": (SURVEY_DATA, ["final/plot5.py"]),
+    "age_distribution": (SURVEY_DATA, ["final/age_distribution.py"]),
+    "model": (
+        SURVEY_DATA,
+        ["analysis/model.py", "analysis/ratings_cube.py", "analysis/session.py"],
+    ),
+    "stratified": (
+        SURVEY_DATA,
+        ["analysis/stratified.py", "analysis/session.py", "final/plot5.py"],
+    ),
+    "aggregates": (
+        SURVEY_DATA,
+        ["analysis/aggregates.py", "analysis/scoring.py", "analysis/session.py"],
+    ),
+    "crosstab": (SURVEY_DATA, ["analysis/crosstab.py", "analysis/session.py"]),
+}
+
+
+for consumer, (source, modules) in CONSUMERS.items():
+
+    @pytask.task(id=consumer)
+    def task_fingerprint_columns(
+        depends_on={
+            "data": source,
+            "cache": SURVEY_CACHE / "survey_data.json",
+            "data_info": SRC / "data_management" / "data_info.yaml",
+            "package": sorted(SRC.rglob("*.py")),
+        },
+        consumer=consumer,
+        modules=modules,
+        produces=FINGERPRINTS / f"{consumer}.json",
+    ):
+        """Fingerprint the survey columns and the code read by a consumer.
+
+        The task runs again after any edit of the package, but the file is only
+        rewritten when the fingerprint changed, so the tasks depending on it are
+        skipped when other columns of the survey or other modules were edited.
+
+        """
+        code = imported_modules([SRC / module for module in modules])
+        code = [depends_on["data_info"], *code]
+        write_fingerprint(produces, depends_on["data"], columns_for(consumer), code)
@@ -1,64 +1,52 @@
-import pandas as pd
-import plotly.express as px
+from climate_shocks.analysis.session import SESSION
+from climate_shocks.data_management.schema import columns_for
+from climate_shocks.final.assets import save_asset
+from climate_shocks.final.export import ExportJob, export_figures
+from climate_shocks.final.figures import finish
+from climate_shocks.final.histograms import histogram_table, histogram_traces, rug_traces
+from climate_shocks.instrumentation import instrument
 
-def analyze_gea_scores(csv_file):
+@instrument('render')
+def analyze_gea_scores(csv_file, save_paths=('bld/Fig03.png', 'bld/Fig3.png'), asset_path=None):
     """
     Analyzing General Environmental Attitude (GEA) scores and visualizing the results.
 
     Args:
         csv_file (str): Path to the CSV file containing GEA score data.
+        save_paths (tuple): Paths to save the histogram and the bar chart.
+        asset_path (str, optional): Path to save the bar chart for the paper, see save_asset.
 
     Returns:
         None
 
     This function performs the following steps:
-    1. Importing the GEA score data from the input CSV file.
-    2. Reversing the utilization items across different scales.
-    3. Calculating the overall GEA score.
-    4. Visualizing the GEA score distribution by country using a histogram.
+    1. Importing the GEA score data from the input CSV file through the survey session.
+    2. Scoring the GEA scale declared in data_info.yaml, which reverses the utilization items.
+       The scores are memoized by the session.
+    3. Averaging the items into the overall GEA score.
+    4. Visualizing the GEA score distribution by country using a histogram binned with NumPy.
     5. Categorizing individuals as pro-environmentalists or not based on a cutoff score of 4.
     6. Visualizing the distribution of pro-environmentalists by country using a grouped bar chart.
     """
+    import plotly.express as px
     
-    data = pd.read_csv(csv_file, header=0)
+    data = SESSION.load_columns(csv_file, columns_for('gea'))
 
     
-    data['EAI_7r'] = 8 - data['EAI_7']
-    data['EAI_8r'] = 8 - data['EAI_8']
-    data['EAI_9r'] = 8 - data['EAI_9']
-    data['EAI_10r'] = 8 - data['EAI_10']
-    data['EAI_13r'] = 8 - data['EAI_13']
-    data['EAI_14r'] = 8 - data['EAI_14']
-    data['EAI_17r'] = 8 - data['EAI_17']
-    data['EAI_18r'] = 8 - data['EAI_18']
-    data['EAI_19r'] = 8 - data['EAI_19']
-    data['EAI_20r'] = 8 - data['EAI_20']
+    data['score'] = SESSION.load_gea_scores(csv_file)
 
     
-    data['score'] = (data['EAI_1'] + data['EAI_2'] + data['EAI_3'] + data['EAI_4'] + data['EAI_5'] +
-                     data['EAI_6'] + data['EAI_7r'] + data['EAI_8r'] + data['EAI_9r'] + data['EAI_10r'] +
-                     data['EAI_11'] * data['EAI_12'] + data['EAI_13r'] + data['EAI_14r'] + data['EAI_15'] +
-                     data['EAI_16'] + data['EAI_17r'] + data['EAI_18r'] + data['EAI_19r'] + data['EAI_20r'] +
-                     data['EAI_21'] + data['EAI_22'] + data['EAI_23'] + data['EAI_24']) / 24
-
-    
-    fig = px.histogram(data, x='score', color='Country_of_Residence',
-                       marginal='rug', histnorm='percent', barmode='overlay',
-                       opacity=0.7, nbins=20, title='GEA score by Country')
-    fig.update_layout(xaxis_title='GEA Score', yaxis_title='Frequency (%)')
+    histogram = plot_score_histogram(data)
 
      
-    fig.show()
-
-    
-    fig.write_image("bld/Fig03.png")
+    finish(histogram)
 
     
     
     data['pro_environmentalist'] = data['score'].apply(lambda x: 'Pro' if x > 4 else 'Not Pro')
 
     
-    pro_env_data = data.groupby(['Country_of_Residence', 'pro_environmentalist']).size().unstack()
+    pro_env_data = data.groupby(['Country_of_Residence', 'pro_environmentalist'], observed=True).size().unstack()
     pro_env_data.reset_index(inplace=True)
     fig = px.bar(pro_env_data, x='Country_of_Residence', y=['Not Pro', 'Pro'],
                  barmode='group', title='Pro-environmentalist by Country',
@@ -66,10 +54,49 @@ def analyze_gea_scores(csv_file):
     fig.update_layout(xaxis_title='Country', yaxis_title='Count')
 
      
-    fig.show()
+    finish(fig)
 
     
-    fig.write_image("bld/Fig3.png")
+    histogram_path, bar_chart_path = save_paths
+    export_figures([ExportJob(histogram, histogram_path), ExportJob(fig, bar_chart_path)])
+    if asset_path:
+        save_asset(fig, asset_path)
+
+
+def plot_score_histogram(data, nbins=20):
+    """
+    Plotting the GEA score distribution by country as an overlaid histogram with a rug.
+
+    The bins and the rug marks are computed with NumPy, so the figure holds one bar per country and bin and
+    at most RUG_POINTS rug marks per country instead of the scores of all respondents.
+
+    Args:
+        data (pandas.DataFrame): DataFrame with the 'score' and 'Country_of_Residence' columns.
+        nbins (int): Number of bins.
+
+    Returns:
+        plotly.graph_objs.Figure: The histogram, with the rug above it.
+    """
+    import plotly.express as px
+    from plotly.subplots import make_subplots
+
+    table = histogram_table(data, 'score', 'Country_of_Residence', bins=nbins)
+    countries = list(table['Country_of_Residence'].unique())
+    palette = px.colors.qualitative.Plotly
+    colors = {country: palette[i % len(palette)] for i, country in enumerate(countries)}
+
+    histogram = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.26, 0.74], vertical_spacing=0.02)
+    for trace in rug_traces(data, 'score', 'Country_of_Residence', countries, colors):
+        histogram.add_trace(trace, row=1, col=1)
+    for trace in histogram_traces(table, 'Country_of_Residence', colors=colors, opacity=0.7):
+        histogram.add_trace(trace, row=2, col=1)
+    histogram.update_yaxes(showticklabels=False, showgrid=False, range=[0, len(countries)], row=1, col=1)
+    histogram.update_layout(barmode='overlay', bargap=0, title='GEA score by Country',
+                            legend_title_text='Country_of_Residence')
+    histogram.update_xaxes(title_text='GEA Score', row=2, col=1)
+    histogram.update_yaxes(title_text='Frequency (%)', row=2, col=1)
+    return histogram
 
 
-analyze_gea_scores("bld/clean_filtered_data.csv")
+if __name__ == "__main__":
+    analyze_gea_scores("bld/clean_filtered_data.csv")
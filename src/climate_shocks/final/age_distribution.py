@@ -1,41 +1,43 @@
-import pandas as pd
-import plotly.express as px
-import os
+from climate_shocks.analysis.session import SESSION
+from climate_shocks.data_management.schema import columns_for
+from climate_shocks.final.export import ExportJob, export_figures
+from climate_shocks.final.histograms import histogram_table, histogram_traces
+from climate_shocks.instrumentation import instrument
 
-def visualize_age_distribution(save_path="bld/age_distribution.png"):
+@instrument('render')
+def visualize_age_distribution(file_path="bld/survey_data.csv", save_path="bld/age_distribution.png"):
     """
     Loading survey data from a CSV file, map numerical values to labels,
     and create a histogram to visualize the distribution of ages based
     on whether participants live in a place where natural resources are
-    extracted.
+    extracted. The histogram is binned with NumPy before plotting.
     
     Args:
+        file_path (str): Path to the CSV file.
         save_path (str): Path to save the figure image.
     
     Returns:
         None
     """
-    df = pd.read_csv("bld/survey_data.csv")
+    import plotly.graph_objects as go
+
+    df = SESSION.load_columns(file_path, columns_for("age_distribution"))
     df['CS_Extraction'] = df['CS_Extraction'].map({1: 'Yes', 2: 'No'})
 
-    fig = px.histogram(df, x='Age', color='CS_Extraction', 
-                       barmode='group', 
-                       title='Distribution of Age by Living in a place where natural resources are extracted',
-                       labels={'Age': 'Age', 'count': 'Count'},
-                       template='plotly_dark',  
-                       opacity=0.7,  
-                       histnorm='percent',  
-                       category_orders={'CS_Extraction': ['Yes', 'No']},  
-                       color_discrete_map={'Yes': '#1f77b4', 'No': '#ff7f0e'}  
-                      )
+    # The ages are binned with NumPy, so the figure holds one bar per bin and group instead of every age
+    table = histogram_table(df, 'Age', 'CS_Extraction', bins='auto')
+    order = {'Yes': 0, 'No': 1}
+    table = table.sort_values('CS_Extraction', key=lambda labels: labels.map(order), kind='stable')
+    fig = go.Figure(histogram_traces(table, 'CS_Extraction', colors={'Yes': '#1f77b4', 'No': '#ff7f0e'}, opacity=0.7))
+    fig.update_layout(barmode='group', bargap=0,
+                      title='Distribution of Age by Living in a place where natural resources are extracted',
+                      legend_title_text='CS_Extraction',
+                      template='plotly_dark')
     fig.update_xaxes(title_text='Age')
     fig.update_yaxes(title_text='Percentage of Participants')
-    
-    
-    os.makedirs(os.path.dirname(save_path), exist_ok=True)
-    
-   
-    fig.write_image(save_path)
+
+    export_figures([ExportJob(fig, save_path)])
 
 
-visualize_age_distribution()
+if __name__ == "__main__":
+    visualize_age_distribution()
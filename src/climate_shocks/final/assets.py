@@ -0,0 +1,152 @@
+"""Figure assets of the paper in formats that LaTeX includes without conversion.
+
+The figures in ``bld`` are PNGs at whatever resolution the plotting library chose. For
+the paper, the figure tasks also write every figure in ``PAPER_FIGURES`` as a vector
+PDF, which stays sharp at any size and is small for the bar charts and the heatmap of
+the paper.
+
+Assets are rendered deterministically and only written when their content changed.
+Plotly assets are exported again only when the figure changed, which is recorded in a
+source file next to the asset, see ``asset_source``. ``write_manifest`` records the
+content hash of every asset, and the LaTeX task depends on the manifest, so latexmk
+only runs when a figure in the paper changed.
+
+"""
+import hashlib
+import io
+import json
+from pathlib import Path
+
+from climate_shocks.config import PAPER_ASSETS
+from climate_shocks.data_management.survey_cache import file_digest
+from climate_shocks.final.export import ExportJob, export_figures
+
+PAPER_FIGURES = {
+    "Fig1": "pdf",
+    "Fig2": "pdf",
+    "Fig3": "pdf",
+    "Fig4": "pdf",
+    "Fig5": "pdf",
+}
+
+ASSET_FORMATS = ["pdf", "svg"]
+
+_METADATA = {"pdf": {"CreationDate": None}, "svg": {"Date": None}}
+
+
+def paper_asset(name, assets_dir=PAPER_ASSETS):
+    """Find the path of the asset of a figure of the paper.
+
+    Args:
+        name (str): Name of the figure in ``PAPER_FIGURES``.
+        assets_dir (str or pathlib.Path): Directory holding the assets.
+
+    Returns:
+        pathlib.Path: The path, with the suffix of the format of the figure.
+
+    """
+    return Path(assets_dir) / f"{name}.{PAPER_FIGURES[name]}"
+
+
+def save_asset(fig, path, **kwargs):
+    """Write a figure as an asset of the paper if its content changed.
+
+    Args:
+        fig (matplotlib.figure.Figure or plotly.graph_objects.Figure): The figure.
+        path (str or pathlib.Path): Path to the asset. The suffix sets the format.
+        **kwargs: Passed on to ``savefig`` of matplotlib figures.
+
+    Returns:
+        bool: Whether the file was written. An unchanged asset is left alone.
+
+    Raises:
+        ValueError: If the format is not supported.
+
+    """
+    path = Path(path)
+    format_ = path.suffix.lstrip(".").lower()
+    if format_ not in ASSET_FORMATS:
+        info = f"Cannot write the asset {path} with the format {format_!r}."
+        raise ValueError(info)
+    if not hasattr(fig, "savefig"):
+        return _save_plotly_asset(fig, path, format_)
+
+    import matplotlib
+
+    buffer = io.BytesIO()
+    kwargs = {"bbox_inches": "tight", **kwargs}
+    with matplotlib.rc_context({"svg.hashsalt": "climate_shocks"}):
+        fig.savefig(buffer, format=format_, metadata=_METADATA[format_], **kwargs)
+    return write_if_changed(path, buffer.getvalue())
+
+
+def asset_source(path):
+    """Find the path of the source file of a plotly asset.
+
+    The source file holds the digest of the figure the asset was exported from, and
+    tasks writing plotly assets declare it as a product next to the asset.
+
+    Args:
+        path (str or pathlib.Path): Path to the asset.
+
+    Returns:
+        pathlib.Path: The path of the source file.
+
+    """
+    path = Path(path)
+    return path.with_name(path.name + ".source")
+
+
+def write_if_changed(path, content):
+    """Write bytes to a file unless it already holds them.
+
+    Args:
+        path (str or pathlib.Path): Path to the file.
+        content (bytes): The content.
+
+    Returns:
+        bool: Whether the file was written.
+
+    """
+    path = Path(path)
+    if path.exists() and path.read_bytes() == content:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return True
+
+
+def write_manifest(assets, path):
+    """Write the content hashes of the assets to a JSON file if they changed.
+
+    Args:
+        assets (list): Paths to the assets.
+        path (str or pathlib.Path): Path to the manifest.
+
+    Returns:
+        bool: Whether the file was written. An unchanged manifest is left alone, so
+            the document is not compiled again.
+
+    """
+    manifest = {Path(asset).name: file_digest(asset) for asset in assets}
+    text = json.dumps(manifest, indent=2, sort_keys=True) + "\n"
+    return write_if_changed(path, text.encode())
+
+
+def _save_plotly_asset(figure, path, format_):
+    """Export a plotly figure unless the asset was rendered from the same figure.
+
+    Kaleido stamps PDFs with the time they were rendered, so the content of the
+    asset changes with every export. Instead, the digest of the figure description
+    is kept in the source file of the asset and the figure is only exported when it
+    changed.
+
+    """
+    text = json.dumps([figure.to_json(), format_])
+    digest = hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+    source = asset_source(path)
+    if path.exists() and source.exists() and source.read_text() == digest:
+        return False
+    export_figures([ExportJob(figure, path, format_)])
+    source.write_text(digest)
+    return True
@@ -0,0 +1,135 @@
+"""Batch export of plotly figures.
+
+Writing a static image with ``fig.write_image`` starts a Kaleido renderer (a headless
+Chromium) for every call, which dominates the time to build the figures. The figure
+modules instead hand ``ExportJob``s to ``export_figures``. It keeps a Kaleido server
+with several renderer tabs warm for the rest of the process and renders a batch of
+jobs concurrently. HTML and JSON exports do not need a renderer and are written
+directly.
+
+"""
+import collections
+import os
+from pathlib import Path
+
+from climate_shocks.instrumentation import instrument
+
+ExportJob = collections.namedtuple(
+    "ExportJob", ["figure", "path", "format", "scale"], defaults=[None, None]
+)
+
+IMAGE_FORMATS = ["png", "jpg", "jpeg", "webp", "svg", "pdf"]
+TEXT_FORMATS = ["html", "json"]
+
+N_RENDERERS = min(4, os.cpu_count() or 1)
+
+
+def start_renderers(n_renderers=N_RENDERERS):
+    """Start the warm Kaleido server used by ``export_figures``.
+
+    The server stays up until ``stop_renderers`` is called or the process exits.
+    Starting it again has no effect. With Kaleido versions before 1.0, plotly already
+    keeps one renderer process alive, and nothing is started.
+
+    Args:
+        n_renderers (int): Number of figures rendered concurrently.
+
+    Returns:
+        bool: Whether a Kaleido server is running.
+
+    """
+    kaleido = _kaleido()
+    if not hasattr(kaleido, "start_sync_server"):
+        return False
+    kaleido.start_sync_server(n=n_renderers, silence_warnings=True)
+    return True
+
+
+def stop_renderers():
+    """Stop the warm Kaleido server, if it is running."""
+    try:
+        import kaleido
+    except ImportError:
+        return
+    if hasattr(kaleido, "stop_sync_server"):
+        kaleido.stop_sync_server(silence_warnings=True)
+
+
+@instrument("export")
+def export_figures(jobs, n_renderers=N_RENDERERS):
+    """Write a batch of plotly figures and return when all of them are written.
+
+    Args:
+        jobs (list): ``ExportJob``s with the figure, the path, and optionally the
+            format and the scale. The format defaults to the suffix of the path.
+        n_renderers (int): Number of figures rendered concurrently.
+
+    Returns:
+        list: The paths of the written files, in the order of the jobs.
+
+    Raises:
+        ValueError: If the format of a job is not supported.
+        RuntimeError: If a figure could not be rendered.
+
+    """
+    jobs = [_resolve(job) for job in jobs]
+    for job in jobs:
+        job.path.parent.mkdir(parents=True, exist_ok=True)
+
+    images = []
+    for job in jobs:
+        if job.format == "html":
+            job.figure.write_html(job.path)
+        elif job.format == "json":
+            job.figure.write_json(job.path)
+        else:
+            images.append(job)
+
+    if images and start_renderers(n_renderers):
+        errors = _kaleido().write_fig_from_object_sync([_spec(job) for job in images])
+        if errors:
+            info = f"{len(errors)} of {len(images)} figures could not be rendered."
+            raise RuntimeError(info) from errors[0]
+    else:
+        for job in images:
+            job.figure.write_image(job.path, format=job.format, scale=job.scale)
+    return [job.path for job in jobs]
+
+
+def _resolve(job):
+    """Fill in the format of a job and check that it is supported."""
+    job = ExportJob(*job)
+    path = Path(job.path)
+    format_ = (job.format or path.suffix.lstrip(".")).lower()
+    if format_ not in IMAGE_FORMATS + TEXT_FORMATS:
+        info = f"Cannot export {path} with the format {format_!r}."
+        raise ValueError(info)
+    return job._replace(path=path, format=format_)
+
+
+def _spec(job):
+    """Describe an image job as expected by Kaleido."""
+    import plotly.io as pio
+
+    figure = job.figure.to_dict()
+    layout = figure.get("layout", {})
+    return {
+        "fig": figure,
+        "path": job.path,
+        "opts": {
+            "format": job.format,
+            "width": layout.get("width") or pio.defaults.default_width,
+            "height": layout.get("height") or pio.defaults.default_height,
+            "scale": job.scale or pio.defaults.default_scale,
+        },
+    }
+
+
+def _kaleido():
+    """Import Kaleido, which is only needed to render static images."""
+    try:
+        import kaleido
+    except ImportError as error:
+        info = "Exporting static images requires the kaleido package."
+        raise RuntimeError(info) from error
+    return kaleido
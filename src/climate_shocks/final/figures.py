@@ -0,0 +1,85 @@
+"""Headless or interactive rendering of the figures.
+
+In headless mode, which is the default, matplotlib figures are standalone ``Figure``
+objects that never enter pyplot's global figure registry. They are drawn by the Agg
+canvas when saved, nothing is shown, and they are freed like any other object, so
+figure functions can run concurrently in threads or processes, for example under
+``pytask -n auto``. Set the environment variable ``CLIMATE_SHOCKS_HEADLESS=0`` to show
+the figures while working interactively.
+
+Interactive figures are created through pyplot under a fixed name, so a figure
+function that runs again, for example after an error, reuses its figure instead of
+allocating a new one.
+
+"""
+from climate_shocks import config
+
+_GRID_KEYWORDS = [
+    "nrows",
+    "ncols",
+    "sharex",
+    "sharey",
+    "squeeze",
+    "width_ratios",
+    "height_ratios",
+    "subplot_kw",
+    "gridspec_kw",
+]
+
+
+def pyplot():
+    """Import matplotlib's pyplot, with the Agg backend in headless mode.
+
+    Returns:
+        module: ``matplotlib.pyplot``.
+
+    """
+    import matplotlib
+
+    if config.HEADLESS:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    return plt
+
+
+def subplots(name, **kwargs):
+    """Create the matplotlib figure called ``name`` with a grid of axes.
+
+    In headless mode the figure is a new standalone ``Figure``. Otherwise, the pyplot
+    figure called ``name`` is created, or cleared and reused.
+
+    Args:
+        name (str): Name of the figure.
+        **kwargs: Passed on to ``matplotlib.pyplot.subplots``.
+
+    Returns:
+        tuple: The figure and its axes.
+
+    """
+    if not config.HEADLESS:
+        return pyplot().subplots(num=name, clear=True, **kwargs)
+
+    from matplotlib.figure import Figure
+
+    grid = {key: kwargs.pop(key) for key in _GRID_KEYWORDS if key in kwargs}
+    fig = Figure(**kwargs)
+    fig.set_label(name)
+    return fig, fig.subplots(**grid)
+
+
+def finish(fig):
+    """Show a figure unless in headless mode, and close it if it is a pyplot figure.
+
+    Args:
+        fig (matplotlib.figure.Figure or plotly.graph_objects.Figure): The figure.
+
+    """
+    is_matplotlib = hasattr(fig, "savefig")
+    if not config.HEADLESS:
+        if is_matplotlib:
+            pyplot().show()
+        else:
+            fig.show()
+    if is_matplotlib and fig.canvas.manager is not None:
+        pyplot().close(fig)
@@ -0,0 +1,173 @@
+"""Histograms and ECDFs binned with NumPy for the plotly distribution charts.
+
+``px.histogram`` embeds the value of every respondent in the figure, and a rug adds one
+mark per respondent, so the size of the figure JSON, the export time and the HTML
+output grow with the sample. The helpers here reduce a column to the counts of its
+bins and to a downsampled ECDF before plotting. The figures only hold bar traces with
+one bar per bin, group and rug mark, which keeps them at a few KB for any sample size.
+
+"""
+import numpy as np
+import pandas as pd
+
+RUG_POINTS = 100
+
+
+def histogram_table(data, column, group, bins=20, value_range=None):
+    """Count the values of a column in shared bins within every group.
+
+    The bins are the same for all groups, like those of ``px.histogram``. All values
+    are binned in one pass.
+
+    Args:
+        data (pandas.DataFrame): The data with the column and the group labels.
+        column (str): The numeric column.
+        group (str): The column with the group labels. Rows with a missing label or
+            value are left out.
+        bins (int or str): Number of bins or a rule of ``numpy.histogram_bin_edges``.
+        value_range (tuple, optional): Lower and upper edge of the bins. Defaults to
+            the range of the values.
+
+    Returns:
+        pandas.DataFrame: One row per group and bin, with the group, the left and
+            right edge, the center and the width of the bin, the count and the
+            percent of the group. The groups are in the order they appear in, like
+            the colors of plotly express.
+
+    """
+    values = pd.to_numeric(data[column], errors="coerce").to_numpy(
+        dtype=np.float64, na_value=np.nan
+    )
+    labels = data[group].astype(object)
+    observed = ~np.isnan(values) & labels.notna().to_numpy()
+    values = values[observed]
+    codes, groups = pd.factorize(labels[observed], sort=False)
+
+    edges = np.histogram_bin_edges(values, bins=bins, range=value_range)
+    n_bins = len(edges) - 1
+    inside = (values >= edges[0]) & (values <= edges[-1])
+    positions = np.searchsorted(edges, values[inside], side="right") - 1
+    positions = np.minimum(positions, n_bins - 1)
+    counts = np.bincount(
+        codes[inside] * n_bins + positions, minlength=len(groups) * n_bins
+    ).reshape(len(groups), n_bins)
+    totals = np.bincount(codes, minlength=len(groups))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        percent = 100 * counts / totals[:, None]
+
+    return pd.DataFrame(
+        {
+            group: np.repeat(np.asarray(groups, dtype=object), n_bins),
+            "left": np.tile(edges[:-1], len(groups)),
+            "right": np.tile(edges[1:], len(groups)),
+            "center": np.tile((edges[:-1] + edges[1:]) / 2, len(groups)),
+            "width": np.tile(np.diff(edges), len(groups)),
+            "count": counts.ravel(),
+            "percent": percent.ravel(),
+        }
+    )
+
+
+def ecdf(values, max_points=RUG_POINTS):
+    """Compute the empirical distribution function of values at few points.
+
+    Args:
+        values (array-like): The values. Missing values are left out.
+        max_points (int): Largest number of points. With more distinct values, the
+            points are the quantiles at evenly spaced shares, so they are denser
+            where the values are.
+
+    Returns:
+        pandas.DataFrame: The distinct ``value``s in ascending order and the
+            ``share`` of the values at or below them.
+
+    """
+    values = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(
+        dtype=np.float64, na_value=np.nan
+    )
+    values = np.sort(values[~np.isnan(values)])
+    points = np.unique(values)
+    if len(points) > max_points:
+        shares = np.linspace(0, 1, max_points)
+        points = np.unique(np.quantile(values, shares, method="inverted_cdf"))
+    share = np.searchsorted(values, points, side="right") / max(len(values), 1)
+    return pd.DataFrame({"value": points, "share": share})
+
+
+def histogram_traces(table, group, y="percent", colors=None, **kwargs):
+    """Turn a histogram table into one plotly bar trace per group.
+
+    Args:
+        table (pandas.DataFrame): The table, see ``histogram_table``.
+        group (str): The column with the group labels.
+        y (str): The column with the bar heights, ``"percent"`` or ``"count"``.
+        colors (dict, optional): Group labels mapped to colors. Defaults to the
+            colors of plotly express in the order of the groups.
+        **kwargs: Passed on to ``plotly.graph_objects.Bar``.
+
+    Returns:
+        list: The ``plotly.graph_objects.Bar`` traces in the order of the groups. The
+            bars fill the bins with ``bargap=0`` in the layout.
+
+    """
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    palette = px.colors.qualitative.Plotly
+    traces = []
+    for i, (label, bins) in enumerate(table.groupby(group, sort=False)):
+        color = palette[i % len(palette)] if colors is None else colors[label]
+        traces.append(
+            go.Bar(
+                x=bins["center"].to_numpy(),
+                y=bins[y].to_numpy(),
+                name=str(label),
+                legendgroup=str(label),
+                marker_color=color,
+                **kwargs,
+            )
+        )
+    return traces
+
+
+def rug_traces(data, column, group, groups, colors, max_points=RUG_POINTS):
+    """Draw a rug of the downsampled ECDF points of every group as thin bars.
+
+    Every group gets a row of marks at the points of its ``ecdf``, so the rug shows
+    where the values are with at most ``max_points`` marks per group.
+
+    Args:
+        data (pandas.DataFrame): The data with the column and the group labels.
+        column (str): The numeric column.
+        group (str): The column with the group labels.
+        groups (list): The groups, from top to bottom.
+        colors (dict): Group labels mapped to colors.
+        max_points (int): Largest number of marks per group.
+
+    Returns:
+        list: The ``plotly.graph_objects.Bar`` traces, one per group, with the rows
+            of the marks between ``len(groups) - i - 1`` and ``len(groups) - i``.
+
+    """
+    import plotly.graph_objects as go
+
+    values = pd.to_numeric(data[column], errors="coerce")
+    span = np.nanmax(values) - np.nanmin(values) if values.notna().any() else 1.0
+    span = span or 1.0
+    traces = []
+    for i, label in enumerate(groups):
+        points = ecdf(values[data[group] == label], max_points)["value"].to_numpy()
+        traces.append(
+            go.Bar(
+                x=points,
+                y=np.full(len(points), 0.8),
+                base=len(groups) - i - 0.9,
+                width=span / 400,
+                name=str(label),
+                legendgroup=str(label),
+                marker_color=colors[label],
+                showlegend=False,
+                hovertemplate=f"{label}<br>%{{x}}<extra></extra>",
+            )
+        )
+    return traces
@@ -1,10 +1,8 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 import os
-import plotly.express as px
-from scipy.stats import ttest_ind
-import seaborn as sns
-from matplotlib.ticker import FixedLocator
+from climate_shocks.analysis.ratings_cube import aggregate_ratings, cube_t_test, ratings_cube
+from climate_shocks.final.export import ExportJob, export_figures
+from climate_shocks.final.figures import finish, subplots
 
 def load_data(file_path):
     """
@@ -78,7 +76,7 @@ def plot_ratio_bar_chart(dataframe, save_path=None):
     Plotting a horizontal bar chart showing the ratio of participants who experienced climate-related shocks or extreme weather events.
 
     """
-    fig, ax = plt.subplots(figsize=(10, 6))
+    fig, ax = subplots('Fig5', figsize=(10, 6))
     fig.set_facecolor('white')
     dataframe.set_index('Country_of_Residence')[['Ratio_Yes', 'Ratio_No']].plot(kind='barh', stacked=True, ax=ax, color=['green', 'lightcoral'])
     ax.set_title('Ratio of Participants who Experienced Climate-Related Shocks or Extreme Weather Events')
@@ -92,12 +90,12 @@ def plot_ratio_bar_chart(dataframe, save_path=None):
             ax.text(ratio_yes + ratio_no / 2, idx, f'{ratio_no:.2%}', ha='center', va='center', color='white', fontweight='bold')
 
     ax.grid(False)
-    plt.legend(['Yes', 'No'])
+    ax.legend(['Yes', 'No'])
 
     if save_path:
-        plt.savefig(save_path, bbox_inches='tight', dpi=300)
+        fig.savefig(save_path, bbox_inches='tight', dpi=300)
         
-    plt.show()
+    finish(fig)
 
 def read_and_process_data():
     """
@@ -122,28 +120,17 @@ def calculate_average_ratings(df):
     """
     Calculates average ratings for different categories among persons A, B, and C.
 
+    The rating columns are reshaped once into the ratings cube and the averages are
+    aggregated per person, risk and category in survey order.
+
     Args:
     df (pandas.DataFrame): Processed DataFrame containing survey data.
 
     Returns:
     pandas.DataFrame: DataFrame containing average ratings for each category, person, and risk level.
     """
-    
-    persons = ['A', 'B', 'C']
-
-    average_data_combined = pd.DataFrame()
-
-    categories_order = ['sustainability', 'moral', 'I would', 'Others would', 'People should']
-
-    for person in persons:
-        for risk in ['Low', 'High']:
-            for category in categories_order:
-                col_name = f'JB_{risk.lower()}_{person}_{category}'
-                average_value = df[col_name].mean()
-                person_data = pd.DataFrame({'Person': [person], 'Category': [category], 'Risk': [risk], 'Average Rating': [average_value]})
-                average_data_combined = pd.concat([average_data_combined, person_data])
-
-    return average_data_combined
+    average_ratings = aggregate_ratings(ratings_cube(df))['mean'].rename('Average Rating').reset_index()
+    return average_ratings[['Person', 'Category', 'Risk', 'Average Rating']]
 
 def create_and_show_chart(average_data_combined, categories_order):
     """
@@ -153,6 +140,7 @@ def create_and_show_chart(average_data_combined, categories_order):
     average_data_combined (pandas.DataFrame): DataFrame containing average ratings for each category, person, and risk level.
     categories_order (list): Order of categories for the chart.
     """
+    import plotly.express as px
 
     fig_combined = px.bar(average_data_combined, x='Category', y='Average Rating', color='Person', facet_col='Risk',
                           title='Comparison of Ratings Among Persons A, B, and C for Low and High Climate Risk',
@@ -165,7 +153,7 @@ def create_and_show_chart(average_data_combined, categories_order):
     fig_combined.update_xaxes(ticktext=['Sustainability', 'Moral', 'I would', 'Others would', 'People should'])
 
 
-    fig_combined.show()
+    finish(fig_combined)
     
     return fig_combined
 
@@ -176,7 +164,7 @@ def save_chart_as_image(fig_combined, save_path):
     Args:
     fig_combined (plotly.graph_objs.Figure): Plotly figure object representing the combined chart.
     """
-    fig_combined.write_image(save_path)
+    export_figures([ExportJob(fig_combined, save_path)])
 
 def visualize_p_values_heatmap(dataframe, save_path=None):
     """
@@ -186,41 +174,18 @@ def visualize_p_values_heatmap(dataframe, save_path=None):
     dataframe (pandas.DataFrame): DataFrame containing t-test results.
     save_path (str, optional): Path to save the plot image. 
     """
+    import seaborn as sns
+
     heatmap_data = dataframe.pivot(index='Person', columns='Category', values='P-Value')
 
-    plt.figure(figsize=(12, 8))
-    sns.heatmap(heatmap_data, annot=True, cmap='Greens', linewidths=.5, fmt=".3f")
-    plt.title('P-Values Heatmap for T-Tests (Low vs. High Risk)')
+    fig, ax = subplots('Fig2', figsize=(12, 8))
+    sns.heatmap(heatmap_data, annot=True, cmap='Greens', linewidths=.5, fmt=".3f", ax=ax)
+    ax.set_title('P-Values Heatmap for T-Tests (Low vs. High Risk)')
 
     if save_path:
-        plt.savefig(save_path)
-
-    plt.show()
+        fig.savefig(save_path)
 
-def perform_t_test(dataframe, persons, categories_order):
-    """
-    Performs independent t-tests for low and high risk ratings among different categories and persons.
-
-    Args:
-    dataframe (pandas.DataFrame): DataFrame containing survey data.
-    persons (list): List of persons.
-    categories_order (list): Order of categories.
-
-    Returns:
-    pandas.DataFrame: DataFrame containing t-test results.
-    """
-    t_test_results = []
-
-    for person in persons:
-        for category in categories_order:
-            low_risk_data = dataframe[f'JB_low_{person}_{category}'].dropna()
-            high_risk_data = dataframe[f'JB_high_{person}_{category}'].dropna()
-
-            t_statistic, p_value = ttest_ind(low_risk_data, high_risk_data)
-
-            t_test_results.append({'Person': person, 'Category': category, 'T-Statistic': t_statistic, 'P-Value': p_value})
-
-    return pd.DataFrame(t_test_results)
+    finish(fig)
 
 if __name__ == "__main__":
     
@@ -234,7 +199,7 @@ if __name__ == "__main__":
 
     save_chart_as_image(fig_combined, "bld/Fig1.png")
 
-    t_test_results = perform_t_test(df, ['A', 'B', 'C'], categories_order)
+    t_test_results = cube_t_test(ratings_cube(df), ['A', 'B', 'C'], categories_order)
 
     visualize_p_values_heatmap(t_test_results, save_path="bld/Fig2.png")
 
@@ -248,9 +213,6 @@ if __name__ == "__main__":
 
 import os
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-from matplotlib.ticker import FixedLocator
 
 def load_data(file_path):
     """
@@ -270,7 +232,8 @@ def plot_countplots():
 
     This function generates countplots for each selected column based on the provided DataFrame.
     """
-   
+    import seaborn as sns
+
     file_path = 'bld/survey_data.csv'
 
     df = load_data(file_path)
@@ -288,7 +251,7 @@ def plot_countplots():
         'ClimateCauseProbability': ['a result of natural causes', 'a result of human activities']
     }
 
-    fig, axes = plt.subplots(nrows=2, ncols=2, figsize=(15, 8))
+    fig, axes = subplots('Fig4', nrows=2, ncols=2, figsize=(15, 8))
 
     colors = {'Germany': 'red', 'India': 'green', 'Indonesia': 'blue'}
 
@@ -321,10 +284,10 @@ def plot_countplots():
 
     output_folder = 'bld'
     output_file_path = os.path.join(output_folder, 'Fig4.png')
-    plt.tight_layout(rect=[0, 0, 1, 1])
-    plt.savefig(output_file_path, format='png')
+    fig.tight_layout(rect=[0, 0, 1, 1])
+    fig.savefig(output_file_path, format='png')
 
-    plt.show()
+    finish(fig)
 
 if __name__ == '__main__':
     plot_countplots()
@@ -349,6 +312,7 @@ def analyze_gea_scores(csv_file):
     5. Categorizing individuals as pro-environmentalists or not based on a cutoff score of 4.
     6. Visualizing the distribution of pro-environmentalists by country using a grouped bar chart.
     """
+    import plotly.express as px
 
     data = pd.read_csv(csv_file, header=0)
 
@@ -371,14 +335,12 @@ def analyze_gea_scores(csv_file):
                      data['EAI_16'] + data['EAI_17r'] + data['EAI_18r'] + data['EAI_19r'] + data['EAI_20r'] +
                      data['EAI_21'] + data['EAI_22'] + data['EAI_23'] + data['EAI_24']) / 24
 
-    fig = px.histogram(data, x='score', color='Country_of_Residence',
-                       marginal='rug', histnorm='percent', barmode='overlay',
-                       opacity=0.7, nbins=20, title='GEA score by Country')
-    fig.update_layout(xaxis_title='GEA Score', yaxis_title='Frequency (%)')
+    histogram = px.histogram(data, x='score', color='Country_of_Residence',
+                             marginal='rug', histnorm='percent', barmode='overlay',
+                             opacity=0.7, nbins=20, title='GEA score by Country')
+    histogram.update_layout(xaxis_title='GEA Score', yaxis_title='Frequency (%)')
  
-    fig.show()
-
-    fig.write_image("bld/Fig03.png")
+    finish(histogram)
 
     data['pro_environmentalist'] = data['score'].apply(lambda x: 'Pro' if x > 4 else 'Not Pro')
 
@@ -389,10 +351,11 @@ def analyze_gea_scores(csv_file):
                  labels={'value': 'Count', 'variable': 'Pro-environmentalist'})
     fig.update_layout(xaxis_title='Country', yaxis_title='Count')
  
-    fig.show()
+    finish(fig)
 
-    fig.write_image("bld/Fig3.png")
+    export_figures([ExportJob(histogram, "bld/Fig03.png"), ExportJob(fig, "bld/Fig3.png")])
 
 
-analyze_gea_scores("bld/clean_filtered_data.csv")
+if __name__ == "__main__":
+    analyze_gea_scores("bld/clean_filtered_data.csv")
 
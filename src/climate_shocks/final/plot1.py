@@ -1,23 +1,26 @@
-import os
 import pandas as pd
-import plotly.express as px
-
-def read_and_process_data():
+from climate_shocks.analysis.aggregates import average_ratings, load_aggregates
+from climate_shocks.analysis.ratings_cube import aggregate_ratings, ratings_cube
+from climate_shocks.final.assets import save_asset
+from climate_shocks.final.export import ExportJob, export_figures
+from climate_shocks.data_management.schema import columns_for, read_columns
+from climate_shocks.final.figures import finish
+from climate_shocks.instrumentation import instrument
+
+def read_and_process_data(file_path='bld/survey_data.csv'):
     """
     Reads survey data from a CSV file and processes it.
 
-    1. Specifying the path to the CSV file stored in the bld folder
-    2. Reading the file into a pandas DataFrame
-    3. Replacing column names
+    1. Reading the rating columns of the file with their declared dtypes
+    2. Replacing column names
+
+    Args:
+    file_path (str): Path to the CSV file stored in the bld folder.
 
     Returns:
     pandas.DataFrame: Processed DataFrame containing survey data.
     """
-    
-    file_path = 'bld/survey_data.csv'
-
-    df = pd.read_csv(file_path)
-    df = df.apply(pd.to_numeric, errors='coerce')
+    df = read_columns(file_path, columns_for('plot1'))
 
     df.columns = df.columns.str.replace('I_would', 'I would').str.replace('others_would', 'Others would').str.replace('people_should', 'People should')
 
@@ -27,7 +30,8 @@ def calculate_average_ratings(df):
     """
     Calculates average ratings for different categories among persons A, B, and C.
 
-    We begin with  defining the list of persons, then initializing an empty DataFrame to store average values for both high and low risk, and finally, iterating through persons and calculate average values for both high and low risk
+    The rating columns are reshaped once into the ratings cube and the averages are
+    aggregated per person, risk and category in survey order.
 
     Args:
     df (pandas.DataFrame): Processed DataFrame containing survey data.
@@ -35,26 +39,10 @@ def calculate_average_ratings(df):
     Returns:
     pandas.DataFrame: DataFrame containing average ratings for each category, person, and risk level.
     """
-    
-    persons = ['A', 'B', 'C']
-
-
-    average_data_combined = pd.DataFrame()
-
-
-    categories_order = ['sustainability', 'moral', 'I would', 'Others would', 'People should']
-
-    
-    for person in persons:
-        for risk in ['Low', 'High']:
-            for category in categories_order:
-                col_name = f'JB_{risk.lower()}_{person}_{category}'
-                average_value = df[col_name].mean()
-                person_data = pd.DataFrame({'Person': [person], 'Category': [category], 'Risk': [risk], 'Average Rating': [average_value]})
-                average_data_combined = pd.concat([average_data_combined, person_data])
-
-    return average_data_combined
+    average_ratings = aggregate_ratings(ratings_cube(df))['mean'].rename('Average Rating').reset_index()
+    return average_ratings[['Person', 'Category', 'Risk', 'Average Rating']]
 
+@instrument('render')
 def create_and_show_chart(average_data_combined, categories_order):
     """
     Creates a grouped bar chart for average ratings and displays it.
@@ -66,7 +54,8 @@ def create_and_show_chart(average_data_combined, categories_order):
     Returns:
     plotly.graph_objs.Figure: Plotly figure object representing the combined chart.
     """
-    
+    import plotly.express as px
+
     fig_combined = px.bar(average_data_combined, x='Category', y='Average Rating', color='Person', facet_col='Risk',
                           title='Comparison of Ratings Among Persons A, B, and C for Low and High Climate Risk',
                           category_orders={'Category': categories_order},
@@ -76,7 +65,7 @@ def create_and_show_chart(average_data_combined, categories_order):
     
     fig_combined.update_traces(texttemplate='%{y:.2f}', textposition='outside')
     fig_combined.update_xaxes(ticktext=['Sustainability', 'Moral', 'I would', 'Others would', 'People should'])
-    fig_combined.show()
+    finish(fig_combined)
     
     return fig_combined
 
@@ -100,20 +89,37 @@ if __name__ == "__main__":
 
 '''
 
-def save_chart_as_image():
+def save_chart_as_image(file_path='bld/survey_data.csv', save_path='bld/Fig1.png'):
     """
-    Saves the combined chart as PNG inside the bld folder.
+    Creates the combined chart from the survey data and saves it as PNG.
 
     Args:
-    fig_combined (plotly.graph_objs.Figure): Plotly figure object representing the combined chart.
+    file_path (str): Path to the CSV file stored in the bld folder.
+    save_path (str): Path to save the figure image.
     """
-    df = read_and_process_data()
+    df = read_and_process_data(file_path)
     average_data_combined = calculate_average_ratings(df)
     categories_order = ['sustainability', 'moral', 'I would', 'Others would', 'People should']
     fig_combined = create_and_show_chart(average_data_combined, categories_order)
-    file_path = "bld/Fig1.png"
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-    fig_combined.write_image(file_path)
+    export_figures([ExportJob(fig_combined, save_path)])
+
+def save_chart_from_aggregates(aggregates_path='bld/aggregates.json', save_path='bld/Fig1.png', asset_path=None):
+    """
+    Creates the combined chart from the aggregate cube and saves it as PNG.
+
+    The averages over all respondents are read from the cube, so the survey is not read again.
+
+    Args:
+    aggregates_path (str): Path to the aggregate cube stored in the bld folder.
+    save_path (str): Path to save the figure image.
+    asset_path (str, optional): Path to save the figure for the paper, see save_asset.
+    """
+    average_data_combined = average_ratings(load_aggregates(aggregates_path))
+    categories_order = ['sustainability', 'moral', 'I would', 'Others would', 'People should']
+    fig_combined = create_and_show_chart(average_data_combined, categories_order)
+    export_figures([ExportJob(fig_combined, save_path)])
+    if asset_path:
+        save_asset(fig_combined, asset_path)
 
 if __name__ == "__main__":
     save_chart_as_image()
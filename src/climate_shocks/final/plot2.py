@@ -1,21 +1,25 @@
 import os
 import pandas as pd
-from scipy.stats import ttest_ind
-import seaborn as sns
-import matplotlib.pyplot as plt
+from climate_shocks.analysis.aggregates import load_aggregates, t_tests
+from climate_shocks.analysis.ratings_cube import cube_t_test, ratings_cube
+from climate_shocks.data_management.schema import columns_for, read_columns
+from climate_shocks.final.assets import save_asset
+from climate_shocks.final.figures import finish, subplots
+from climate_shocks.instrumentation import instrument
 
 
-def load_data(file_path):
+def load_data(file_path, columns=None):
     """
     Loads survey data from a CSV file into a pandas DataFrame.
 
     Args:
     file_path (str): The path to the CSV file.
+    columns (list, optional): Columns to load. Defaults to all columns.
 
     Returns:
     pandas.DataFrame: DataFrame containing survey data.
     """
-    return pd.read_csv(file_path).apply(pd.to_numeric, errors='coerce')
+    return read_columns(file_path, columns)
 
 def replace_column_names(dataframe):
     """
@@ -31,67 +35,77 @@ def replace_column_names(dataframe):
                                                 .replace('others_would', 'Others would')
                                                 .replace('people_should', 'People should'))
 
-def visualize_p_values_heatmap(dataframe, save_path=None):
+@instrument('render')
+def visualize_p_values_heatmap(dataframe, save_path=None, asset_path=None):
     """
     Visualizes a heatmap of p-values for t-tests comparing low vs. high risk ratings among different categories and persons.
 
     Args:
     dataframe (pandas.DataFrame): DataFrame containing t-test results.
     save_path (str, optional): Path to save the plot image. 
+    asset_path (str, optional): Path to save the plot for the paper, see save_asset.
     """
+    import seaborn as sns
+
     heatmap_data = dataframe.pivot(index='Person', columns='Category', values='P-Value')
 
-    plt.figure(figsize=(12, 8))
-    sns.heatmap(heatmap_data, annot=True, cmap='Greens', linewidths=.5, fmt=".3f")
-    plt.title('P-Values Heatmap for T-Tests (Low vs. High Risk)')
+    fig, ax = subplots('Fig2', figsize=(12, 8))
+    sns.heatmap(heatmap_data, annot=True, cmap='Greens', linewidths=.5, fmt=".3f", ax=ax)
+    ax.set_title('P-Values Heatmap for T-Tests (Low vs. High Risk)')
 
     
     if save_path:
-        plt.savefig(save_path)
+        fig.savefig(save_path)
+    if asset_path:
+        save_asset(fig, asset_path)
+
+    finish(fig)
 
-    plt.show()
 
-def perform_t_test(dataframe, persons, categories_order):
+def plot_p_values_heatmap(file_path='bld/survey_data.csv', save_path='bld/Fig2.png'):
     """
-    Performs independent t-tests for low and high risk ratings among different categories and persons.
+    Runs the t-tests on the survey data and saves the heatmap of their p-values.
 
     Args:
-    dataframe (pandas.DataFrame): DataFrame containing survey data.
-    persons (list): List of persons.
-    categories_order (list): Order of categories.
+    file_path (str): The path to the CSV file.
+    save_path (str): Path to save the plot image.
 
     Returns:
     pandas.DataFrame: DataFrame containing t-test results.
     """
-    t_test_results = []
-
-    for person in persons:
-        for category in categories_order:
-            low_risk_data = dataframe[f'JB_low_{person}_{category}'].dropna()
-            high_risk_data = dataframe[f'JB_high_{person}_{category}'].dropna()
-
-            t_statistic, p_value = ttest_ind(low_risk_data, high_risk_data)
+    df = load_data(file_path, columns_for('plot2'))
+    df = replace_column_names(df)
 
-            t_test_results.append({'Person': person, 'Category': category, 'T-Statistic': t_statistic, 'P-Value': p_value})
+    persons = ['A', 'B', 'C']
+    categories_order = ['sustainability', 'moral', 'I would', 'Others would', 'People should']
+    t_test_results = cube_t_test(ratings_cube(df), persons, categories_order)
 
-    return pd.DataFrame(t_test_results)
+    visualize_p_values_heatmap(t_test_results, save_path)
+    return t_test_results
 
 
-file_path = 'bld/survey_data.csv'
-df = load_data(file_path)
-df = replace_column_names(df)
+def plot_p_values_from_aggregates(aggregates_path='bld/aggregates.json', save_path='bld/Fig2.png', asset_path=None):
+    """
+    Runs the t-tests on the moments of the aggregate cube and saves the heatmap of their p-values.
 
+    Args:
+    aggregates_path (str): The path to the aggregate cube.
+    save_path (str): Path to save the plot image.
+    asset_path (str, optional): Path to save the plot for the paper.
 
-persons = ['A', 'B', 'C']
-categories_order = ['sustainability', 'moral', 'I would', 'Others would', 'People should']
-t_test_results = perform_t_test(df, persons, categories_order)
+    Returns:
+    pandas.DataFrame: DataFrame containing t-test results.
+    """
+    persons = ['A', 'B', 'C']
+    categories_order = ['sustainability', 'moral', 'I would', 'Others would', 'People should']
+    t_test_results = t_tests(load_aggregates(aggregates_path), persons=persons, categories_order=categories_order)
 
+    visualize_p_values_heatmap(t_test_results, save_path, asset_path)
+    return t_test_results
 
-save_path = 'bld/Fig2.png'  
-visualize_p_values_heatmap(t_test_results, save_path)
 
+if __name__ == "__main__":
+    t_test_results = plot_p_values_heatmap()
 
-print("Dataframe shape after loading:", df.shape)
-print("T-test results:")
-print(t_test_results)
-print("Calling visualization function...")
+    print("T-test results:")
+    print(t_test_results)
@@ -1,54 +1,75 @@
-import os
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-from matplotlib.ticker import FixedLocator
-
-def load_data(file_path):
+from climate_shocks.analysis.aggregates import answer_counts, load_aggregates
+from climate_shocks.analysis.crosstab import contingency_table, crosstab_items
+from climate_shocks.data_management.response_matrix import read_responses
+from climate_shocks.data_management.schema import columns_for, read_columns
+from climate_shocks.final.assets import save_asset
+from climate_shocks.final.figures import finish, subplots
+from climate_shocks.instrumentation import instrument
+
+def load_data(file_path, columns=None, responses=None):
     """
     Loading data from a CSV file into a pandas DataFrame.
 
     Args:
         file_path (str): Path to the CSV file.
+        columns (list, optional): Columns to load. Defaults to all columns.
+        responses (str, optional): Directory of the response matrix built from the file. If given,
+            the climate items are zero-copy views of the memory-mapped matrix. Needs the columns.
 
     Returns:
         pandas.DataFrame: Loaded data from the CSV file.
     """
-    return pd.read_csv(file_path)
+    if responses is not None:
+        return read_responses(file_path, columns, responses)
+    return read_columns(file_path, columns)
 
-def plot_countplots():
-    """
-    Ploting countplots for selected columns.
+SELECTED_COLUMNS = ['ClimateConcern', 'ClimateDamage', 'ClimateCause', 'ClimateCauseProbability']
+COUNTRY_MAPPING = {1: 'Germany', 2: 'India', 3: 'Indonesia'}
 
-    This function generates countplots for each selected column based on the provided DataFrame.
+def count_answers(df):
     """
-   
-    file_path = 'bld/survey_data.csv'
+    Counting the answers to the climate questions by country.
 
-    
-    df = load_data(file_path)
+    All questions are counted at once by the sparse crosstab engine.
 
-    selected_columns = ['ClimateConcern', 'ClimateDamage', 'ClimateCause', 'ClimateCauseProbability', 'Country_of_Residence']
+    Args:
+        df (pandas.DataFrame): DataFrame with the climate questions and the country codes.
 
-    
-    country_mapping = {1: 'Germany', 2: 'India', 3: 'Indonesia'}
-    df_selected = df[selected_columns].copy()
-    df_selected['Country_of_Residence'] = df_selected['Country_of_Residence'].map(country_mapping)
-
-    response_order = {
-        'ClimateConcern': ['not at all worried', 'not very worried', 'somewhat worried', 'very worried'],
-        'ClimateDamage': ['not at all', 'only a little', 'quite a bit', 'a great deal'],
-        'ClimateCause': ['a result of natural causes', 'a result of human activities'],
-        'ClimateCauseProbability': ['a result of natural causes', 'a result of human activities']
+    Returns:
+        dict: For every question, a DataFrame with one row per country and one column per answer code.
+    """
+    crosstab = crosstab_items(df, SELECTED_COLUMNS + ['Country_of_Residence'])
+    return {
+        col: contingency_table(crosstab, 'Country_of_Residence', col, row_labels=COUNTRY_MAPPING)
+        for col in SELECTED_COLUMNS
     }
 
-    
-    fig, axes = plt.subplots(nrows=2, ncols=2, figsize=(15, 8))
+@instrument('render')
+def draw_countplots(counts, save_path='bld/Fig4.png', asset_path=None):
+    """
+    Ploting countplots from the answer counts.
+
+    The bars are drawn from the counts, which have one cell per country and answer, so the
+    time to draw does not depend on the number of respondents.
+
+    Args:
+        counts (dict): The counts by country of every question, see count_answers.
+        save_path (str): Path to save the figure image.
+        asset_path (str, optional): Path to save the figure for the paper, see save_asset.
+    """
+    import seaborn as sns
+
+    fig, axes = subplots('Fig4', nrows=2, ncols=2, figsize=(15, 8))
 
     colors = {'Germany': 'red', 'India': 'green', 'Indonesia': 'blue'}
 
-    for i, col in enumerate(selected_columns[:-1]):
-        sns.countplot(x=col, hue='Country_of_Residence', data=df_selected, ax=axes[i // 2, i % 2], palette=colors)
+    for i, col in enumerate(SELECTED_COLUMNS):
+        table = counts[col].loc[:, counts[col].sum() > 0]
+        data = table.rename_axis(index='Country_of_Residence', columns=col).stack().rename('count').reset_index()
+        sns.barplot(x=col, y='count', hue='Country_of_Residence', data=data, ax=axes[i // 2, i % 2], palette=colors,
+                    order=list(table.columns), hue_order=[country for country in colors if country in table.index],
+                    errorbar=None)
 
         if col == 'ClimateCauseProbability':
             axes[i // 2, i % 2].set_xticks([0, 1])
@@ -75,12 +96,39 @@ def plot_countplots():
             axes[i // 2, i % 2].set_title('How worried are you about climate shocks?')
 
     
-    output_folder = 'bld'
-    output_file_path = os.path.join(output_folder, 'Fig4.png')
-    plt.tight_layout(rect=[0, 0, 1, 1])
-    plt.savefig(output_file_path, format='png')
+    fig.tight_layout(rect=[0, 0, 1, 1])
+    fig.savefig(save_path, format='png')
+    if asset_path:
+        save_asset(fig, asset_path)
+
+    finish(fig)
+
+def plot_countplots(file_path='bld/survey_data.csv', save_path='bld/Fig4.png', responses=None):
+    """
+    Ploting countplots for selected columns.
+
+    This function counts the answers to each selected column by country and draws the countplots from the counts.
+
+    Args:
+        file_path (str): Path to the CSV file.
+        save_path (str): Path to save the figure image.
+        responses (str, optional): Directory of the response matrix built from the file.
+    """
+    df = load_data(file_path, columns_for('plot4'), responses)
+    draw_countplots(count_answers(df), save_path)
 
-    plt.show()
+def plot_countplots_from_aggregates(aggregates_path='bld/aggregates.json', save_path='bld/Fig4.png', asset_path=None):
+    """
+    Ploting countplots from the answer counts in the aggregate cube.
+
+    Args:
+        aggregates_path (str): Path to the aggregate cube stored in the bld folder.
+        save_path (str): Path to save the figure image.
+        asset_path (str, optional): Path to save the figure for the paper.
+    """
+    aggregates = load_aggregates(aggregates_path)
+    counts = {col: answer_counts(aggregates, col) for col in SELECTED_COLUMNS}
+    draw_countplots(counts, save_path, asset_path)
 
 if __name__ == '__main__':
     plot_countplots()
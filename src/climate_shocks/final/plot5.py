@@ -1,18 +1,24 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 import os
+from climate_shocks.analysis.aggregates import answer_ratios, load_aggregates
+from climate_shocks.data_management.schema import columns_for, read_columns
+from climate_shocks.final.assets import save_asset
+from climate_shocks.final.figures import finish, subplots
+from climate_shocks.instrumentation import instrument
 
-def load_data(file_path):
+def load_data(file_path, columns=None):
     """
     Load data from a CSV file into a pandas DataFrame.
 
     Args:
         file_path (str): Path to the CSV file.
+        columns (list, optional): Columns to load. Defaults to the columns used for the ratio chart.
 
     Returns:
         pandas.DataFrame: Loaded data from the CSV file.
     """
-    return pd.read_csv(file_path)
+    columns = columns_for('plot5') if columns is None else columns
+    return read_columns(file_path, columns)
 
 def replace_country_codes(dataframe):
     """
@@ -38,7 +44,7 @@ def replace_experience_labels(dataframe):
     Returns:
         pandas.DataFrame: DataFrame with numerical values replaced by labels in the 'CS_Experience' column.
     """
-    dataframe['CS_Experience'] = dataframe['CS_Experience'].replace({1: 'Yes', 2: 'No'})
+    dataframe['CS_Experience'] = dataframe['CS_Experience'].map({1: 'Yes', 2: 'No'})
     return dataframe
 
 def filter_data(dataframe):
@@ -63,23 +69,44 @@ def calculate_ratios(dataframe):
     Returns:
     pandas.DataFrame: The DataFrame with calculated ratios.
     """
-    counts_by_country = dataframe.groupby(['Country_of_Residence', 'CS_Experience']).size().unstack().reset_index()
+    counts_by_country = dataframe.groupby(['Country_of_Residence', 'CS_Experience'], observed=True).size().unstack().reset_index()
     counts_by_country[counts_by_country.columns[1:]] = counts_by_country[counts_by_country.columns[1:]].apply(pd.to_numeric, errors='coerce')
     counts_by_country['Ratio_Yes'] = counts_by_country['Yes'] / counts_by_country[['Yes', 'No']].sum(axis=1)
     counts_by_country['Ratio_No'] = counts_by_country['No'] / counts_by_country[['Yes', 'No']].sum(axis=1)
     return counts_by_country
 
-def plot_ratio_bar_chart(dataframe, save_path=None):
+def ratios_from_aggregates(aggregates_path):
+    """
+    Reading the ratios of 'Yes' and 'No' answers by country from the aggregate cube.
+
+    Args:
+    aggregates_path (str): Path to the aggregate cube.
+
+    Returns:
+    pandas.DataFrame: The DataFrame with the counts and ratios, like calculate_ratios.
+    """
+    aggregates = load_aggregates(aggregates_path)
+    return answer_ratios(aggregates, 'CS_Experience', labels={1: 'Yes', 2: 'No'}).reset_index()
+
+@instrument('render')
+def plot_ratio_bar_chart(dataframe, save_path=None, asset_path=None):
     """
     Plotting a horizontal bar chart showing the ratio of participants who experienced climate-related shocks or extreme weather events.
 
     Args:
-        dataframe (pandas.DataFrame): DataFrame containing ratios.
+        dataframe (pandas.DataFrame): DataFrame containing ratios, one row per country.
         save_path (str, optional): Path to save the plot as an image file. Defaults to None.
+        asset_path (str, optional): Path to save the plot for the paper, see save_asset. Defaults to None.
     """
-    fig, ax = plt.subplots(figsize=(10, 6))
+    ratios = dataframe.set_index('Country_of_Residence')[['Ratio_Yes', 'Ratio_No']]
+    fig, ax = subplots('Fig5', figsize=(10, 6))
     fig.set_facecolor('white')
-    dataframe.set_index('Country_of_Residence')[['Ratio_Yes', 'Ratio_No']].plot(kind='barh', stacked=True, ax=ax, color=['green', 'lightcoral'])
+    # One stacked bar per country, drawn from the ratios without any counting
+    positions = range(len(ratios))
+    ax.barh(positions, ratios['Ratio_Yes'].fillna(0), height=0.5, color='green')
+    ax.barh(positions, ratios['Ratio_No'].fillna(0), height=0.5, left=ratios['Ratio_Yes'].fillna(0), color='lightcoral')
+    ax.set_yticks(positions, ratios.index)
+    ax.set_ylim(-0.5, len(ratios) - 0.5)
     ax.set_title('Ratio of Participants who Experienced Climate-Related Shocks or Extreme Weather Events')
     ax.set_xlabel('Ratio')
     ax.set_ylabel('Country')
@@ -91,17 +118,19 @@ def plot_ratio_bar_chart(dataframe, save_path=None):
             ax.text(ratio_yes + ratio_no / 2, idx, f'{ratio_no:.2%}', ha='center', va='center', color='white', fontweight='bold')
 
     ax.grid(False)
-    plt.legend(['Yes', 'No'])
+    ax.legend(['Yes', 'No'])
 
     if save_path:
-        plt.savefig(save_path, bbox_inches='tight', dpi=300)
+        fig.savefig(save_path, bbox_inches='tight', dpi=300)
         
         """
         Save the plot as a PNG file.
 
         """
+    if asset_path:
+        save_asset(fig, asset_path)
 
-    plt.show()
+    finish(fig)
 
 if __name__ == "__main__":
 
@@ -2,89 +2,138 @@
 
 import pandas as pd
 import pytask
-from climate_shocks.config import BLD, GROUPS, SRC
-from climate_shocks.final.plot1 import read_and_process_data, calculate_average_ratings, create_and_show_chart, save_chart_as_image
-from climate_shocks.final.plot2 import load_data, replace_column_names, visualize_p_values_heatmap, perform_t_test
+from climate_shocks.config import AGGREGATES, BLD, FINGERPRINTS, PAPER_ASSETS, SRC, SURVEY_DATA
+from climate_shocks.final.assets import PAPER_FIGURES, asset_source, paper_asset, write_manifest
+from climate_shocks.final.plot1 import read_and_process_data, calculate_average_ratings, create_and_show_chart, save_chart_as_image, save_chart_from_aggregates
+from climate_shocks.final.plot2 import load_data, replace_column_names, visualize_p_values_heatmap, plot_p_values_heatmap, plot_p_values_from_aggregates
 from climate_shocks.final.Plot3 import analyze_gea_scores
-from climate_shocks.final.plot4 import load_data, plot_countplots
-from climate_shocks.final.plot5 import load_data, replace_country_codes, replace_experience_labels, filter_data, plot_ratio_bar_chart, calculate_ratios
+from climate_shocks.final.plot4 import load_data, plot_countplots, plot_countplots_from_aggregates
+from climate_shocks.final.age_distribution import visualize_age_distribution
+from climate_shocks.final.plot5 import load_data, replace_country_codes, replace_experience_labels, filter_data, plot_ratio_bar_chart, calculate_ratios, ratios_from_aggregates
 from climate_shocks.utilities import read_yaml
 
-deps = {
-    "data": BLD / "survey_data.csv",
-}
+# The tasks depend on the fingerprints of the survey columns and the code they read,
+# see task_fingerprint_columns, instead of the whole survey file. Fig1, Fig2, Fig4 and
+# Fig5 are drawn from the aggregate cube, see task_build_aggregates. The figures of the
+# paper are also written as assets in PAPER_ASSETS, see climate_shocks.final.assets.
+survey_data = SURVEY_DATA
 
 
 @pytask.task
 def task_plot_results(
-    depends_on=deps,
-    produces=BLD / "Fig1.png",
+    depends_on={"aggregates": AGGREGATES, "fingerprint": FINGERPRINTS / "plot1.json"},
+    produces={"figure": BLD / "Fig1.png", "asset": paper_asset("Fig1"), "source": asset_source(paper_asset("Fig1"))},
 ):
     """Plotting results (Python version).
 
     Args:
-        depends_on (dict): Dependency dictionary containing the path to the data file.
-        produces (str): Path to the produced figure.
+        depends_on (dict): The aggregate cube and the fingerprint of the code read by the task.
+        produces (dict): Paths to the produced figure, its asset for the paper and the source file of the asset.
 
     Returns:
         Plot showing participants' response to different levels of climate shocks.
     """
-    df = read_and_process_data()  
-    average_data = calculate_average_ratings(df)  
-    categories_order = ['sustainability', 'moral', 'I would', 'Others would', 'People should']
+    save_chart_from_aggregates(depends_on["aggregates"], save_path=produces["figure"], asset_path=produces["asset"])
 
-    fig = create_and_show_chart(average_data, categories_order)  
 
+@pytask.task
+def task_plot_p_values_heatmap(
+    depends_on={"aggregates": AGGREGATES, "fingerprint": FINGERPRINTS / "plot2.json"},
+    produces={"figure": BLD / "Fig2.png", "asset": paper_asset("Fig2")},
+):
+    """Plotting the p-values of the t-tests (Python version).
 
-if __name__ == "__main__":
-    
-    for group in GROUPS:
-        task_plot_results(depends_on={**deps, "group": group})
+    Args:
+        depends_on (dict): The aggregate cube and the fingerprint of the code read by the task.
+        produces (dict): Paths to the produced figure and its asset for the paper.
+
+    Returns:
+        Heatmap of the p-values comparing low and high risk ratings.
+    """
+    plot_p_values_from_aggregates(depends_on["aggregates"], save_path=produces["figure"], asset_path=produces["asset"])
+
+
+@pytask.task
+def task_analyze_gea_scores(
+    depends_on=FINGERPRINTS / "gea.json",
+    produces=[BLD / "Fig03.png", BLD / "Fig3.png", paper_asset("Fig3"), asset_source(paper_asset("Fig3"))],
+):
+    """Plotting the GEA scores by country (Python version).
+
+    Args:
+        depends_on (pathlib.Path): Fingerprint of the columns and code read by the task.
+        produces (list): Paths to the produced figures, the asset of the bar chart for the paper and its source file.
+
+    Returns:
+        Plots showing the GEA score distribution and the pro-environmentalists by country.
+    """
+    analyze_gea_scores(BLD / "clean_filtered_data.csv", save_paths=produces[:2], asset_path=produces[2])
+
+
+@pytask.task
+def task_visualize_age_distribution(
+    depends_on=FINGERPRINTS / "age_distribution.json",
+    produces=BLD / "age_distribution.png",
+):
+    """Plotting the age distribution (Python version).
+
+    Args:
+        depends_on (pathlib.Path): Fingerprint of the columns and code read by the task.
+        produces (str): Path to the produced figure.
+
+    Returns:
+        Histogram of the ages by whether natural resources are extracted where participants live.
+    """
+    visualize_age_distribution(survey_data, save_path=produces)
 
 
 @pytask.task
 def task_plot_countplots(
-    depends_on=deps,
-    produces=BLD / "Fig4.png",
+    depends_on={"aggregates": AGGREGATES, "fingerprint": FINGERPRINTS / "plot4.json"},
+    produces={"figure": BLD / "Fig4.png", "asset": paper_asset("Fig4")},
 ):
     """Plotting countplots (Python version).
 
     Args:
-        depends_on (dict): Dependency dictionary containing the path to the data file.
-        produces (str): Path to the produced figure.
+        depends_on (dict): The aggregate cube and the fingerprint of the code read by the task.
+        produces (dict): Paths to the produced figure and its asset for the paper.
 
     Returns:
         Plot showing cross-country analysis.
     """
-    plot_countplots()
+    plot_countplots_from_aggregates(depends_on["aggregates"], save_path=produces["figure"], asset_path=produces["asset"])
 
-if __name__ == "__main__":
-    for group in GROUPS:
-        task_plot_countplots(depends_on={**deps, "group": group})
 
 @pytask.task
 def task_plot_ratio_bar_chart(
-    depends_on=deps,
-    produces=BLD / "Fig5.png",
+    depends_on={"aggregates": AGGREGATES, "fingerprint": FINGERPRINTS / "plot5.json"},
+    produces={"figure": BLD / "Fig5.png", "asset": paper_asset("Fig5")},
 ):
     """Plotting ratio bar chart (Python version).
 
     Args:
-        depends_on (dict): Dependency dictionary containing the path to the data file.
-        produces (str): Path to the produced figure.
+        depends_on (dict): The aggregate cube and the fingerprint of the code read by the task.
+        produces (dict): Paths to the produced figure and its asset for the paper.
 
     Returns:
         The plot where it shows the ratio of participants who has experienced climate shocks in their countries"
     """
-    combined_data = load_data(BLD / "survey_data.csv")
-    combined_data = replace_country_codes(combined_data)
-    combined_data = replace_experience_labels(combined_data)
-    combined_data_cleaned = filter_data(combined_data)
-    counts_by_country = calculate_ratios(combined_data_cleaned)
-    plot_ratio_bar_chart(counts_by_country, save_path=produces)
+    counts_by_country = ratios_from_aggregates(depends_on["aggregates"])
+    plot_ratio_bar_chart(counts_by_country, save_path=produces["figure"], asset_path=produces["asset"])
+
 
-if __name__ == "__main__":
-    for group in GROUPS:
-        task_plot_ratio_bar_chart(depends_on={**deps, "group": group})
+@pytask.task
+def task_write_paper_manifest(
+    depends_on=[paper_asset(name) for name in PAPER_FIGURES],
+    produces=PAPER_ASSETS / "assets.json",
+):
+    """Recording the content hashes of the figures of the paper.
 
+    The manifest is only rewritten when an asset changed, so the paper is not compiled
+    again when the figures were redrawn without changing.
 
+    Args:
+        depends_on (list): Paths to the assets of the figures of the paper.
+        produces (pathlib.Path): Path to the manifest.
+    """
+    write_manifest(depends_on, produces)
@@ -0,0 +1,70 @@
+"""Hooks of pytask, registered with ``hook_module`` in ``pyproject.toml``.
+
+Set the environment variable ``CLIMATE_SHOCKS_TRACE=1`` to record the tasks of a build
+and the instrumented stages they run, see ``climate_shocks.instrumentation``. The
+recording is written to a Chrome trace file in ``bld/traces``, which keeps the latest
+``MAX_TRACES`` traces.
+
+Tasks executed in the workers of pytask-parallel are not recorded. The recording lives
+in the process running the build, and timing the tasks there would only time their
+submission to the workers. The trace of a parallel build records its number of workers
+and no tasks.
+
+"""
+import datetime
+import platform
+
+import pytask
+
+from climate_shocks import config
+from climate_shocks.instrumentation import (
+    stage,
+    start_tracing,
+    stop_tracing,
+    write_trace,
+)
+
+
+@pytask.hookimpl(wrapper=True)
+def pytask_execute_build(session):
+    """Record the build and write its trace."""
+    if not config.TRACE or session.config["dry_run"] or session.config["explain"]:
+        return (yield)
+    started = datetime.datetime.now()
+    owner = start_tracing()
+    try:
+        return (yield)
+    finally:
+        if owner:
+            events = stop_tracing()
+            if events:
+                metadata = {
+                    "started": started.isoformat(timespec="seconds"),
+                    "tasks": sum(event["cat"] == "task" for event in events),
+                    "n_workers": _n_workers(session),
+                    "python": platform.python_version(),
+                }
+                name = f"pytask-{started:%Y%m%d-%H%M%S}.json"
+                write_trace(config.TRACES / name, events, metadata)
+                _prune_traces(config.TRACES, config.MAX_TRACES)
+
+
+@pytask.hookimpl(wrapper=True)
+def pytask_execute_task(session, task):
+    """Record a task as a stage unless it runs in a worker."""
+    if _n_workers(session) > 1:
+        return (yield)
+    with stage(task.name, category="task"):
+        return (yield)
+
+
+def _n_workers(session):
+    """Return the number of workers of pytask-parallel, 1 if it is not used."""
+    return session.config.get("n_workers", 1)
+
+
+def _prune_traces(directory, keep):
+    """Delete all but the latest traces of the builds."""
+    traces = sorted(directory.glob("pytask-*.json"))
+    for path in traces[: max(len(traces) - keep, 0)]:
+        path.unlink()
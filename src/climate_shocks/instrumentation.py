@@ -0,0 +1,247 @@
+"""Timing and memory instrumentation of the pipeline stages.
+
+The stages are wrapped with the ``instrument`` decorator or the ``stage`` context
+manager. While a trace is recording, see ``start_tracing``, every stage records
+
+* its wall time and the CPU time of the process,
+* the peak resident set size of the process at its end, and by how much the stage
+  raised it,
+* the number of rows of its input and its output, and
+* the bytes the process read and wrote through system calls. Memory-mapped files are
+  read by page faults and do not count.
+
+The events are written in the Chrome trace format, which ``chrome://tracing`` and
+Perfetto display as a timeline with nested stages. Stages of worker processes are not
+recorded.
+
+When no trace is recording, ``instrument`` calls the function after checking a single
+global, and ``stage`` returns an empty context, so the instrumentation can stay in
+place.
+
+"""
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_TRACE = {}
+
+
+def start_tracing():
+    """Start recording the stages in this process.
+
+    Returns:
+        bool: Whether a new trace was started. A running trace keeps recording.
+
+    """
+    if _TRACE:
+        return False
+    _TRACE.update(start=time.perf_counter_ns(), events=[])
+    return True
+
+
+def stop_tracing():
+    """Stop recording the stages.
+
+    Returns:
+        list: The recorded events, see ``stage``. Empty if no trace was recording.
+
+    """
+    events = _TRACE.get("events", [])
+    _TRACE.clear()
+    return events
+
+
+def is_tracing():
+    """Check whether the stages are recorded.
+
+    Returns:
+        bool: Whether a trace is recording.
+
+    """
+    return bool(_TRACE)
+
+
+def stage(name, category="stage", rows_in=None, **args):
+    """Record a block of code as a stage.
+
+    Args:
+        name (str): Name of the stage.
+        category (str): Kind of stage, for example ``"read"`` or ``"render"``.
+        rows_in (int, optional): Number of rows going into the stage.
+        **args: Further information shown with the stage.
+
+    Returns:
+        contextlib.AbstractContextManager: A context yielding the dict of the
+            measurements, in which the block may set ``rows_out``. Nothing is
+            measured if no trace is recording.
+
+    """
+    if not _TRACE:
+        return contextlib.nullcontext({})
+    return _record(name, category, {"rows_in": rows_in, **args})
+
+
+def instrument(category, name=None):
+    """Record every call of a function as a stage.
+
+    The rows going in are those of the first argument and the rows coming out those of
+    the result, if they are arrays, series or data frames.
+
+    Args:
+        category (str): Kind of stage, for example ``"read"`` or ``"render"``.
+        name (str, optional): Name of the stage. Defaults to the function name.
+
+    Returns:
+        callable: The decorator.
+
+    """
+
+    def decorator(function):
+        label = function.__name__ if name is None else name
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _TRACE:
+                return function(*args, **kwargs)
+            rows_in = _rows(args[0]) if args else None
+            with _record(label, category, {"rows_in": rows_in}) as record:
+                result = function(*args, **kwargs)
+                record["rows_out"] = _rows(result)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def write_trace(path, events, metadata=None):
+    """Write recorded events to a Chrome trace file.
+
+    Args:
+        path (str or pathlib.Path): Path to the JSON file.
+        events (list): The events, see ``stop_tracing``.
+        metadata (dict, optional): Information about the run.
+
+    Returns:
+        pathlib.Path: The path to the JSON file.
+
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    trace = {
+        "traceEvents": events,
+        "displayTimeUnit": "ms",
+        "otherData": metadata or {},
+    }
+    path.write_text(json.dumps(trace, indent=1) + "\n")
+    return path
+
+
+def read_trace(path):
+    """Read the events of a Chrome trace file.
+
+    Args:
+        path (str or pathlib.Path): Path to the JSON file.
+
+    Returns:
+        list: The events.
+
+    """
+    return json.loads(Path(path).read_text())["traceEvents"]
+
+
+def trace_frame(events):
+    """Tabulate the measurements of recorded stages.
+
+    Args:
+        events (list): The events, see ``stop_tracing``.
+
+    Returns:
+        pandas.DataFrame: One row per stage in the order they started, with the
+            category, the name, the start and the duration in seconds, and the
+            measurements.
+
+    """
+    import pandas as pd
+
+    records = [
+        {
+            "category": event["cat"],
+            "name": event["name"],
+            "start": event["ts"] / 1e6,
+            "seconds": event["dur"] / 1e6,
+            **event["args"],
+        }
+        for event in sorted(events, key=lambda event: event["ts"])
+    ]
+    return pd.DataFrame(records)
+
+
+@contextlib.contextmanager
+def _record(name, category, args):
+    """Measure a block of code and append it to the trace as a complete event."""
+    origin, events = _TRACE["start"], _TRACE["events"]
+    record = dict(args)
+    io_start, rss_start = _io_counters(), _peak_rss()
+    cpu_start = time.process_time()
+    start = time.perf_counter_ns()
+    try:
+        yield record
+    finally:
+        end = time.perf_counter_ns()
+        cpu = time.process_time() - cpu_start
+        io_end, rss_end = _io_counters(), _peak_rss()
+        record["cpu_seconds"] = cpu
+        record["peak_rss_bytes"] = rss_end
+        record["peak_rss_growth_bytes"] = _difference(rss_end, rss_start)
+        for key, counter in [("bytes_read", "rchar"), ("bytes_written", "wchar")]:
+            record[key] = _difference(io_end.get(counter), io_start.get(counter))
+        events.append(
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start - origin) / 1e3,
+                "dur": (end - start) / 1e3,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": record,
+            }
+        )
+
+
+def _rows(value):
+    shape = getattr(value, "shape", None)
+    return int(shape[0]) if isinstance(shape, tuple) and shape else None
+
+
+def _peak_rss():
+    """Read the peak resident set size of the process in bytes."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _io_counters():
+    """Read the I/O counters of the process on Linux."""
+    try:
+        with open("/proc/self/io") as stream:
+            lines = stream.read().splitlines()
+    except OSError:
+        return {}
+    return {key: int(value) for key, value in (line.split(": ") for line in lines)}
+
+
+def _difference(end, start):
+    return None if end is None or start is None else end - start
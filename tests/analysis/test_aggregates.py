@@ -0,0 +1,102 @@
+"""Tests for the aggregate cube."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from climate_shocks.analysis.aggregates import (
+    ALL,
+    answer_counts,
+    answer_ratios,
+    average_ratings,
+    build_aggregates,
+    cell_moments,
+    load_aggregates,
+    save_aggregates,
+    score_counts,
+    t_tests,
+)
+from climate_shocks.analysis.ratings_cube import aggregate_ratings, cube_t_test, ratings_cube
+from climate_shocks.analysis.scoring import score_scales
+from climate_shocks.final.plot1 import calculate_average_ratings
+from climate_shocks.final.plot5 import calculate_ratios, filter_data, replace_country_codes, replace_experience_labels
+
+SCALES = {'attitude': {'items': ['EAI_1', 'EAI_2'], 'reverse': ['EAI_2'], 'min': 1, 'max': 7, 'method': 'mean', 'missing': 'rescale'}}
+
+
+@pytest.fixture
+def responses():
+    """
+    Fixture providing responses with between-subject ratings, countries, answers and attitude items.
+    """
+    rng = np.random.default_rng(5)
+    n = 300
+    data = {}
+    for person in ['A', 'B']:
+        low = rng.random(n) < 0.5
+        for category in ['moral', 'I would']:
+            data[f'JB_low_{person}_{category}'] = np.where(low, rng.integers(1, 6, n), np.nan)
+            data[f'JB_high_{person}_{category}'] = np.where(~low, rng.integers(1, 6, n), np.nan)
+    # Country 4 and missing countries only count toward all respondents
+    data['Country_of_Residence'] = rng.choice([1, 2, 3, 4, np.nan], n)
+    data['CS_Experience'] = rng.choice([1, 2, 3, np.nan], n)
+    data['EAI_1'] = rng.integers(1, 8, n)
+    data['EAI_2'] = np.where(rng.random(n) < 0.9, rng.integers(1, 8, n), np.nan)
+    return pd.DataFrame(data)
+
+
+def test_queries_match_the_direct_computation(responses):
+    """
+    Test that averages, t-tests, Fig5 ratios and score counts queried from the cube match the survey.
+    """
+    aggregates = build_aggregates(responses, questions=['CS_Experience'], scales=SCALES)
+
+    expected = calculate_average_ratings(responses)
+    averages = average_ratings(aggregates)
+    assert averages[['Person', 'Category', 'Risk']].astype(str).equals(expected[['Person', 'Category', 'Risk']].astype(str))
+    np.testing.assert_allclose(averages['Average Rating'], expected['Average Rating'])
+
+    germany = responses[responses['Country_of_Residence'] == 1]
+    expected = cube_t_test(ratings_cube(germany), equal_var=False)
+    result = t_tests(aggregates, 'Germany', equal_var=False)
+    np.testing.assert_allclose(result[['T-Statistic', 'P-Value', 'DF']], expected[['T-Statistic', 'P-Value', 'DF']])
+
+    expected = calculate_ratios(filter_data(replace_experience_labels(replace_country_codes(responses.copy()))))
+    ratios = answer_ratios(aggregates, 'CS_Experience', labels={1: 'Yes', 2: 'No'}).reset_index()
+    pd.testing.assert_frame_equal(ratios, expected, check_names=False, check_dtype=False, check_like=True)
+
+    scores = score_scales(responses, SCALES)['attitude'].round(6)
+    expected = scores[responses['Country_of_Residence'] == 3].value_counts().sort_index()
+    np.testing.assert_array_equal(score_counts(aggregates, 'attitude', ['Indonesia']).to_numpy(), expected.to_numpy())
+
+
+def test_rollup_covers_all_respondents(responses):
+    """
+    Test that the rollup over the countries equals the cube of all respondents, including other countries.
+    """
+    aggregates = build_aggregates(responses, questions=['CS_Experience'])
+
+    expected = aggregate_ratings(ratings_cube(responses))
+    moments = cell_moments(aggregates, ALL)
+    np.testing.assert_array_equal(moments['count'], expected['count'])
+    np.testing.assert_allclose(moments[['mean', 'var']], expected[['mean', 'var']])
+
+    counts = answer_counts(aggregates, 'CS_Experience', countries=[ALL])
+    expected = responses['CS_Experience'].value_counts().sort_index()
+    np.testing.assert_array_equal(counts.loc[ALL].to_numpy(), expected.to_numpy())
+    assert counts.loc[ALL].sum() > answer_counts(aggregates, 'CS_Experience').to_numpy().sum()
+
+
+def test_save_aggregates_round_trip(responses, tmp_path):
+    """
+    Test that the saved cube is read back unchanged and only rewritten when it changed.
+    """
+    aggregates = build_aggregates(responses, questions=['CS_Experience'], scales=SCALES)
+    path = tmp_path / 'aggregates.json'
+    assert save_aggregates(aggregates, path)
+    loaded = load_aggregates(path)
+    for name, table in aggregates.items():
+        pd.testing.assert_index_equal(loaded[name].index, table.index)
+        pd.testing.assert_frame_equal(pd.DataFrame(loaded[name]), pd.DataFrame(table), check_exact=True)
+
+    assert not save_aggregates(loaded, path)
+    assert save_aggregates(build_aggregates(responses.iloc[1:], questions=['CS_Experience']), path)
@@ -0,0 +1,65 @@
+"""Tests for the figure assets of the paper."""
+
+import json
+import pandas as pd
+import pytest
+from climate_shocks.final.assets import (
+    PAPER_FIGURES,
+    asset_source,
+    paper_asset,
+    save_asset,
+    write_manifest,
+)
+from climate_shocks.final.figures import subplots
+from climate_shocks.final.plot5 import plot_ratio_bar_chart
+
+RATIOS = pd.DataFrame({
+    'Country_of_Residence': ['Germany', 'India', 'Indonesia'],
+    'Ratio_Yes': [0.25, 0.6, 0.4],
+    'Ratio_No': [0.75, 0.4, 0.6],
+})
+
+
+def test_vector_assets_are_only_written_when_they_change(tmp_path):
+    """
+    Test that vector assets render the same bytes every time, so an unchanged figure leaves its file alone.
+    """
+    path = tmp_path / 'Fig5.pdf'
+    plot_ratio_bar_chart(RATIOS, asset_path=path)
+    content, modified = path.read_bytes(), path.stat().st_mtime_ns
+    assert content.startswith(b'%PDF') and b'CreationDate' not in content
+
+    plot_ratio_bar_chart(RATIOS, asset_path=path)
+    assert path.read_bytes() == content and path.stat().st_mtime_ns == modified
+
+    plot_ratio_bar_chart(RATIOS.assign(Ratio_Yes=[0.3, 0.6, 0.4], Ratio_No=[0.7, 0.4, 0.6]), asset_path=path)
+    assert path.read_bytes() != content
+
+    fig, ax = subplots('svg', figsize=(5, 3))
+    ax.plot([0, 1, 2], [1, 3, 2])
+    assert save_asset(fig, tmp_path / 'line.svg')
+    assert not save_asset(fig, tmp_path / 'line.svg')
+    for format_ in ['eps', 'png']:
+        with pytest.raises(ValueError):
+            save_asset(fig, tmp_path / f'line.{format_}')
+
+
+def test_manifest_records_the_content_hashes(tmp_path):
+    """
+    Test that the manifest holds one hash per asset and is only rewritten when an asset changed.
+    """
+    assert paper_asset('Fig1', tmp_path) == tmp_path / f'Fig1.{PAPER_FIGURES["Fig1"]}'
+    assert asset_source(tmp_path / 'Fig1.pdf') == tmp_path / 'Fig1.pdf.source'
+    assets = [tmp_path / 'Fig4.pdf', tmp_path / 'Fig5.pdf']
+    assets[0].write_bytes(b'%PDF-1.4 four')
+    assets[1].write_bytes(b'%PDF-1.4 five')
+    manifest = tmp_path / 'assets.json'
+
+    assert write_manifest(assets, manifest)
+    digests = json.loads(manifest.read_text())
+    assert sorted(digests) == ['Fig4.pdf', 'Fig5.pdf'] and digests['Fig4.pdf'] != digests['Fig5.pdf']
+    assert not write_manifest(assets, manifest)
+
+    assets[1].write_bytes(b'%PDF-1.4 changed')
+    assert write_manifest(assets, manifest)
+    assert json.loads(manifest.read_text())['Fig4.pdf'] == digests['Fig4.pdf']
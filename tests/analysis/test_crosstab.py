@@ -0,0 +1,94 @@
+"""Tests for the sparse crosstab engine."""
+
+import itertools
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import chi2_contingency
+from scipy.stats.contingency import association
+from climate_shocks.analysis.crosstab import (
+    answer_totals,
+    association_table,
+    column_ratios,
+    contingency_table,
+    crosstab_items,
+    one_hot,
+    row_ratios,
+)
+from climate_shocks.final.plot5 import calculate_ratios, filter_data, replace_country_codes, replace_experience_labels
+
+ITEMS = ['ClimateConcern', 'CS_Experience', 'Gender', 'Country_of_Residence']
+
+
+@pytest.fixture
+def responses():
+    """
+    Fixture providing coded answers with missing values and categorical columns.
+    """
+    rng = np.random.default_rng(11)
+    n = 500
+    data = pd.DataFrame({
+        'ClimateConcern': pd.array(rng.choice([1, 2, 3, 4], n), dtype='Int8'),
+        'CS_Experience': rng.choice([1, 2, np.nan], n),
+        'Gender': pd.Categorical(rng.choice([1, 2, 3], n, p=[0.49, 0.49, 0.02])),
+        'Country_of_Residence': pd.Categorical(rng.choice([1, 2, 3, 4], n, p=[0.3, 0.3, 0.3, 0.1])),
+    })
+    data.loc[rng.random(n) < 0.05, 'ClimateConcern'] = pd.NA
+    return data
+
+
+def test_contingency_tables_match_pandas_crosstab(responses):
+    """
+    Test that every block of the sparse product equals pandas.crosstab of the two items.
+    """
+    matrix, levels = one_hot(responses, ITEMS)
+    assert matrix.shape == (len(responses), len(levels))
+    assert (matrix.sum(axis=1) <= len(ITEMS)).all()
+
+    crosstab = crosstab_items(responses, ITEMS)
+    numeric = responses.apply(lambda column: pd.to_numeric(column.astype(object)))
+    for row, column in itertools.combinations(ITEMS, 2):
+        expected = pd.crosstab(numeric[row], numeric[column])
+        pd.testing.assert_frame_equal(contingency_table(crosstab, row, column), expected, check_names=False, check_dtype=False, check_index_type=False, check_column_type=False)
+    expected = numeric['ClimateConcern'].value_counts().sort_index()
+    np.testing.assert_array_equal(answer_totals(crosstab, 'ClimateConcern').to_numpy(), expected.to_numpy())
+
+
+def test_association_table_matches_scipy(responses):
+    """
+    Test that the chi-square statistics, degrees of freedom, p-values and Cramer's V match scipy for every pair.
+    """
+    crosstab = crosstab_items(responses, ITEMS)
+    result = association_table(crosstab)
+    assert len(result) == len(ITEMS) * (len(ITEMS) - 1) // 2
+
+    for (row, column), test in result.iterrows():
+        table = contingency_table(crosstab, row, column).to_numpy()
+        statistic, p_value, dof, _ = chi2_contingency(table, correction=False)
+        assert test['N'] == table.sum()
+        assert test['DF'] == dof
+        np.testing.assert_allclose([test['Chi-Square'], test['P-Value']], [statistic, p_value])
+        np.testing.assert_allclose(test["Cramer's V"], association(table, method='cramer', correction=False))
+
+
+def test_labels_and_ratios(responses):
+    """
+    Test that labelled tables give the Fig5 ratios and that unknown items raise a KeyError.
+    """
+    crosstab = crosstab_items(responses, ITEMS)
+    table = contingency_table(
+        crosstab, 'Country_of_Residence', 'CS_Experience',
+        row_labels={1: 'Germany', 2: 'India', 3: 'Indonesia'}, column_labels={1: 'Yes', 2: 'No'},
+    )
+    assert table.index.tolist() == ['Germany', 'India', 'Indonesia']
+    assert table.columns.tolist() == ['Yes', 'No']
+
+    expected = calculate_ratios(filter_data(replace_experience_labels(replace_country_codes(responses.copy()))))
+    expected = expected.set_index('Country_of_Residence')
+    np.testing.assert_allclose(row_ratios(table)['Yes'], expected['Ratio_Yes'])
+    np.testing.assert_allclose(column_ratios(table).sum(), 1.0)
+
+    with pytest.raises(KeyError):
+        contingency_table(crosstab, 'Country_of_Residence', 'Education')
+    with pytest.raises(KeyError):
+        crosstab_items(responses, ['Education'])
@@ -0,0 +1,70 @@
+"""Tests for the batch export of plotly figures."""
+
+import json
+import sys
+import types
+import plotly.graph_objects as go
+import pytest
+from climate_shocks.final.export import ExportJob, export_figures
+
+
+@pytest.fixture
+def figure():
+    """
+    Fixture providing a small plotly figure.
+    """
+    return go.Figure(go.Bar(x=['A', 'B'], y=[1, 2]), layout={'width': 300})
+
+
+@pytest.fixture
+def fake_kaleido(monkeypatch):
+    """
+    Fixture replacing Kaleido with a recorder of the server starts and the rendered batches.
+    """
+    calls = {'start': [], 'batches': [], 'errors': ()}
+    kaleido = types.SimpleNamespace(
+        start_sync_server=lambda **kwargs: calls['start'].append(kwargs),
+        stop_sync_server=lambda **kwargs: None,
+        write_fig_from_object_sync=lambda specs: calls['batches'].append(specs) or calls['errors'],
+    )
+    monkeypatch.setitem(sys.modules, 'kaleido', kaleido)
+    return calls
+
+
+def test_export_text_formats(figure, tmp_path):
+    """
+    Test that HTML and JSON files are written directly, into new folders.
+    """
+    paths = export_figures([ExportJob(figure, tmp_path / 'html' / 'fig.html'), ExportJob(figure, tmp_path / 'fig.txt', 'json')])
+
+    assert paths == [tmp_path / 'html' / 'fig.html', tmp_path / 'fig.txt']
+    assert '<html>' in paths[0].read_text()
+    assert json.loads(paths[1].read_text())['data'][0]['type'] == 'bar'
+
+
+def test_export_images_in_one_batch(figure, tmp_path, fake_kaleido):
+    """
+    Test that all images are rendered in one batch by the warm server.
+    """
+    export_figures([ExportJob(figure, tmp_path / 'a.png'), ExportJob(figure, tmp_path / 'b.pdf', scale=3)], n_renderers=2)
+    export_figures([ExportJob(figure, tmp_path / 'c.svg')], n_renderers=2)
+
+    assert fake_kaleido['start'] == [{'n': 2, 'silence_warnings': True}] * 2
+    first, second = fake_kaleido['batches']
+    assert [spec['path'] for spec in first] == [tmp_path / 'a.png', tmp_path / 'b.pdf']
+    assert [spec['opts']['format'] for spec in first] == ['png', 'pdf']
+    assert first[1]['opts']['scale'] == 3
+    assert first[0]['opts']['width'] == 300
+    assert len(second) == 1
+
+
+def test_export_errors(figure, tmp_path, fake_kaleido):
+    """
+    Test that unsupported formats and failed renders raise errors.
+    """
+    with pytest.raises(ValueError):
+        export_figures([ExportJob(figure, tmp_path / 'fig.bmp')])
+
+    fake_kaleido['errors'] = (ValueError('render failed'),)
+    with pytest.raises(RuntimeError):
+        export_figures([ExportJob(figure, tmp_path / 'fig.png')])
@@ -0,0 +1,84 @@
+"""Tests for the headless rendering of the figures."""
+
+from concurrent.futures import ThreadPoolExecutor
+import matplotlib.pyplot as plt
+import pandas as pd
+import pytest
+from climate_shocks import config
+from climate_shocks.final.figures import finish, subplots
+from climate_shocks.final.plot2 import visualize_p_values_heatmap
+from climate_shocks.final.plot5 import plot_ratio_bar_chart
+
+
+@pytest.fixture
+def no_show(monkeypatch):
+    """
+    Fixture failing the test if a figure is shown.
+    """
+    def show(*args, **kwargs):
+        raise AssertionError('A figure was shown in headless mode.')
+    monkeypatch.setattr(config, 'HEADLESS', True)
+    monkeypatch.setattr(plt, 'show', show)
+
+
+def test_figure_functions_close_their_figures(no_show, tmp_path):
+    """
+    Test that repeated figure functions show nothing and leave no figure open.
+    """
+    ratios = pd.DataFrame({'Country_of_Residence': ['Germany', 'India'], 'Ratio_Yes': [0.4, 0.9], 'Ratio_No': [0.6, 0.1]})
+    t_tests = pd.DataFrame({'Person': ['A', 'A', 'B', 'B'], 'Category': ['moral', 'I would'] * 2, 'P-Value': [0.1, 0.2, 0.3, 0.4]})
+    plt.close('all')
+
+    for i in range(5):
+        plot_ratio_bar_chart(ratios, save_path=tmp_path / f'ratios_{i}.png')
+        visualize_p_values_heatmap(t_tests, save_path=tmp_path / f'heatmap_{i}.png')
+
+    assert plt.get_fignums() == []
+    assert len(list(tmp_path.iterdir())) == 10
+
+
+def test_headless_figures_leave_no_global_state(no_show):
+    """
+    Test that headless figures, also those left behind by an error, never enter pyplot.
+    """
+    plt.close('all')
+    for _ in range(3):
+        with pytest.raises(KeyError):
+            plot_ratio_bar_chart(pd.DataFrame({'Country_of_Residence': [1, 2]}))
+
+    fig, axes = subplots('grid', nrows=2, ncols=2, figsize=(4, 3))
+    assert axes.shape == (2, 2)
+    assert tuple(fig.get_size_inches()) == (4, 3)
+    assert fig.get_label() == 'grid'
+    assert plt.get_fignums() == []
+
+
+def test_figures_render_concurrently(no_show, tmp_path):
+    """
+    Test that figure functions running in parallel threads each write their own figure.
+    """
+    t_tests = pd.DataFrame({'Person': ['A', 'A', 'B', 'B'], 'Category': ['moral', 'I would'] * 2, 'P-Value': [0.1, 0.2, 0.3, 0.4]})
+    paths = [tmp_path / f'heatmap_{i}.png' for i in range(8)]
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda path: visualize_p_values_heatmap(t_tests, save_path=path), paths))
+
+    sizes = {path.stat().st_size for path in paths}
+    assert len(sizes) == 1
+    assert plt.get_fignums() == []
+
+
+def test_interactive_mode_shows_figures(monkeypatch):
+    """
+    Test that figures are shown, and matplotlib figures still closed, when not headless.
+    """
+    shown = []
+    monkeypatch.setattr(config, 'HEADLESS', False)
+    monkeypatch.setattr(plt, 'show', lambda: shown.append('matplotlib'))
+    plotly_figure = type('Figure', (), {'show': lambda self: shown.append('plotly')})()
+
+    fig, _ = subplots('interactive')
+    finish(fig)
+    finish(plotly_figure)
+
+    assert shown == ['matplotlib', 'plotly']
+    assert 'interactive' not in plt.get_figlabels()
@@ -0,0 +1,69 @@
+"""Tests for the histograms binned with NumPy."""
+
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from climate_shocks.final.histograms import ecdf, histogram_table
+from climate_shocks.final.Plot3 import plot_score_histogram
+
+
+def scores(n, seed=0):
+    """
+    Draw scores of respondents from three countries, with some missing scores and countries.
+    """
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({
+        'score': np.round(rng.normal(4.5, 0.8, n), 4),
+        'Country_of_Residence': rng.choice(['Germany', 'India', 'Indonesia'], n),
+    })
+    data.loc[rng.random(n) < 0.02, 'score'] = np.nan
+    data.loc[rng.random(n) < 0.02, 'Country_of_Residence'] = None
+    return data
+
+
+def test_histogram_table_matches_numpy():
+    """
+    Test that the bins of every group match numpy.histogram on shared edges and that the percents add up to 100.
+    """
+    data = scores(5000)
+    table = histogram_table(data, 'score', 'Country_of_Residence', bins=20)
+
+    observed = data.dropna()
+    edges = np.histogram_bin_edges(observed['score'], bins=20)
+    assert table['Country_of_Residence'].unique().tolist() == observed['Country_of_Residence'].unique().tolist()
+    for country, bins in table.groupby('Country_of_Residence'):
+        expected, _ = np.histogram(observed.loc[observed['Country_of_Residence'] == country, 'score'], bins=edges)
+        np.testing.assert_array_equal(bins['count'], expected)
+        np.testing.assert_allclose(bins['left'], edges[:-1])
+        assert bins['percent'].sum() == pytest.approx(100)
+
+
+def test_ecdf_is_exact_or_downsampled():
+    """
+    Test that the ECDF is exact for few distinct values and keeps at most the requested points otherwise.
+    """
+    result = ecdf([3, 1, 2, 2, np.nan])
+    assert result['value'].tolist() == [1, 2, 3]
+    np.testing.assert_allclose(result['share'], [0.25, 0.75, 1.0])
+
+    values = np.random.default_rng(1).normal(size=100_000)
+    result = ecdf(values, max_points=50)
+    assert len(result) <= 50
+    assert result['value'].is_monotonic_increasing and result['share'].is_monotonic_increasing
+    np.testing.assert_allclose(result['share'], [np.mean(values <= value) for value in result['value']])
+    assert result['share'].iloc[-1] == 1.0
+
+
+def test_figure_payload_does_not_grow_with_the_sample():
+    """
+    Test that the GEA histogram holds only bar traces and its data stays a few KB for 1,000 and 100,000 respondents.
+    """
+    sizes = []
+    for n in [1_000, 100_000]:
+        figure = plot_score_histogram(scores(n))
+        assert {trace.type for trace in figure.data} == {'bar'}
+        sizes.append(len(json.dumps(json.loads(figure.to_json())['data'])))
+
+    assert max(sizes) < 16_000
+    assert sizes[1] < 1.2 * sizes[0]
@@ -8,7 +8,8 @@ import pytest
 from scipy.stats import ttest_ind
 import seaborn as sns
 import matplotlib.pyplot as plt
-from climate_shocks.analysis.model import load_data, replace_column_names, perform_t_test
+from climate_shocks.analysis.model import load_data, replace_column_names
+from climate_shocks.analysis.ttest import perform_t_test
 
 
 
@@ -25,12 +26,13 @@ def test_load_data():
     """
     Test loading data function.
 
-    Checks if the data is loaded correctly from a CSV file.
+    Checks if the data is loaded correctly from a CSV file, with the ratings
+    stored as compact int8 values.
     """
     file_path = 'test_survey_data.csv'
     test_data.to_csv(file_path, index=False)
     loaded_data = load_data(file_path)
-    assert loaded_data.equals(test_data)
+    pd.testing.assert_frame_equal(loaded_data, test_data.astype('Int8'))
     os.remove(file_path)
 
 def test_replace_column_names():
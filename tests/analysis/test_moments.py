@@ -0,0 +1,105 @@
+"""Tests for the persisted sufficient statistics."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from climate_shocks.analysis.model import load_data, replace_column_names
+from climate_shocks.analysis.moments import (
+    append_export,
+    append_responses,
+    batch_store,
+    empty_store,
+    load_store,
+    merge_moments,
+    merge_stores,
+    store_average_ratings,
+    store_moments,
+    store_ratios,
+    store_t_test,
+)
+from climate_shocks.analysis.ratings_cube import cube_t_test, ratings_cube
+from climate_shocks.analysis.stratified import stratified_ratios
+from climate_shocks.data_management.schema import columns_for
+from climate_shocks.final.plot1 import calculate_average_ratings
+
+
+@pytest.fixture
+def responses():
+    """
+    Fixture providing responses with between-subject ratings, countries and experiences.
+    """
+    rng = np.random.default_rng(3)
+    n = 400
+    data = {}
+    for person in ['A', 'B']:
+        low = rng.random(n) < 0.5
+        for category in ['moral', 'I would']:
+            data[f'JB_low_{person}_{category}'] = np.where(low, rng.integers(1, 6, n), np.nan)
+            data[f'JB_high_{person}_{category}'] = np.where(~low, rng.integers(1, 6, n), np.nan)
+    data['Country_of_Residence'] = rng.integers(1, 4, n)
+    data['CS_Experience'] = rng.choice(['Yes', 'No'], n)
+    return pd.DataFrame(data)
+
+
+def test_appended_batches_match_the_full_recompute(responses, tmp_path):
+    """
+    Test that averages, t-tests and ratios from batches folded into a saved store match the whole data.
+    """
+    path = tmp_path / 'moments.json'
+    for batch in np.array_split(np.arange(len(responses)), 7):
+        append_responses(path, responses.iloc[batch])
+    store = load_store(path)
+
+    expected = calculate_average_ratings(responses)
+    averages = store_average_ratings(store)
+    assert averages[['Person', 'Category', 'Risk']].astype(str).equals(expected[['Person', 'Category', 'Risk']].astype(str))
+    np.testing.assert_allclose(averages['Average Rating'], expected['Average Rating'])
+
+    expected = cube_t_test(ratings_cube(responses), equal_var=False)
+    t_tests = store_t_test(store, equal_var=False)
+    np.testing.assert_allclose(t_tests[['T-Statistic', 'P-Value', 'DF']], expected[['T-Statistic', 'P-Value', 'DF']])
+
+    pd.testing.assert_frame_equal(store_ratios(store), stratified_ratios(responses, ['Country_of_Residence']), check_names=False, check_index_type=False)
+
+
+def test_merge_moments_is_stable():
+    """
+    Test that merging many batches far from zero keeps the variance accurate.
+    """
+    rng = np.random.default_rng(0)
+    values = 1e9 + rng.normal(0, 1, 10_000)
+    moments = empty_store()['ratings']
+    for batch in np.array_split(values, 100):
+        cell = pd.MultiIndex.from_tuples([('A', 'Low', 'moral')], names=['Person', 'Risk', 'Category'])
+        centered = batch - batch.mean()
+        batch_moments = pd.DataFrame({'count': [len(batch)], 'mean': [batch.mean()], 'm2': [(centered**2).sum()]}, index=cell)
+        moments = merge_moments(moments, batch_moments)
+
+    result = store_moments({'ratings': moments})
+    assert result['count'].iloc[0] == len(values)
+    assert result['mean'].iloc[0] == pytest.approx(values.mean(), rel=1e-15)
+    assert result['var'].iloc[0] == pytest.approx(values.var(ddof=1), rel=1e-7)
+    naive = ((values**2).sum() - len(values) * values.mean()**2) / (len(values) - 1)
+    assert naive != pytest.approx(values.var(ddof=1), rel=1e-2)
+
+
+def test_merge_stores_of_different_strata(responses):
+    """
+    Test that stores counting answers in different strata cannot be merged.
+    """
+    with pytest.raises(ValueError):
+        merge_stores(batch_store(responses), batch_store(responses, groups=['CS_Experience'], column='Country_of_Residence'))
+
+
+def test_append_export_matches_the_whole_survey(tmp_path):
+    """
+    Test that survey exports appended one after the other give the store of the whole survey.
+    """
+    survey = pd.read_csv('bld/survey_data.csv')
+    for i, rows in enumerate(np.array_split(np.arange(len(survey)), 2)):
+        survey.iloc[rows].to_csv(tmp_path / f'export_{i}.csv', index=False)
+        store = append_export(tmp_path / f'export_{i}.csv', tmp_path / 'moments.json')
+
+    expected = batch_store(replace_column_names(load_data('bld/survey_data.csv', [*columns_for('model'), 'Country_of_Residence', 'CS_Experience'])))
+    pd.testing.assert_frame_equal(store_moments(store), store_moments(expected), check_dtype=False)
+    assert store['answers'].sort_index().tolist() == expected['answers'].sort_index().tolist()
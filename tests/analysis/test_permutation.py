@@ -0,0 +1,124 @@
+"""Tests for the permutation tests."""
+
+import itertools
+import numpy as np
+import pytest
+from scipy.stats import ttest_ind
+from climate_shocks.analysis.permutation import permutation_t_test
+
+
+def brute_force_p_value(low, high):
+    """
+    Enumerate all relabellings of two small samples.
+    """
+    pooled = np.concatenate([low, high])
+    observed = abs(low.mean() - high.mean())
+    extreme = 0
+    combinations = list(itertools.combinations(range(len(pooled)), len(low)))
+    for combination in combinations:
+        mask = np.zeros(len(pooled), dtype=bool)
+        mask[list(combination)] = True
+        extreme += abs(pooled[mask].mean() - pooled[~mask].mean()) >= observed - 1e-12
+    return extreme / len(combinations)
+
+
+@pytest.fixture
+def likert_blocks():
+    """
+    Fixture providing low and high risk blocks of Likert ratings with missing values.
+    """
+    rng = np.random.default_rng(1)
+    low = rng.integers(1, 8, size=(150, 6)).astype(float)
+    high = rng.integers(1, 8, size=(150, 6)).astype(float) + np.array([0, 0, 0, 1, 2, 3])
+    low[rng.random(low.shape) < 0.2] = np.nan
+    high[rng.random(high.shape) < 0.2] = np.nan
+    return low, high
+
+
+def test_exact_permutation_test():
+    """
+    Test that small contrasts are enumerated exactly.
+    """
+    low = np.array([[1.0, 2.0], [2.0, 2.0], [4.0, np.nan], [np.nan, 5.0]])
+    high = np.array([[5.0, 1.0], [6.0, 3.0], [7.0, 3.0], [5.0, np.nan]])
+    results = permutation_t_test(low, high, n_permutations=1_000)
+
+    assert results['exact'].all()
+    for j in range(2):
+        expected = brute_force_p_value(low[~np.isnan(low[:, j]), j], high[~np.isnan(high[:, j]), j])
+        assert results['pvalue'].iloc[j] == pytest.approx(expected)
+
+
+def test_permutation_test_is_reproducible(likert_blocks):
+    """
+    Test that the p-values depend only on the seed, not on the number of workers.
+    """
+    low, high = likert_blocks
+    serial = permutation_t_test(low, high, n_permutations=20_000, chunk_size=2_000, seed=3, alpha=None)
+    parallel = permutation_t_test(low, high, n_permutations=20_000, chunk_size=2_000, seed=3, alpha=None, n_jobs=2)
+
+    assert serial.equals(parallel)
+    assert not serial.equals(permutation_t_test(low, high, n_permutations=20_000, chunk_size=2_000, seed=4, alpha=None))
+
+
+def test_permutation_test_stopping_early_is_reproducible(likert_blocks):
+    """
+    Test that with early stopping the p-values and draws depend neither on the number of workers nor on the other contrasts.
+    """
+    low, high = likert_blocks
+    serial = permutation_t_test(low, high, n_permutations=20_000, chunk_size=500, seed=3, alpha=0.3)
+    parallel = permutation_t_test(low, high, n_permutations=20_000, chunk_size=500, seed=3, alpha=0.3, n_jobs=3)
+    assert serial.equals(parallel)
+    assert serial['n_permutations'].nunique() > 1
+
+    alone = permutation_t_test(low[:, :1], high[:, :1], n_permutations=20_000, chunk_size=500, seed=3, alpha=0.3)
+    assert alone.iloc[0].equals(serial.iloc[0])
+
+
+def test_permutation_test_close_to_t_test(likert_blocks):
+    """
+    Test that the permutation p-values agree with the t-test for moderately large samples.
+    """
+    low, high = likert_blocks
+    results = permutation_t_test(low, high, n_permutations=50_000, alpha=None)
+
+    for j in range(low.shape[1]):
+        expected = ttest_ind(low[~np.isnan(low[:, j]), j], high[~np.isnan(high[:, j]), j])
+        assert results['statistic'].iloc[j] == pytest.approx(expected.statistic)
+        assert results['pvalue'].iloc[j] == pytest.approx(expected.pvalue, abs=0.02)
+
+
+def test_permutation_test_continuous_values(likert_blocks):
+    """
+    Test that data with many distinct values gives the same p-values up to Monte Carlo error.
+    """
+    low, high = likert_blocks
+    jitter = np.random.default_rng(2).normal(scale=1e-6, size=low.shape)
+    discrete = permutation_t_test(low, high, n_permutations=20_000, alpha=None)
+    continuous = permutation_t_test(low + jitter, high, n_permutations=20_000, alpha=None)
+
+    np.testing.assert_allclose(continuous['pvalue'], discrete['pvalue'], atol=0.02)
+
+
+def test_permutation_test_stops_early(likert_blocks):
+    """
+    Test that clearly significant contrasts stop before all permutations are drawn.
+    """
+    low, high = likert_blocks
+    results = permutation_t_test(low, high, n_permutations=100_000, chunk_size=1_000)
+
+    assert results['n_permutations'].iloc[-1] < 100_000
+    assert results['ci_high'].iloc[-1] < 0.05
+
+
+def test_permutation_test_values_in_blocks(likert_blocks, monkeypatch):
+    """
+    Test that drawing the sort keys of continuous data in small blocks gives the same p-values as one block per chunk.
+    """
+    low, high = likert_blocks
+    low = low + np.random.default_rng(2).normal(scale=1e-6, size=low.shape)
+    whole = permutation_t_test(low, high, n_permutations=2_000, chunk_size=1_000, alpha=None)
+    monkeypatch.setattr('climate_shocks.analysis.permutation.VALUES_BLOCK', 7 * low.size)
+    blocks = permutation_t_test(low, high, n_permutations=2_000, chunk_size=1_000, alpha=None)
+
+    assert blocks.equals(whole)
@@ -1,7 +1,10 @@
 import pytest
 import pandas as pd
 from climate_shocks.final.plot1 import read_and_process_data, calculate_average_ratings, create_and_show_chart, save_chart_as_image
-from climate_shocks.final.plot4 import load_data, plot_countplots
+from climate_shocks.analysis.aggregates import answer_counts, build_aggregates, save_aggregates
+from climate_shocks.analysis.model import replace_column_names
+from climate_shocks.data_management.schema import columns_for
+from climate_shocks.final.plot4 import load_data, plot_countplots, count_answers, plot_countplots_from_aggregates, SELECTED_COLUMNS
 from climate_shocks.final.plot5 import load_data, replace_country_codes, replace_experience_labels, filter_data, calculate_ratios, plot_ratio_bar_chart
 
 def test_read_and_process_data():
@@ -51,6 +54,23 @@ def test_plot_countplots():
     """
     plot_countplots()
 
+def test_countplots_from_counts(tmp_path):
+    """
+    Test if the Fig4 counts from the crosstab engine and from the aggregate cube match the respondents and are plotted.
+    """
+    df = replace_column_names(load_data('bld/survey_data.csv', columns_for('aggregates')))
+    counts = count_answers(df)
+    countries = df['Country_of_Residence'].map({1: 'Germany', 2: 'India', 3: 'Indonesia'})
+    aggregates = build_aggregates(df, questions=SELECTED_COLUMNS)
+    for col in SELECTED_COLUMNS:
+        expected = df.groupby([countries, df[col]], observed=True).size().unstack(fill_value=0)
+        assert counts[col].to_numpy().tolist() == expected.to_numpy().tolist()
+        assert answer_counts(aggregates, col).loc[:, counts[col].columns].equals(counts[col].rename_axis(index='Country_of_Residence', columns='Answer'))
+
+    save_aggregates(aggregates, tmp_path / 'aggregates.json')
+    plot_countplots_from_aggregates(tmp_path / 'aggregates.json', save_path=tmp_path / 'Fig4.png')
+    assert (tmp_path / 'Fig4.png').stat().st_size > 0
+
 def test_filter_data():
     """
     Test for filtering data.
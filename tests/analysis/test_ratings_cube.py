@@ -0,0 +1,86 @@
+"""Tests for the ratings cube."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from climate_shocks.analysis.ratings_cube import aggregate_ratings, cube_t_test, ratings_cube
+from climate_shocks.analysis.ttest import perform_t_test
+from climate_shocks.final.plot1 import calculate_average_ratings
+
+PERSONS = ['A', 'B', 'C']
+CATEGORIES = ['sustainability', 'moral', 'I would', 'Others would', 'People should']
+
+
+@pytest.fixture
+def ratings():
+    """
+    Fixture providing all rating columns with between-subject gaps and another column.
+    """
+    rng = np.random.default_rng(0)
+    n = 50
+    data = pd.DataFrame({'Age': rng.integers(18, 70, size=n)})
+    for risk in ['low', 'high']:
+        for person in PERSONS:
+            for category in CATEGORIES:
+                column = pd.array(rng.integers(1, 8, size=n), dtype='Int8')
+                column[rng.random(n) < 0.5] = pd.NA
+                data[f'JB_{risk}_{person}_{category}'] = column
+    return data
+
+
+def test_ratings_cube_layout(ratings):
+    """
+    Test that the cube holds every non-missing rating once, indexed by respondent, person, risk and category.
+    """
+    cube = ratings_cube(ratings)
+
+    assert cube.index.names == ['Respondent', 'Person', 'Risk', 'Category']
+    assert len(cube) == ratings.filter(like='JB_').count().sum()
+    assert cube.loc[(3, 'B', 'High', 'I would')] == ratings.loc[3, 'JB_high_B_I would']
+    assert list(cube.index.levels[2]) == ['Low', 'High']
+
+
+def test_calculate_average_ratings_from_cube(ratings):
+    """
+    Test that the average ratings match the column means in person, risk and category order.
+    """
+    average_ratings = calculate_average_ratings(ratings)
+
+    expected = [
+        (person, category, risk, ratings[f'JB_{risk.lower()}_{person}_{category}'].mean())
+        for person in PERSONS for risk in ['Low', 'High'] for category in CATEGORIES
+    ]
+    assert list(average_ratings.columns) == ['Person', 'Category', 'Risk', 'Average Rating']
+    assert [tuple(row[:3]) for row in expected] == list(
+        average_ratings[['Person', 'Category', 'Risk']].itertuples(index=False, name=None)
+    )
+    np.testing.assert_allclose(average_ratings['Average Rating'], [row[3] for row in expected])
+
+
+def test_aggregate_ratings_by_person(ratings):
+    """
+    Test the counts and variances when aggregating over fewer levels.
+    """
+    aggregated = aggregate_ratings(ratings_cube(ratings), ['Person'])
+    columns = ratings.filter(regex='^JB_.*_A_')
+
+    assert aggregated.loc['A', 'count'] == columns.count().sum()
+    assert aggregated.loc['A', 'var'] == pytest.approx(columns.stack().astype(float).var())
+
+
+def test_cube_t_test_matches_perform_t_test(ratings):
+    """
+    Test that the t-tests from the cube match the wide t-tests.
+    """
+    results = cube_t_test(ratings_cube(ratings), PERSONS, CATEGORIES)
+    expected = perform_t_test(ratings, PERSONS, CATEGORIES)
+
+    pd.testing.assert_frame_equal(results, expected, check_exact=False)
+
+
+def test_ratings_cube_without_rating_columns():
+    """
+    Test that data without rating columns is rejected.
+    """
+    with pytest.raises(ValueError):
+        ratings_cube(pd.DataFrame({'Age': [20, 30]}))
@@ -0,0 +1,68 @@
+"""Tests for the scale scoring engine."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from climate_shocks.analysis.scoring import load_scales, score_scales
+
+
+@pytest.fixture
+def answers():
+    """
+    Fixture providing answers to three items, with one missing answer.
+    """
+    return pd.DataFrame({
+        'Q1': pd.array([1, 7, 4, None], dtype='Int8'),
+        'Q2': pd.array([2, 6, 4, 5], dtype='Int8'),
+        'Q3': pd.array([7, 1, None, None], dtype='Int8'),
+    })
+
+
+def test_score_scales(answers):
+    """
+    Test reverse keying, weights, sums and the rescaling of missing items for several scales at once.
+    """
+    scales = {
+        'mean': {'items': ['Q1', 'Q2', 'Q3'], 'reverse': ['Q3'], 'min': 1, 'max': 7},
+        'weighted': {'items': ['Q1', 'Q2'], 'weights': {'Q1': 3}, 'min': 1, 'max': 7, 'method': 'sum'},
+        'complete': {'items': ['Q1', 'Q3'], 'min': 1, 'max': 7, 'missing': 'complete'},
+    }
+    scores = score_scales(answers, scales)
+
+    np.testing.assert_allclose(scores['mean'], [(1 + 2 + 1) / 3, (7 + 6 + 7) / 3, 4, 5])
+    np.testing.assert_allclose(scores['weighted'], [3 + 2, 21 + 6, 12 + 4, 5 * 4])
+    np.testing.assert_allclose(scores['complete'], [4, 4, np.nan, np.nan])
+
+
+def test_score_scales_min_items(answers):
+    """
+    Test that respondents who answered too few items get no score.
+    """
+    scales = {'scale': {'items': ['Q1', 'Q2', 'Q3'], 'min': 1, 'max': 7, 'min_items': 2}}
+
+    np.testing.assert_allclose(score_scales(answers, scales)['scale'], [10 / 3, 14 / 3, 4, np.nan])
+
+
+def test_gea_scale_matches_hand_coded_score():
+    """
+    Test the declared GEA scale against the hand-coded reversals and average.
+    """
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(rng.integers(1, 8, size=(20, 24)), columns=[f'EAI_{i}' for i in range(1, 25)]).astype('Int8')
+    reverse = [7, 8, 9, 10, 13, 14, 17, 18, 19, 20]
+    expected = sum(8 - data[f'EAI_{i}'] if i in reverse else data[f'EAI_{i}'] for i in range(1, 25)) / 24
+
+    np.testing.assert_allclose(score_scales(data, load_scales(['gea']))['gea'], expected.astype(float))
+
+
+@pytest.mark.parametrize('spec', [
+    {'items': ['Q1'], 'reverse': ['Q2'], 'min': 1, 'max': 7},
+    {'items': ['Q1'], 'missing': 'impute', 'min': 1, 'max': 7},
+    {'items': ['Q1'], 'min': 1, 'max': 3},
+])
+def test_score_scales_rejects_invalid_input(answers, spec):
+    """
+    Test that invalid specifications and answers outside the range are rejected.
+    """
+    with pytest.raises(ValueError):
+        score_scales(answers, {'scale': spec})
@@ -0,0 +1,106 @@
+"""Tests for the survey session memoizing the data within one process."""
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from climate_shocks.analysis.model import load_data, replace_column_names
+from climate_shocks.analysis.ratings_cube import ratings_cube
+from climate_shocks.analysis.scoring import load_scales, score_scales
+from climate_shocks.analysis.session import SurveySession
+from climate_shocks.data_management.response_matrix import build_response_matrix
+from climate_shocks.data_management.schema import columns_for
+
+
+@pytest.fixture
+def survey(tmp_path):
+    """
+    Fixture writing a small survey with three numeric columns to a CSV file.
+    """
+    path = tmp_path / 'survey.csv'
+    pd.DataFrame({'a': [1, 2, 3, 4], 'b': [5, 6, 7, 8], 'c': [9, 10, 11, 12]}).to_csv(path, index=False)
+    return path
+
+
+def test_columns_are_loaded_once_and_shared(survey):
+    """
+    Test that overlapping column sets share the memoized columns and that new columns leave them unchanged.
+    """
+    session = SurveySession()
+    first = session.load_columns(survey, ['a', 'b'])
+    assert session.stats == {'hits': 0, 'misses': 2, 'evictions': 0}
+
+    second = session.load_columns(survey, ['b', 'c'])
+    assert session.stats['hits'] == 1 and session.stats['misses'] == 3
+    assert second.columns.tolist() == ['b', 'c']
+    assert np.shares_memory(first['b'].to_numpy(), second['b'].to_numpy())
+    pd.testing.assert_frame_equal(second, load_data(survey, ['b', 'c']))
+
+    second['d'] = second['b'] * 2
+    second['b'] = 0
+    pd.testing.assert_frame_equal(session.load_columns(survey, ['b']), load_data(survey, ['b']))
+
+
+def test_changed_values_do_not_reach_the_session(survey):
+    """
+    Test that changing values of a loaded frame in place leaves the columns returned by the next load unchanged.
+    """
+    session = SurveySession()
+    first = session.load_columns(survey, ['a', 'b'])
+    first.loc[0, 'a'] = 99
+    first.loc[first['b'] > 6, 'b'] = 0
+
+    assert first['a'].tolist() == [99, 2, 3, 4] and first['b'].tolist() == [5, 6, 0, 0]
+    pd.testing.assert_frame_equal(session.load_columns(survey, ['a', 'b']), load_data(survey, ['a', 'b']))
+    assert session.stats['hits'] == 2
+
+
+def test_changed_source_is_loaded_again(survey):
+    """
+    Test that a source with a new modification time or size is read again instead of served from the session.
+    """
+    session = SurveySession()
+    assert session.load_columns(survey, ['a'])['a'].tolist() == [1, 2, 3, 4]
+
+    pd.DataFrame({'a': [4, 3, 2, 1, 0], 'b': 1, 'c': 2}).to_csv(survey, index=False)
+    stat = survey.stat()
+    os.utime(survey, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert session.load_columns(survey, ['a'])['a'].tolist() == [4, 3, 2, 1, 0]
+    assert session.stats['hits'] == 0 and session.stats['misses'] == 2
+
+
+def test_least_recently_used_entries_are_evicted(survey):
+    """
+    Test that the session stays within its memory budget by evicting the least recently used columns, and that derived views, also read from the response matrix, match direct computation.
+    """
+    column_size = session_size_of(survey, 'a')
+    session = SurveySession(memory_budget=2 * column_size)
+    session.load_columns(survey, ['a', 'b'])
+    session.load_columns(survey, ['a'])
+    session.load_columns(survey, ['c'])
+    assert session.stats['evictions'] == 1
+    assert session.size() <= session.memory_budget
+    assert [key[-1] for key in session.entries] == ['a', 'c']
+
+    session = SurveySession(memory_budget=column_size - 1)
+    assert session.load_columns(survey, ['a'])['a'].tolist() == [1, 2, 3, 4]
+    assert len(session.entries) == 0
+
+    session = SurveySession()
+    source = 'bld/survey_data.csv'
+    expected = ratings_cube(replace_column_names(load_data(source, columns_for('model'))))
+    pd.testing.assert_series_equal(session.load_ratings_cube(source), expected)
+    assert session.load_ratings_cube(source) is session.load_ratings_cube(source)
+    expected = score_scales(load_data(source, columns_for('gea')), load_scales(['gea']))['gea']
+    pd.testing.assert_series_equal(session.load_gea_scores(source), expected)
+
+    responses = survey.parent / 'responses'
+    build_response_matrix(source, responses, cache_dir=survey.parent / 'cache')
+    pd.testing.assert_series_equal(session.load_gea_scores(source, responses), expected)
+
+
+def session_size_of(survey, column):
+    session = SurveySession()
+    session.load_columns(survey, [column])
+    return session.size()
@@ -0,0 +1,72 @@
+"""Tests for the stratified analysis."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from climate_shocks.analysis.stratified import stratified_average_ratings, stratified_ratios, stratified_t_test
+from climate_shocks.analysis.ttest import perform_t_test
+from climate_shocks.final.plot5 import calculate_ratios
+
+PERSONS = ['A', 'B']
+CATEGORIES = ['moral', 'I would']
+
+
+@pytest.fixture
+def survey():
+    """
+    Fixture providing ratings with missing values, two grouping columns and experience labels.
+    """
+    rng = np.random.default_rng(0)
+    n = 300
+    data = pd.DataFrame({
+        'Country_of_Residence': pd.Categorical(rng.integers(1, 4, size=n)),
+        'Gender': pd.array(rng.integers(1, 3, size=n), dtype='Int8'),
+        'CS_Experience': pd.Categorical(rng.choice(['Yes', 'No'], size=n)),
+    })
+    for risk in ['low', 'high']:
+        for person in PERSONS:
+            for category in CATEGORIES:
+                ratings = pd.array(rng.integers(1, 8, size=n), dtype='Int8')
+                ratings[rng.random(n) < 0.4] = pd.NA
+                data[f'JB_{risk}_{person}_{category}'] = ratings
+    data.loc[0, 'Gender'] = pd.NA
+    return data
+
+
+def test_stratified_t_test_matches_subsets(survey):
+    """
+    Test that every stratum gives the same t-tests as the subset of its respondents.
+    """
+    results = stratified_t_test(survey, ['Country_of_Residence', 'Gender'], PERSONS, CATEGORIES)
+
+    assert results.index.names == ['Country_of_Residence', 'Gender', 'Person', 'Category']
+    for (country, gender), stratum in results.groupby(level=['Country_of_Residence', 'Gender'], observed=True):
+        subset = survey[(survey['Country_of_Residence'] == country) & (survey['Gender'] == gender)]
+        expected = perform_t_test(subset, PERSONS, CATEGORIES)
+        np.testing.assert_allclose(stratum['T-Statistic'], expected['T-Statistic'])
+        np.testing.assert_allclose(stratum['P-Value'], expected['P-Value'])
+        np.testing.assert_allclose(stratum['DF'], expected['DF'])
+
+
+def test_stratified_average_ratings(survey):
+    """
+    Test the counts and average ratings of every stratum and that missing strata are left out.
+    """
+    results = stratified_average_ratings(survey, ['Gender'], PERSONS, CATEGORIES)
+
+    assert len(results) == 2 * len(PERSONS) * 2 * len(CATEGORIES)
+    subset = survey[survey['Gender'] == 2]
+    rating = results.loc[(2, 'B', 'High', 'I would')]
+    assert rating['Count'] == subset['JB_high_B_I would'].count()
+    assert rating['Average Rating'] == pytest.approx(subset['JB_high_B_I would'].mean())
+
+
+def test_stratified_ratios_match_calculate_ratios(survey):
+    """
+    Test that stratifying by country gives the ratios plotted in Fig5.
+    """
+    results = stratified_ratios(survey, ['Country_of_Residence'])
+    expected = calculate_ratios(survey).set_index('Country_of_Residence')
+
+    for column in ['Yes', 'No', 'Ratio_Yes', 'Ratio_No']:
+        np.testing.assert_allclose(results[column], expected[column])
@@ -0,0 +1,66 @@
+"""Tests for the batch t-test engine."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import ttest_ind
+from climate_shocks.analysis.ttest import batch_t_test, perform_t_test
+
+
+@pytest.fixture
+def blocks():
+    """
+    Fixture providing low and high risk blocks of Likert ratings with missing values.
+    """
+    rng = np.random.default_rng(0)
+    low = rng.integers(1, 8, size=(200, 40)).astype(float)
+    high = rng.integers(1, 8, size=(200, 40)).astype(float)
+    low[rng.random(low.shape) < 0.3] = np.nan
+    high[rng.random(high.shape) < 0.5] = np.nan
+    return low, high
+
+
+@pytest.mark.parametrize('equal_var', [True, False])
+def test_batch_t_test_matches_scipy(blocks, equal_var):
+    """
+    Test that every contrast matches scipy's ttest_ind on the non-missing ratings.
+    """
+    low, high = blocks
+    results = batch_t_test(low, high)
+    test = 'student' if equal_var else 'welch'
+
+    for j in range(low.shape[1]):
+        expected = ttest_ind(low[~np.isnan(low[:, j]), j], high[~np.isnan(high[:, j]), j], equal_var=equal_var)
+        assert results[f't_{test}'].iloc[j] == pytest.approx(expected.statistic, rel=1e-10)
+        assert results[f'p_{test}'].iloc[j] == pytest.approx(expected.pvalue, rel=1e-8)
+        assert results[f'df_{test}'].iloc[j] == pytest.approx(expected.df, rel=1e-10)
+
+
+def test_batch_t_test_masked_input(blocks):
+    """
+    Test that masked arrays with a sentinel give the same results as NaN blocks.
+    """
+    low, high = blocks
+    masked_low = np.ma.masked_equal(np.nan_to_num(low, nan=-1).astype(np.int8), -1)
+    masked_high = np.ma.masked_equal(np.nan_to_num(high, nan=-1).astype(np.int8), -1)
+
+    pd.testing.assert_frame_equal(batch_t_test(masked_low, masked_high), batch_t_test(low, high))
+
+
+def test_perform_t_test_layout():
+    """
+    Test that the results keep one row per person and category with the original columns, followed by DF.
+    """
+    data = pd.DataFrame({
+        'JB_low_A_moral': pd.array([1, 2, None, 4], dtype='Int8'),
+        'JB_high_A_moral': pd.array([5, None, 6, 7], dtype='Int8'),
+        'JB_low_B_moral': pd.array([1, 2, 3, 4], dtype='Int8'),
+        'JB_high_B_moral': pd.array([1, 2, 3, 5], dtype='Int8'),
+    })
+    results = perform_t_test(data, ['A', 'B'], ['moral'])
+
+    assert list(results.columns) == ['Person', 'Category', 'T-Statistic', 'P-Value', 'DF']
+    assert list(results['Person']) == ['A', 'B']
+    expected = ttest_ind([1, 2, 4], [5, 6, 7])
+    assert results['T-Statistic'].iloc[0] == pytest.approx(expected.statistic)
+    assert results['P-Value'].iloc[0] == pytest.approx(expected.pvalue)
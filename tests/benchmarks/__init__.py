@@ -0,0 +1 @@
+"""Tests for the benchmarks module."""
\ No newline at end of file
@@ -0,0 +1,73 @@
+"""Tests for the synthetic surveys and the benchmark suite."""
+
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from climate_shocks.benchmarks.suite import STAGES, compare_results, read_results, run_benchmarks, write_results
+from climate_shocks.benchmarks.synthetic import load_template, synthetic_survey, write_synthetic_survey
+from climate_shocks.data_management.schema import apply_dtypes
+
+
+@pytest.fixture(scope='module')
+def template():
+    """
+    Fixture loading the archived survey export.
+    """
+    return load_template()
+
+
+def test_synthetic_survey_has_the_schema_of_the_template(template, tmp_path):
+    """
+    Test that a synthetic survey written in chunks parses to the columns and dtypes of the template.
+    """
+    path = write_synthetic_survey(tmp_path / 'survey.csv', 2_500, template, chunksize=1_000)
+    data = pd.read_csv(path)
+
+    assert len(data) == 2_500
+    pd.testing.assert_series_equal(data.dtypes, template.dtypes)
+    assert data['ResponseId'].is_unique
+    apply_dtypes(data)
+
+
+def test_synthetic_survey_keeps_the_questionnaire_structure(template):
+    """
+    Test that rating blocks are shown as a whole and that multi-select answers are sorted subsets.
+    """
+    data = synthetic_survey(5_000, template, seed=1)
+
+    for person in ['A', 'B', 'C']:
+        for risk in ['low', 'high']:
+            shown = data.filter(regex=f'^JB_{risk}_{person}_').notna()
+            assert shown.all(axis=1).equals(shown.any(axis=1))
+    jb = data.filter(regex='^JB_').stack()
+    assert set(jb.unique()) <= set(template.filter(regex='^JB_').stack().unique())
+
+    options = {option for answer in template['CS_Type'].dropna() for option in answer.split(',')}
+    for answer in data['CS_Type'].dropna().head(200):
+        chosen = answer.split(',')
+        assert set(chosen) <= options
+        assert chosen == sorted(chosen, key=int)
+    assert 0 < data['CS_Type'].isna().mean() < 1
+
+
+def test_run_benchmarks_writes_comparable_results(template, tmp_path):
+    """
+    Test that every stage is profiled at every size and that a run compares with itself.
+    """
+    results = run_benchmarks([200, 400], work_dir=tmp_path, template=template)
+    path = write_results(results, tmp_path / 'results.json')
+    results = read_results(path)
+
+    assert [run['rows'] for run in results['runs']] == [200, 400]
+    for run in results['runs']:
+        assert list(run['stages']) == STAGES
+        assert all(profile['seconds'] > 0 and profile['peak_bytes'] > 0 for profile in run['stages'].values())
+
+    comparison = compare_results(results, results)
+    assert np.allclose(comparison[['seconds', 'peak_bytes']], 1)
+    assert not comparison['regression'].any()
+
+    slower = json.loads(json.dumps(results))
+    slower['runs'][0]['stages']['read']['seconds'] *= 2
+    assert compare_results(results, slower)['regression'].tolist() == [True] + [False] * (2 * len(STAGES) - 1)
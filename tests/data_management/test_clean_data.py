@@ -3,6 +3,7 @@ import pandas as pd
 import pytest
 from climate_shocks.config import TEST_DIR
 from climate_shocks.data_management.clean_data import read_data, clean_column_names, rename_countries, filter_data, save_filtered_data, clean_data
+from climate_shocks.data_management.clean_data import iter_chunks, clean_chunks, save_filtered_chunks, chunksize_for_budget
 from climate_shocks.utilities import read_yaml
 
 
@@ -67,3 +68,39 @@ def test_save_filtered_data(sample_data):
     
 
 
+@pytest.fixture
+def raw_file(tmp_path):
+    """
+    Fixture writing a raw export with padded names, missing ratings and a fourth country.
+    """
+    data = pd.DataFrame({
+        'ResponseId': [f'R_{i}' for i in range(7)],
+        '\xa0EAI_1': [1, 2, 3, 4, 5, 6, 7],
+        '\xa0EAI_2': [4, np.nan, 6, 7, 1, 2, np.nan],
+        'EAI_25': [1, 1, 1, 1, 1, 1, 1],
+        'Country_of_Residence': [1, 2, 3, 4, 4, 1, 2],
+    })
+    file_path = tmp_path / 'raw_survey.csv'
+    data.to_csv(file_path, index=False)
+    return file_path
+
+@pytest.mark.parametrize('chunksize', [1, 2, 3, 100])
+def test_chunked_pipeline_is_byte_identical(raw_file, tmp_path, chunksize):
+    """
+    Test that streaming chunks through the stages writes the same bytes as the in-memory path.
+    """
+    in_memory_path = tmp_path / 'in_memory.csv'
+    chunked_path = tmp_path / 'chunked.csv'
+
+    save_filtered_data(filter_data(clean_data(read_data(raw_file))), in_memory_path)
+    n_rows = save_filtered_chunks(clean_chunks(iter_chunks(raw_file, chunksize)), chunked_path)
+
+    assert chunked_path.read_bytes() == in_memory_path.read_bytes()
+    assert n_rows == 5
+
+def test_chunksize_for_budget(raw_file):
+    """
+    Test that the chunk size grows with the memory budget.
+    """
+    assert chunksize_for_budget(raw_file, memory_budget=1) == 1
+    assert chunksize_for_budget(raw_file, memory_budget=10**6) > chunksize_for_budget(raw_file, memory_budget=10**4)
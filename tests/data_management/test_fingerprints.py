@@ -0,0 +1,102 @@
+import json
+import pandas as pd
+import pytest
+from climate_shocks.config import SRC
+from climate_shocks.data_management.fingerprints import column_digests, imported_modules, write_fingerprint
+
+
+@pytest.fixture
+def survey(tmp_path):
+    """
+    Fixture writing a small survey export and a code module, and returning a function to edit the survey.
+    """
+    data = pd.DataFrame({
+        'JB_low_A_moral': [1, 2, 3],
+        'EAI_1': [7, 6, 5],
+        'GPS_text': ['a', 'b', 'c'],
+    })
+    file_path = tmp_path / 'survey_data.csv'
+    data.to_csv(file_path, index=False)
+    module = tmp_path / 'plot.py'
+    module.write_text('x = 1\n')
+
+    def edit(column, values):
+        data[column] = values
+        data.to_csv(file_path, index=False)
+
+    return file_path, module, edit
+
+
+def test_fingerprint_ignores_other_columns(survey, tmp_path):
+    """
+    Test that editing a column the consumer does not read leaves the fingerprint untouched.
+    """
+    file_path, module, edit = survey
+    path = tmp_path / 'fingerprints' / 'plot.json'
+    columns = ['JB_low_A_moral', 'EAI_1']
+    assert write_fingerprint(path, file_path, columns, [module], tmp_path / 'cache')
+    text = path.read_text()
+
+    edit('GPS_text', ['x', 'y', 'z'])
+    assert not write_fingerprint(path, file_path, columns, [module], tmp_path / 'cache')
+    assert path.read_text() == text
+    assert list(json.loads(text)['columns']) == columns
+
+
+def test_fingerprint_tracks_columns_and_code(survey, tmp_path):
+    """
+    Test that the fingerprint is rewritten when a read column or the code changes.
+    """
+    file_path, module, edit = survey
+    path = tmp_path / 'plot.json'
+    columns = ['JB_low_A_moral']
+    write_fingerprint(path, file_path, columns, [module], tmp_path / 'cache')
+
+    edit('JB_low_A_moral', [1, 2, 4])
+    assert write_fingerprint(path, file_path, columns, [module], tmp_path / 'cache')
+
+    module.write_text('x = 2\n')
+    assert write_fingerprint(path, file_path, columns, [module], tmp_path / 'cache')
+    assert not write_fingerprint(path, file_path, columns, [module], tmp_path / 'cache')
+
+
+def test_column_digests_missing_column(survey, tmp_path):
+    """
+    Test that asking for a column outside the survey raises a KeyError.
+    """
+    file_path, _, _ = survey
+    digests = column_digests(file_path, [' EAI_1'], tmp_path / 'cache')
+    assert list(digests) == [' EAI_1']
+    with pytest.raises(KeyError):
+        column_digests(file_path, ['not_a_column'], tmp_path / 'cache')
+
+
+def test_fingerprint_tracks_imported_helpers(survey, tmp_path):
+    """
+    Test that the modules imported by a consumer, also inside functions, are found and that editing one changes the fingerprint.
+    """
+    file_path, _, _ = survey
+    package = tmp_path / 'climate_shocks'
+    (package / 'final').mkdir(parents=True)
+    (package / '__init__.py').write_text('')
+    (package / 'final' / '__init__.py').write_text('')
+    (package / 'final' / 'plot.py').write_text('import pandas as pd\nfrom climate_shocks.helpers import draw\n')
+    (package / 'helpers.py').write_text('def draw():\n    from climate_shocks import deep\n    return deep.x\n')
+    (package / 'deep.py').write_text('x = 1\n')
+    (package / 'unused.py').write_text('x = 1\n')
+
+    modules = imported_modules([package / 'final' / 'plot.py'], package)
+    names = [path.relative_to(package).as_posix() for path in modules]
+    assert names == ['__init__.py', 'deep.py', 'final/__init__.py', 'final/plot.py', 'helpers.py']
+
+    path = tmp_path / 'plot.json'
+    assert write_fingerprint(path, file_path, ['EAI_1'], modules, tmp_path / 'cache')
+    (package / 'unused.py').write_text('x = 2\n')
+    assert not write_fingerprint(path, file_path, ['EAI_1'], modules, tmp_path / 'cache')
+    (package / 'deep.py').write_text('x = 2\n')
+    assert write_fingerprint(path, file_path, ['EAI_1'], modules, tmp_path / 'cache')
+
+    # The modules of the aggregates consumer in task_data_management
+    modules = imported_modules([SRC / 'analysis' / 'aggregates.py', SRC / 'analysis' / 'scoring.py', SRC / 'analysis' / 'session.py'])
+    helpers = ['instrumentation.py', 'analysis/moments.py', 'data_management/schema.py', 'data_management/survey_cache.py', 'data_management/response_matrix.py']
+    assert {SRC / helper for helper in helpers} <= set(modules)
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+from climate_shocks.data_management.ingest import ingest_exports, resolve_exports
+
+
+@pytest.fixture
+def exports(tmp_path):
+    """
+    Fixture writing exports of two waves with the same file names and differing headers.
+    """
+    wave_1 = pd.DataFrame({
+        '\xa0EAI_1': [7, 6, 5],
+        'Country_of_Residence': [1, 2, 3],
+        'CS_Type': ['1,4', np.nan, '2'],
+    })
+    wave_2 = pd.DataFrame({
+        'EAI_1': [1, np.nan],
+        'Country_of_Residence': [3, 1],
+        'Age': [30, 41],
+    })
+    for wave, data in [('wave_1', wave_1), ('wave_2', wave_2)]:
+        (tmp_path / wave).mkdir()
+        data.to_csv(tmp_path / wave / 'germany.csv', index=False)
+    return tmp_path
+
+
+def test_ingest_glob_reconciles_columns(exports):
+    """
+    Test that a glob of exports is combined on the stripped names, with missing columns and the path relative to the glob root added as the source.
+    """
+    data = ingest_exports(str(exports / '*' / 'germany.csv'), cache_dir=exports / 'cache', n_jobs=1)
+
+    assert list(data.columns) == ['EAI_1', 'Country_of_Residence', 'CS_Type', 'Age', 'Source']
+    assert data['EAI_1'].dtype == 'Int8'
+    assert data['EAI_1'].tolist() == [7, 6, 5, 1, pd.NA]
+    assert data['Country_of_Residence'].tolist() == [1, 2, 3, 3, 1]
+    assert data['CS_Type'].isna().tolist() == [False, True, False, True, True]
+    assert data['Age'].isna().tolist() == [True, True, True, False, False]
+    assert data['Source'].tolist() == ['wave_1/germany.csv'] * 3 + ['wave_2/germany.csv'] * 2
+    assert [export.source for export in resolve_exports([exports / 'wave_1' / 'germany.csv'])] == [(exports / 'wave_1' / 'germany.csv').as_posix()]
+    assert len(list((exports / 'cache').iterdir())) == 2
+
+
+def test_ingest_manifest_in_parallel(exports):
+    """
+    Test that a manifest labels the waves and that the process pool gives the same data.
+    """
+    manifest = exports / 'exports.yaml'
+    manifest.write_text(yaml.safe_dump({'exports': [
+        {'path': 'wave_1/germany.csv', 'source': 'Germany', 'wave': 1},
+        {'path': 'wave_2/germany.csv', 'source': 'Germany', 'wave': 2},
+    ]}))
+    assert [export.path for export in resolve_exports(manifest)] == [exports / 'wave_1' / 'germany.csv', exports / 'wave_2' / 'germany.csv']
+
+    parallel = ingest_exports(manifest, ['EAI_1', 'Country_of_Residence'], cache_dir=exports / 'cache', n_jobs=2)
+    serial = ingest_exports(manifest, ['EAI_1', 'Country_of_Residence'], cache_dir=exports / 'cache', n_jobs=1)
+
+    pd.testing.assert_frame_equal(parallel, serial)
+    assert parallel['Wave'].tolist() == [1, 1, 1, 2, 2]
+    assert parallel['Source'].cat.categories.tolist() == ['Germany']
+
+
+def test_ingest_errors(exports):
+    """
+    Test that an empty glob raises a ValueError and an unknown column a KeyError.
+    """
+    with pytest.raises(ValueError):
+        ingest_exports(str(exports / '*' / 'india.csv'), cache_dir=exports / 'cache')
+    with pytest.raises(KeyError):
+        ingest_exports(str(exports / '*' / 'germany.csv'), ['not_a_column'], cache_dir=exports / 'cache', n_jobs=1)
@@ -0,0 +1,133 @@
+import mmap
+import numpy as np
+import pandas as pd
+import pytest
+from climate_shocks.data_management.response_matrix import (
+    MISSING,
+    battery_index,
+    build_response_matrix,
+    load_response_matrix,
+    masked_responses,
+    read_responses,
+    response_frame,
+    response_view,
+)
+from climate_shocks.data_management.schema import apply_dtypes
+
+SCHEMA = {
+    'batteries': {
+        'jb': {'dtype': 'Int8', 'columns': ['JB_low_A_moral', 'JB_high_A_moral']},
+        'eai': {'dtype': 'Int8', 'columns': ['EAI_1', 'EAI_2']},
+    },
+    'columns': {'Age': 'UInt8'},
+}
+
+
+@pytest.fixture
+def survey(tmp_path):
+    """
+    Fixture writing a small survey export and returning a function to edit it.
+    """
+    data = pd.DataFrame({
+        'JB_low_A_moral': [1, np.nan, 3, np.nan],
+        'JB_high_A_moral': [np.nan, 5, np.nan, 2],
+        '\xa0EAI_1': [7, 6, 5, 1],
+        'EAI_2': [-3, np.nan, 127, 0],
+        'Age': [30, 41, 25, 60],
+    })
+    file_path = tmp_path / 'survey_data.csv'
+    data.to_csv(file_path, index=False)
+
+    def edit(column, values):
+        data[column] = values
+        data.to_csv(file_path, index=False)
+
+    return file_path, edit
+
+
+def _backing_buffer(values):
+    while not isinstance(values, mmap.mmap) and getattr(values, 'base', None) is not None:
+        values = values.base
+    return values
+
+
+def test_response_matrix_gives_zero_copy_views(survey, tmp_path):
+    """
+    Test that the batteries are stored as int8 and read back as views of the memory-mapped file.
+    """
+    file_path, _ = survey
+    assert build_response_matrix(file_path, tmp_path / 'responses', ['jb', 'eai'], SCHEMA, tmp_path / 'cache')
+    matrix = load_response_matrix(tmp_path / 'responses')
+
+    assert matrix.values.dtype == np.int8
+    assert matrix.values.flags.f_contiguous
+    eai = response_view(matrix, 'eai')
+    assert np.shares_memory(eai, matrix.values)
+    np.testing.assert_array_equal(eai, [[7, -3], [6, MISSING], [5, 127], [1, 0]])
+    assert np.shares_memory(response_view(matrix, ['JB_high_A_moral', 'EAI_1']), matrix.values)
+    assert masked_responses(matrix, 'jb').count(axis=0).tolist() == [2, 2]
+
+    columns = ['EAI_1', 'Age', 'JB_low_A_moral']
+    data = read_responses(file_path, columns, tmp_path / 'responses', SCHEMA, tmp_path / 'cache')
+    expected = apply_dtypes(pd.read_csv(file_path).rename(columns=str.strip)[columns], SCHEMA)
+    pd.testing.assert_frame_equal(data, expected)
+    assert isinstance(_backing_buffer(data['EAI_1'].array._data), mmap.mmap)
+    assert response_frame(matrix)['EAI_2'].isna().tolist() == [False, True, False, False]
+
+
+def test_response_matrix_is_rebuilt_when_the_answers_change(survey, tmp_path):
+    """
+    Test that the matrix is only rewritten for edited answers, only the digests of the edited battery change, and that an outdated matrix is not read.
+    """
+    file_path, edit = survey
+    args = (tmp_path / 'responses', ['jb', 'eai'], SCHEMA, tmp_path / 'cache')
+    build_response_matrix(file_path, *args)
+    assert not build_response_matrix(file_path, *args)
+
+    edit('Age', [31, 42, 26, 61])
+    assert not build_response_matrix(file_path, *args)
+
+    jb, eai = battery_index('jb', tmp_path / 'responses'), battery_index('eai', tmp_path / 'responses')
+    jb_modified, eai_digests = jb.stat().st_mtime_ns, eai.read_text()
+    edit('EAI_2', [-3, 4, 127, 0])
+    with pytest.raises(ValueError):
+        read_responses(file_path, ['EAI_2'], tmp_path / 'responses', SCHEMA, tmp_path / 'cache')
+    assert build_response_matrix(file_path, *args)
+    assert read_responses(file_path, ['EAI_2'], tmp_path / 'responses', SCHEMA, tmp_path / 'cache')['EAI_2'].tolist() == [-3, 4, 127, 0]
+    assert jb.stat().st_mtime_ns == jb_modified
+    assert eai.read_text() != eai_digests
+
+
+def test_response_matrix_errors(survey, tmp_path):
+    """
+    Test that non-integer answers raise a ValueError and unknown batteries or columns a KeyError.
+    """
+    file_path, edit = survey
+    with pytest.raises(KeyError):
+        build_response_matrix(file_path, tmp_path / 'responses', ['gps'], SCHEMA, tmp_path / 'cache')
+
+    build_response_matrix(file_path, tmp_path / 'responses', ['jb'], SCHEMA, tmp_path / 'cache')
+    with pytest.raises(KeyError):
+        response_frame(load_response_matrix(tmp_path / 'responses'), ['EAI_1'])
+
+    edit('EAI_1', [7, 6.5, 5, 1])
+    with pytest.raises(ValueError):
+        build_response_matrix(file_path, tmp_path / 'responses', ['eai'], SCHEMA, tmp_path / 'cache')
+
+
+def test_response_matrix_rejects_text_answers(survey, tmp_path):
+    """
+    Test that answers that are not numbers raise a ValueError instead of being stored as missing, and that the matrix and its index are left as they were.
+    """
+    file_path, edit = survey
+    args = (tmp_path / 'responses', ['jb', 'eai'], SCHEMA, tmp_path / 'cache')
+    build_response_matrix(file_path, *args)
+    index = (tmp_path / 'responses' / 'responses.json').read_text()
+
+    edit('EAI_2', [-3, 'seven', 127, 0])
+    with pytest.raises(ValueError, match="'seven'"):
+        build_response_matrix(file_path, *args)
+
+    assert (tmp_path / 'responses' / 'responses.json').read_text() == index
+    assert sorted(path.name for path in (tmp_path / 'responses').iterdir()) == ['eai.json', 'jb.json', 'responses.json', 'responses.npy']
+    np.testing.assert_array_equal(response_view(load_response_matrix(tmp_path / 'responses'), 'eai')[:, 1], [-3, MISSING, 127, 0])
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+from climate_shocks.data_management.schema import apply_dtypes, column_dtypes, columns_for, load_schema
+
+
+@pytest.fixture
+def schema():
+    """
+    Fixture providing a small schema with one battery and one single column.
+    """
+    return {
+        'datetime_format': '%m/%d/%Y %H:%M',
+        'batteries': {'eai': {'dtype': 'Int8', 'columns': ['EAI_1', 'EAI_2']}},
+        'columns': {
+            'Country_of_Residence': 'category',
+            'LocationLatitude': 'float32',
+            'StartDate': 'datetime64[ns]',
+        },
+        'consumers': {'gea': ['eai', 'Country_of_Residence']},
+    }
+
+
+def test_columns_for(schema):
+    """
+    Test that batteries of a consumer are expanded into their items.
+    """
+    assert columns_for('gea', schema) == ['EAI_1', 'EAI_2', 'Country_of_Residence']
+    with pytest.raises(ValueError):
+        columns_for('unknown', schema)
+
+
+def test_apply_dtypes(schema):
+    """
+    Test that declared columns get compact dtypes, matched without surrounding whitespace.
+    """
+    data = pd.DataFrame({
+        '\xa0EAI_1': [1.0, np.nan, 7.0],
+        'EAI_2': [1, 2, 3],
+        'Country_of_Residence': [1.0, 2.0, np.nan],
+        'LocationLatitude': [50.9771, 28.6139, -7.8175],
+        'StartDate': ['1/6/2024 3:00', '1/6/2024 3:10', '1/7/2024 12:45'],
+        'IPAddress': ['109.42.177.178', '10.0.0.1', '10.0.0.2'],
+    })
+    typed = apply_dtypes(data.copy(), schema)
+
+    assert typed['\xa0EAI_1'].dtype == 'Int8'
+    assert typed['EAI_2'].dtype == 'Int8'
+    assert list(typed['Country_of_Residence'].cat.categories) == [1, 2]
+    assert typed['LocationLatitude'].dtype == np.float32
+    assert typed['StartDate'].iloc[2] == pd.Timestamp('2024-01-07 12:45')
+    assert typed['IPAddress'].dtype == object
+    assert typed.memory_usage(deep=True).sum() < data.memory_usage(deep=True).sum()
+
+
+def test_apply_dtypes_invalid(schema):
+    """
+    Test that values which do not fit the declared dtype raise a ValueError.
+    """
+    with pytest.raises(ValueError):
+        apply_dtypes(pd.DataFrame({'EAI_1': [1.5, 2.0]}), schema)
+
+
+def test_project_schema_covers_consumers():
+    """
+    Test that every column a consumer of the project schema reads has a declared dtype.
+    """
+    schema = load_schema()
+    dtypes = column_dtypes(schema)
+    for consumer in schema['consumers']:
+        assert set(columns_for(consumer, schema)) <= set(dtypes)
@@ -0,0 +1,145 @@
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import pytest
+from climate_shocks.data_management.clean_data import clean_data
+from climate_shocks.data_management.response_matrix import build_response_matrix, read_responses
+from climate_shocks.data_management.survey_cache import build_survey_cache, ingest_archive, read_manifest, read_survey
+
+
+@pytest.fixture
+def survey_file(tmp_path):
+    """
+    Fixture writing a small survey export with numeric, missing and text values.
+    """
+    data = pd.DataFrame({
+        'ResponseId': ['R_1', 'R_2', 'R_3', 'R_4', 'R_5'],
+        'JB_low_A_moral': [1, np.nan, 3, np.nan, 5],
+        '\xa0EAI_1': [7, 6, 5, 4, 3],
+        'CS_Type': ['1,4', np.nan, '2', '1,4', np.nan],
+        'Age': [19.0, 35.5, np.nan, 41.0, 28.0],
+        'Country_of_Residence': [1, 2, 3, 1, 4],
+    })
+    file_path = tmp_path / 'survey_data.csv'
+    data.to_csv(file_path, index=False)
+    return file_path
+
+
+def test_read_survey_matches_read_csv(survey_file, tmp_path):
+    """
+    Test that the cache returns the same frame as parsing the CSV.
+    """
+    cached = read_survey(survey_file, cache_dir=tmp_path / 'cache')
+    pd.testing.assert_frame_equal(cached, pd.read_csv(survey_file))
+
+
+def test_read_survey_chunked_build(survey_file, tmp_path):
+    """
+    Test that building the cache in small chunks unifies dtypes across chunks.
+    """
+    build_survey_cache(survey_file, cache_dir=tmp_path / 'cache', chunksize=2)
+    cached = read_survey(survey_file, cache_dir=tmp_path / 'cache')
+    pd.testing.assert_frame_equal(cached, pd.read_csv(survey_file))
+
+
+def test_read_survey_projection(survey_file, tmp_path):
+    """
+    Test that only the requested columns are returned, in the requested order.
+    """
+    cached = read_survey(survey_file, ['Age', 'CS_Type'], cache_dir=tmp_path / 'cache')
+    pd.testing.assert_frame_equal(cached, pd.read_csv(survey_file)[['Age', 'CS_Type']])
+
+    with pytest.raises(KeyError):
+        read_survey(survey_file, ['not_a_column'], cache_dir=tmp_path / 'cache')
+
+
+def test_read_survey_parses_once(survey_file, tmp_path, monkeypatch):
+    """
+    Test that a cached survey is not parsed again.
+    """
+    read_survey(survey_file, cache_dir=tmp_path / 'cache')
+
+    def fail(*args, **kwargs):
+        raise AssertionError('The CSV was parsed again.')
+
+    monkeypatch.setattr(pd, 'read_csv', fail)
+    read_survey(survey_file, ['Age'], cache_dir=tmp_path / 'cache')
+
+
+def test_cache_is_keyed_by_content(survey_file, tmp_path):
+    """
+    Test that a changed source gets a new entry and the stale entry is pruned.
+    """
+    cache_dir = tmp_path / 'cache'
+    old_entry = build_survey_cache(survey_file, cache_dir=cache_dir)
+    pd.read_csv(survey_file).head(2).to_csv(survey_file, index=False)
+    new_entry = build_survey_cache(survey_file, cache_dir=cache_dir)
+
+    assert new_entry != old_entry
+    assert not old_entry.exists()
+    assert read_manifest(new_entry)['rows'] == 2
+
+
+@pytest.fixture
+def survey_archive(survey_file, tmp_path):
+    """
+    Fixture zipping the survey export together with a macOS resource fork.
+    """
+    zip_path = tmp_path / 'survey_data.csv.zip'
+    with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.write(survey_file, 'survey_data.csv')
+        archive.writestr('__MACOSX/._survey_data.csv', b'resource fork')
+    return zip_path
+
+
+def test_read_survey_from_archive(survey_archive, survey_file, tmp_path):
+    """
+    Test that a zipped export is streamed into the same frame as the extracted CSV.
+    """
+    build_survey_cache(survey_archive, cache_dir=tmp_path / 'cache', chunksize=2)
+    cached = read_survey(survey_archive, cache_dir=tmp_path / 'cache')
+    pd.testing.assert_frame_equal(cached, pd.read_csv(survey_file))
+
+
+def test_ingest_archive(survey_archive, survey_file, tmp_path):
+    """
+    Test that ingesting an archive writes the cleaned data and skips unchanged archives.
+    """
+    clean_path = tmp_path / 'clean_filtered_data.csv'
+    expected = clean_data(pd.read_csv(survey_file)).to_csv(index=False)
+
+    assert ingest_archive(survey_archive, clean_path, cache_dir=tmp_path / 'cache', chunksize=2)
+    assert clean_path.read_text() == expected
+    assert not ingest_archive(survey_archive, clean_path, cache_dir=tmp_path / 'cache')
+
+
+def test_build_survey_cache_concurrently(survey_file, tmp_path):
+    """
+    Test that threads building the same entry at once leave one complete entry.
+    """
+    cache_dir = tmp_path / 'cache'
+    with ThreadPoolExecutor(4) as pool:
+        entries = list(pool.map(lambda _: build_survey_cache(survey_file, cache_dir=cache_dir), range(8)))
+
+    assert len(set(entries)) == 1
+    assert [path.name for path in cache_dir.iterdir()] == [entries[0].name]
+    pd.testing.assert_frame_equal(read_survey(survey_file, cache_dir=cache_dir), pd.read_csv(survey_file))
+
+
+def test_loaders_read_a_streamed_archive(survey_archive, survey_file, tmp_path):
+    """
+    Test that the loaders read a streamed archive from the entry written by ingest_archive without parsing it again.
+    """
+    cache_dir = tmp_path / 'cache'
+    ingest_archive(survey_archive, tmp_path / 'clean_filtered_data.csv', cache_dir=cache_dir, chunksize=2)
+    entries = sorted(path.name for path in cache_dir.iterdir())
+
+    schema = {'batteries': {'jb': {'dtype': 'Int8', 'columns': ['JB_low_A_moral']}}, 'columns': {}}
+    build_response_matrix(survey_archive, tmp_path / 'responses', batteries=['jb'], schema=schema, cache_dir=cache_dir)
+    data = read_responses(survey_archive, ['JB_low_A_moral', 'Age'], tmp_path / 'responses', schema=schema, cache_dir=cache_dir)
+
+    expected = pd.read_csv(survey_file)
+    assert data['JB_low_A_moral'].tolist() == [1, pd.NA, 3, pd.NA, 5]
+    pd.testing.assert_series_equal(data['Age'], expected['Age'])
+    assert sorted(path.name for path in cache_dir.iterdir()) == entries
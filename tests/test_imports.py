@@ -0,0 +1,59 @@
+"""Tests for the import-time budget of the package."""
+
+import json
+import subprocess
+import sys
+import pytest
+
+HEAVY_MODULES = ['matplotlib', 'plotly', 'scipy', 'seaborn']
+IMPORT_BUDGET = 0.1
+
+MODULES = [
+    'climate_shocks',
+    'climate_shocks.data_management.task_data_management',
+    'climate_shocks.analysis.task_analysis',
+    'climate_shocks.final.task_final',
+    'climate_shocks.final.merged',
+    'climate_shocks.hooks',
+]
+
+PROBE = """
+import json, sys
+import {module}
+schema = sys.modules.get('climate_shocks.data_management.schema')
+print(json.dumps({{
+    'heavy': sorted({{name.split('.')[0] for name in sys.modules}} & set({heavy})),
+    'schema_loaded': bool(schema and schema.load_schema.cache_info().currsize),
+}}))
+"""
+
+
+def import_profile(module):
+    """
+    Import a module in a fresh interpreter and return what it loaded and the time spent in the package.
+    """
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        capture_output=True, text=True, check=True,
+    )
+    seconds = 0.0
+    for line in process.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            own, _, name = line[len('import time:'):].split('|')
+            if name.strip().startswith('climate_shocks') and own.strip().isdigit():
+                seconds += int(own) / 1e6
+    return json.loads(process.stdout.splitlines()[-1]), seconds
+
+
+@pytest.mark.parametrize('module', MODULES)
+def test_imports_do_no_work(module):
+    """
+    Test that importing a module loads no plotting or scipy libraries, reads no schema and stays within the budget.
+    """
+    # The first import may compile the byte code.
+    import_profile(module)
+    loaded, seconds = import_profile(module)
+
+    assert loaded['heavy'] == []
+    assert not loaded['schema_loaded']
+    assert seconds < IMPORT_BUDGET
@@ -0,0 +1,106 @@
+"""Tests for the instrumentation of the pipeline stages."""
+
+import textwrap
+import numpy as np
+import pandas as pd
+import pytask
+import pytest
+from click.testing import CliRunner
+from climate_shocks import config
+from climate_shocks.instrumentation import (
+    instrument,
+    is_tracing,
+    read_trace,
+    stage,
+    start_tracing,
+    stop_tracing,
+    trace_frame,
+    write_trace,
+)
+
+
+@instrument('filter')
+def keep_even(data):
+    return data[data['x'] % 2 == 0]
+
+
+@pytest.fixture
+def tracing():
+    """
+    Fixture starting a trace and making sure it is stopped after the test.
+    """
+    assert start_tracing()
+    yield
+    stop_tracing()
+
+
+def test_disabled_instrumentation_records_nothing():
+    """
+    Test that instrumented functions and stages return their results unchanged when no trace is recording.
+    """
+    assert not is_tracing()
+    data = pd.DataFrame({'x': range(10)})
+    assert keep_even(data) is not None and len(keep_even(data)) == 5
+    assert keep_even.__name__ == 'keep_even'
+    with stage('block') as record:
+        record['rows_out'] = 1
+    assert stop_tracing() == []
+
+
+def test_stages_are_recorded_as_chrome_trace(tracing, tmp_path):
+    """
+    Test that nested stages record rows and measurements and that the Chrome trace file round-trips.
+    """
+    assert not start_tracing()
+    with stage('pipeline', category='task', rows_in=100) as record:
+        result = keep_even(pd.DataFrame({'x': range(100)}))
+        with open(tmp_path / 'numbers.bin', 'wb') as stream:
+            stream.write(np.zeros(1 << 20, dtype=np.uint8).tobytes())
+        record['rows_out'] = len(result)
+    events = stop_tracing()
+
+    frame = trace_frame(events).set_index('name')
+    assert frame.loc['pipeline', 'category'] == 'task'
+    assert frame.loc['keep_even', ['category', 'rows_in', 'rows_out']].tolist() == ['filter', 100, 50]
+    assert frame.loc['pipeline', 'rows_out'] == 50
+    assert frame.loc['pipeline', 'seconds'] >= frame.loc['keep_even', 'seconds']
+    assert frame.loc['pipeline', 'peak_rss_bytes'] > 0
+    if frame['bytes_written'].notna().all():
+        assert frame.loc['pipeline', 'bytes_written'] >= 1 << 20
+
+    path = write_trace(tmp_path / 'traces' / 'run.json', events, {'tasks': 1})
+    loaded = read_trace(path)
+    assert loaded == events
+    assert {event['ph'] for event in loaded} == {'X'}
+
+
+def test_pytask_build_writes_a_trace(tmp_path, monkeypatch):
+    """
+    Test that a pytask build with the hooks of the project writes a trace of its tasks and stages and keeps only the latest traces.
+    """
+    monkeypatch.setattr(config, 'TRACES', tmp_path / 'traces')
+    monkeypatch.setattr(config, 'TRACE', True)
+    monkeypatch.setattr(config, 'MAX_TRACES', 3)
+    (tmp_path / 'traces').mkdir()
+    old = [tmp_path / 'traces' / f'pytask-20240101-00000{i}.json' for i in range(3)]
+    for path in old:
+        path.write_text('{}')
+    (tmp_path / 'task_example.py').write_text(textwrap.dedent("""
+        from pathlib import Path
+        from typing import Annotated
+        import pandas as pd
+        from climate_shocks.data_management.clean_data import filter_data
+
+        def task_example() -> Annotated[str, Path('out.txt')]:
+            return str(len(filter_data(pd.DataFrame({'Country_of_Residence': ['India', 'Peru']}))))
+    """))
+
+    result = CliRunner().invoke(pytask.cli, ['--hook-module', 'climate_shocks.hooks', str(tmp_path)])
+
+    assert result.exit_code == pytask.ExitCode.OK
+    traces = sorted((tmp_path / 'traces').glob('pytask-*.json'))
+    assert traces[:-1] == old[1:]
+    frame = trace_frame(read_trace(traces[-1]))
+    assert frame['category'].tolist() == ['task', 'filter']
+    assert frame['name'].iloc[0].endswith('task_example')
+    assert not is_tracing()
@@ -1,3 +1,4 @@
+import sys
 import zipfile
 import os
 from pathlib import Path
@@ -11,8 +12,23 @@ def unzip_file(zip_file, extract_to):
     with zipfile.ZipFile(zip_file, 'r') as zip_ref:
         zip_ref.extractall(extract_to)
 
+def stream_file(zip_file, bld_dir):
+    """Ingest the archive into the survey cache and the cleaned data without extracting it.
+
+    A previously extracted export is removed, so the tasks read the archive as the survey.
+    """
+    from climate_shocks.data_management.survey_cache import ingest_archive
+
+    Path(bld_dir, "survey_data.csv").unlink(missing_ok=True)
+    ingested = ingest_archive(zip_file, Path(bld_dir) / "clean_filtered_data.csv",
+                              cache_dir=Path(bld_dir) / "survey_cache")
+    print("Archive ingested." if ingested else "Archive unchanged, nothing to do.")
+
 if __name__ == "__main__":
     create_bld_directory()
     zip_file = "src/climate_shocks/data/survey_data.csv.zip"
     extract_to = "bld"
-    unzip_file(zip_file, extract_to)
\ No newline at end of file
+    if "--stream" in sys.argv[1:]:
+        stream_file(zip_file, extract_to)
+    else:
+        unzip_file(zip_file, extract_to)